@@ -1,24 +1,65 @@
 import logging
 import os
 import secrets
-from logging.handlers import RotatingFileHandler
+import threading
 
+import click
 from dotenv import load_dotenv
-from flask import Flask, render_template, url_for, redirect, flash, request
+from flask import Flask, render_template, url_for, redirect, flash, request, jsonify, abort
 from flask_login import LoginManager, login_user, logout_user, login_required, current_user
 from flask_wtf import CSRFProtect
-
-from cat_api import get_random_cat
-from db import db
+from markupsafe import Markup
+from sqlalchemy import func, or_, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import joinedload
+
+from cache import LRUCache
+from cat_api import cat_client, get_random_cat
+from cat_api_async import async_cat_client
+from conditional import add_validators, client_is_fresh, not_modified, page_etag
+from counters import category_state, delete_author_vacancies
+from db import SQLITE_MAX_INTEGER, db, engine_options, tune_engine
 from forms import LoginForm, RegistrationForm, EditProfileForm, VacancyForm, EditVacancyForm, UserForm
-from models import User, Vacancy
-from seed import populate_database
+from logging_config import configure_logging
+from metrics import init_metrics
+from migrations import backfill_structured_fields, upgrade_database
+from models import User, Vacancy, category_registry
+from normalize import normalize_location
+from passwords import HashingBusy
+from pagination import decode_cursor, keyset_paginate, order_by_date, page_cursors
+from profiling import init_profiling
+from rate_limit import login_limiter
+from request_log import init_request_log
+from search import match_expression, matching_ids, search_vacancies
+from seed import REFERENCE_TIME, SEED_PASSWORD, populate_database, seed_database
+from user_loader import UserLoader
 
 #TODO make logs uniform
 load_dotenv()
 app = Flask(__name__)
 app.config["SECRET_KEY"] = os.environ.get('SECRET_KEY') or 'dev-key-for-testing-only'
-app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///vacancies.db'
+app.config['SQLALCHEMY_DATABASE_URI'] = os.environ.get('DATABASE_URL') or 'sqlite:///vacancies.db'
+# SQLite tuning, see db.SQLITE_PROFILES: 'production' (WAL, pooled connections) or 'default'
+app.config['SQLITE_PROFILE'] = os.environ.get('SQLITE_PROFILE') or 'production'
+app.config['SQLALCHEMY_ENGINE_OPTIONS'] = engine_options(profile=app.config['SQLITE_PROFILE'],
+                                                        url=app.config['SQLALCHEMY_DATABASE_URI'])
+app.config['CAT_PICS_ASYNC'] = os.environ.get('CAT_PICS_ASYNC', '1') == '1'
+# Requests sent with the token in an X-Profile header or _profile argument are profiled, see profiling.py
+app.config['PROFILING_ENABLED'] = os.environ.get('PROFILING_ENABLED') == '1'
+app.config['PROFILING_TOKEN'] = os.environ.get('PROFILING_TOKEN')
+# Prepare the database on the first request of each process, for deployments that do not run `flask init-db`
+app.config['AUTO_INIT_DB'] = os.environ.get('AUTO_INIT_DB', '1') == '1'
+
+# Rendered vacancy grids of the public listing, see vacancies()
+listing_cache = LRUCache(maxsize=int(os.environ.get('LISTING_CACHE_SIZE', 256)),
+                         ttl=int(os.environ.get('LISTING_CACHE_TTL', 60)))
+# Logged-in users, so most requests need no user query: 'memory' (per process), 'session' (in the cookie) or 'off'
+user_cache = LRUCache(maxsize=int(os.environ.get('USER_CACHE_SIZE', 1024)),
+                      ttl=int(os.environ.get('USER_CACHE_TTL', 30)))
+user_loader = UserLoader(cache=user_cache, mode=os.environ.get('USER_CACHE_MODE') or 'memory')
+
+# Category buttons of the listing are read from the cached category table
+app.jinja_env.globals['categories'] = category_registry
 
 csrf = CSRFProtect(app) # for manual forms for example: delete in profile
 
@@ -27,37 +68,136 @@ login_manager = LoginManager()
 login_manager.init_app(app=app)
 login_manager.login_view = 'login'
 
-# This makes ALL logs go to console
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s %(levelname)s %(name)s %(message)s',
-    handlers=[logging.StreamHandler()]  # Console only for basic config
-)
-
+# Requests only enqueue log records, one thread writes the files in logs/ and the console
+configure_logging(level=logging.INFO)
 logger = logging.getLogger('JobBoard')
-file_handler = RotatingFileHandler(filename='logs/job_portal.log', maxBytes=10_000, backupCount=5)
-file_handler.setFormatter(logging.Formatter('%(asctime)s %(levelname)s JobBoard %(message)s'))
-logger.addHandler(hdlr=file_handler)
-logger.setLevel(level=logging.INFO)
-logger.propagate = False  # Important: don't duplicate to basic config handlers
 
 
 @login_manager.user_loader
 def load_user(user_id):
-    return User.query.get(ident=int(user_id))
+    return user_loader.load(user_id)
 
 
 db.init_app(app)
 with app.app_context():
-    db.create_all()
+    tune_engine(engine=db.engine, profile=app.config['SQLITE_PROFILE'])
+    init_request_log(app=app, engine=db.engine)
+    init_metrics(app=app, engine=db.engine, caches={'listing': listing_cache, 'user': user_cache}, cat_client=cat_client)
+    init_profiling(app=app, engine=db.engine)
 
-    # Auto-seed with sample data if database is empty
-    if User.query.count() == 0:
+
+def init_database(seed_if_empty: bool = True):
+    """Create missing tables, upgrade an older schema and add sample data to an empty database"""
+    db.create_all()
+    upgrade_database()
+    category_registry.reload()
+    if seed_if_empty and db.session.query(User.id).first() is None:
         populate_database()
+        logger.info("Empty database seeded with sample data")
+
+
+# Nothing touches the database at import, so workers and tests start fast; without
+# `flask init-db`, the first request of a process runs init_database() instead
+_database_ready = False
+_database_lock = threading.Lock()
+
+
+@app.before_request
+def ensure_database():
+    global _database_ready
+    if _database_ready or app.testing or not app.config['AUTO_INIT_DB']:
+        return
+    with _database_lock:
+        if not _database_ready:
+            init_database()
+            _database_ready = True
+
+# ------------------------CLI------------------------
+# Create or upgrade the schema, run once per deployment before the workers start
+@app.cli.command('init-db')
+@click.option('--seed/--no-seed', 'seed_if_empty', default=True, show_default=True,
+              help='Add sample data when the database has no users.')
+def init_db(seed_if_empty: bool):
+    init_database(seed_if_empty=seed_if_empty)
+    click.echo('Database ready')
+
+# Re-parse salary ranges and location keys of every vacancy, e.g. after the parsers changed
+@app.cli.command('backfill-vacancies')
+@click.option('--batch-size', default=1000, show_default=True, help='Rows updated per transaction.')
+def backfill_vacancies(batch_size: int):
+    done = backfill_structured_fields(batch_size=batch_size,
+                                      progress=lambda rows: click.echo(f'Backfilled {rows} vacancies'))
+    click.echo(f'Done, {done} vacancies backfilled')
+
+# Bulk-insert generated users and vacancies, e.g. for load testing
+@app.cli.command('seed')
+@click.option('--users', default=0, show_default=True, help='Users to add.')
+@click.option('--vacancies', default=0, show_default=True, help='Vacancies to add, by random existing users.')
+@click.option('--seed', 'random_seed', type=int, help='Random seed, the same seed generates the same rows.')
+@click.option('--password', default=SEED_PASSWORD, show_default=True, help='Password of every generated user.')
+@click.option('--chunk-size', default=5000, show_default=True, help='Rows inserted per transaction.')
+@click.option('--until', type=click.DateTime(), default=REFERENCE_TIME.isoformat(), show_default=True,
+              help='Vacancies are dated over the year before this time.')
+def seed_data(users: int, vacancies: int, random_seed: int, password: str, chunk_size: int, until):
+    init_database(seed_if_empty=False)
+    seed_database(users=users, vacancies=vacancies, seed=random_seed, password=password, chunk_size=chunk_size,
+                  progress=lambda label, done, total: click.echo(f'Seeded {done}/{total} {label}'), now=until)
+    click.echo(f'Done, {users} users and {vacancies} vacancies added')
 
 # ------------------------ROUTES------------------------
 
 # ------------------------VACANCIES------------------------
+# Listing query for the home page, served by the (category, date_created) indexes
+def listing_query(category_filter: str = 'all', sort_by: str = 'newest', search_query: str = '',
+                  min_salary: int = None, max_salary: int = None, location: str = ''):
+    # Base query, authors are joined in so the cards don't fire one SELECT each
+    query = Vacancy.query.options(joinedload(Vacancy.author))
+
+    # Apply category filter if not 'all'
+    if category_filter != 'all':
+        query = query.filter_by(category=category_filter)
+
+    # Apply full-text filter if searching
+    if match_expression(search_query):
+        query = query.filter(Vacancy.id.in_(matching_ids(search_query)))
+
+    # Apply salary/location filters on the parsed columns; a vacancy matches
+    # when its salary range overlaps the requested one
+    if min_salary is not None:
+        query = query.filter(Vacancy.salary_max >= min_salary)
+    if max_salary is not None:
+        query = query.filter(Vacancy.salary_min <= max_salary)
+    location_key = normalize_location(location)
+    if location_key:
+        query = query.filter(Vacancy.location_key == location_key)
+
+    # Apply sorting, newest is the default
+    return order_by_date(query=query, descending=sort_by != 'oldest')
+
+# Vacancies of a single author, served by the (author_id, date_created) index
+def user_vacancies_query(user_id: int):
+    return order_by_date(query=Vacancy.query.filter_by(author_id=user_id))
+
+# Decoded 'after'/'before' cursors of the request, both None in page-number mode
+def cursor_args():
+    after = request.args.get(key='after')
+    before = request.args.get(key='before')
+    return (decode_cursor(after) if after else None,
+            decode_cursor(before) if before else None)
+
+# Integer argument of the request, None when missing, malformed or too large for SQLite to compare
+def integer_arg(key: str):
+    value = request.args.get(key=key, type=int)
+    return value if value is not None and abs(value) <= SQLITE_MAX_INTEGER else None
+
+# Page number of the request, capped so that its OFFSET stays within SQLite's INTEGER range
+def page_arg(per_page: int) -> int:
+    return min(request.args.get(key='page', default=1, type=int), SQLITE_MAX_INTEGER // per_page)
+
+# Every write that can change a listing card drops the cached grids
+def invalidate_listing_cache():
+    listing_cache.invalidate()
+
 # Home page for all the vacancies
 @app.route('/')
 def vacancies():
@@ -66,43 +206,119 @@ def vacancies():
     # Get filters and page number from request args
     category_filter = request.args.get(key='category', default='all')
     sort_by = request.args.get(key='sort', default='newest')
-    page = request.args.get(key='page', default=1, type=int)
-
-    # Base query
-    query = Vacancy.query
-
-    # Apply category filter if not 'all'
-    if category_filter != 'all':
-        query = query.filter_by(category=category_filter)
-
-    # Apply sorting
-    if sort_by == 'oldest':
-        query = query.order_by(Vacancy.date_created.asc())
-    else:  # newest (default)
-        query = query.order_by(Vacancy.date_created.desc())
-
-    # Paginate
-    vacancies_pagination = query.paginate(
-        page=page, per_page=per_page, error_out=False
+    page = page_arg(per_page=per_page)
+    search_query = request.args.get(key='q', default='').strip()
+    min_salary = integer_arg(key='min_salary')
+    max_salary = integer_arg(key='max_salary')
+    location = request.args.get(key='location', default='').strip()
+
+    # Filters narrowing the category down, carried over by every link of the page
+    filter_args = {name: value for name, value in [('q', search_query), ('min_salary', min_salary),
+                                                   ('max_salary', max_salary), ('location', location)]
+                   if value not in (None, '')}
+    # The category counters can't tell how many vacancies pass the filters
+    filtering = match_expression(search_query) is not None or any(
+        name in filter_args for name in ('min_salary', 'max_salary', 'location')
     )
 
-    # Redirect to last page if page number is too high
-    if page > vacancies_pagination.pages > 0:
-        return redirect(url_for(endpoint='vacancies',
-                                page=vacancies_pagination.pages,
-                                category=category_filter,
-                                sort=sort_by))
-
-    return render_template(template_name_or_list='index.html',
-                           vacancies=vacancies_pagination,
-                           current_category=category_filter,
-                           current_sort=sort_by)
+    after, before = cursor_args()
+    # A filtered listing has no counter to take its total from, and counting every
+    # match costs as much as the search itself, so it is paged by cursor, uncounted
+    cursor_mode = after is not None or before is not None or filtering
+
+    # Conditional GET: the category's counter row changes whenever anything listed in it does
+    total, last_modified = category_state(category=category_filter)
+    etag = page_etag('vacancies', category_filter, sort_by, sorted(filter_args.items()),
+                     page, after, before, total, last_modified)
+    if client_is_fresh(etag=etag, last_modified=last_modified):
+        return not_modified(etag=etag, last_modified=last_modified)
+
+    # Anonymous visitors all get the same grid for the same arguments, so it is
+    # served from the fragment cache without touching the database
+    cache_key = None
+    vacancy_grid = None
+    if not current_user.is_authenticated:
+        cache_key = (category_filter, sort_by, tuple(sorted(filter_args.items())), page, after, before)
+        vacancy_grid = listing_cache.get(key=cache_key)
+
+    if vacancy_grid is None:
+        query = listing_query(category_filter=category_filter, sort_by=sort_by, search_query=search_query,
+                              min_salary=min_salary, max_salary=max_salary, location=location)
+
+        # Cursor mode: seek past the cursor, cost does not grow with depth
+        if cursor_mode:
+            vacancies_pagination = keyset_paginate(query=query, per_page=per_page, after=after, before=before,
+                                                   descending=sort_by != 'oldest')
+        else:
+            # Page-number mode for shallow pages, the total comes from the category counters
+            vacancies_pagination = query.paginate(page=page, per_page=per_page, error_out=False, count=False)
+            vacancies_pagination.total = total
+
+            # Redirect to last page if page number is too high
+            if page > vacancies_pagination.pages > 0:
+                return redirect(url_for(endpoint='vacancies',
+                                        page=vacancies_pagination.pages,
+                                        category=category_filter,
+                                        sort=sort_by,
+                                        **filter_args))
+
+        prev_cursor, next_cursor = page_cursors(items=vacancies_pagination.items)
+        vacancy_grid = Markup(render_template(template_name_or_list='partials/vacancy_grid.html',
+                                              vacancies=vacancies_pagination,
+                                              cursor_mode=cursor_mode,
+                                              prev_cursor=prev_cursor,
+                                              next_cursor=next_cursor,
+                                              current_category=category_filter,
+                                              current_sort=sort_by,
+                                              filter_args=filter_args))
+        if cache_key is not None:
+            listing_cache.set(key=cache_key, value=vacancy_grid)
+
+    page_html = render_template(template_name_or_list='index.html',
+                                vacancy_grid=vacancy_grid,
+                                current_category=category_filter,
+                                current_sort=sort_by,
+                                filter_args=filter_args)
+    return add_validators(response=page_html, etag=etag, last_modified=last_modified)
+
+# Full-text search over vacancies, best matches first
+@app.route('/search')
+def search():
+    per_page = 10
+    search_query = request.args.get(key='q', default='').strip()
+    page = max(page_arg(per_page=per_page), 1)
+
+    # One extra result tells whether there is a next page, without counting matches
+    results = search_vacancies(query=search_query, limit=per_page + 1, offset=(page - 1) * per_page)
+    return render_template(template_name_or_list='search.html',
+                           query=search_query,
+                           results=results[:per_page],
+                           page=page,
+                           has_next=len(results) > per_page)
 
 # Single vacancy information
 @app.route('/vacancy/<int:vacancy_id>')
 def vacancy_info(vacancy_id):
+    # Revalidation only needs the timestamp and the author's name, not the whole row
+    if request.if_none_match or request.if_modified_since:
+        row = db.session.execute(
+            select(Vacancy.last_modified, User.username, Vacancy.author_id)
+            .join(Vacancy.author).where(Vacancy.id == vacancy_id)
+        ).first()
+        if row is None:
+            abort(404)
+        last_modified, username, author_id = row
+        etag = page_etag('vacancy', vacancy_id, last_modified, username)
+        # The author's view carries CSRF tokens that must not be served from a stale copy
+        if str(author_id) != current_user.get_id() and client_is_fresh(etag=etag, last_modified=last_modified):
+            return not_modified(etag=etag, last_modified=last_modified)
+
     vacancy = Vacancy.query.get_or_404(ident=int(vacancy_id))
-    return render_template(template_name_or_list='vacancy.html', vacancy=vacancy)
+    page_html = render_template(template_name_or_list='vacancy.html', vacancy=vacancy)
+    if vacancy.author == current_user:
+        return page_html
+    etag = page_etag('vacancy', vacancy.id, vacancy.last_modified, vacancy.author.username)
+    return add_validators(response=page_html, etag=etag, last_modified=vacancy.last_modified)
 
 # For adding new vacancy
 @app.route('/add_vacancy', methods=['GET', 'POST'])
@@ -122,6 +338,7 @@ def add_vacancy():
         )
         db.session.add(vacancy)
         db.session.commit()
+        invalidate_listing_cache()
         logger.info(f"UserID: <{current_user.id}> with username: <{current_user.username}> \
                     added vacancy <{vacancy.id}> with title <{vacancy.title}>")
         flash(message='Vacancy posted successfully!', category='success')
@@ -167,6 +384,7 @@ def edit_vacancy(vacancy_id):
         vacancy.location = form.location.data
 
         db.session.commit()
+        invalidate_listing_cache()
         logger.info(f"Updated vacancy <{vacancy.id}> with title: <{vacancy.title}> \
                     by UserID <{current_user.id}> with username <{vacancy.author.username}>")
         flash(message='Vacancy updated successfully!', category='success')
@@ -186,30 +404,54 @@ def delete_vacancy(vacancy_id):
 
     db.session.delete(vacancy)
     db.session.commit()
-    logger.info("User <{current_user.username}> deleted vacancy <{vacancy_id}>")
+    invalidate_listing_cache()
+    logger.info(f"User <{current_user.username}> deleted vacancy <{vacancy_id}>")
     flash(message='Vacancy deleted successfully!', category='success')
     return redirect(url_for(endpoint='profile'))
 
 # -----------------USER AUTHENTICATION-----------------
-def email_already_exists(form: UserForm) -> bool:
-     existing_email = User.query.filter_by(email=form.email.data).first()
-     if existing_email:
-         message = f'Profile with email: <{form.email.data}> already exists'
-         logger.warning(message)
-         flash(message, 'danger')
-         form.email.errors.append(message)
-         return True
-     return False
-
-def username_already_exists(form: UserForm) -> bool:
-    existing_username = User.query.filter_by(username=form.username.data).first()
-    if existing_username:
-        message = f'Profile with username: <{form.username.data}> already exists'
+def taken_fields(email: str, username: str, exclude_user_id: int = None) -> set:
+    """Which of 'email' and 'username' already belong to another user, in one query over both unique indexes"""
+    statement = select(User.email, User.username).where(or_(User.email == email, User.username == username))
+    if exclude_user_id is not None:
+        statement = statement.where(User.id != exclude_user_id)
+    taken = set()
+    for existing_email, existing_username in db.session.execute(statement.limit(2)):
+        if existing_email == email:
+            taken.add('email')
+        if existing_username == username:
+            taken.add('username')
+    return taken
+
+TAKEN_MESSAGES = {
+    'email': 'Profile with email: <{}> already exists',
+    'username': 'Username <{}> is taken',
+}
+
+def report_taken_fields(form: UserForm, taken: set):
+    for field_name in sorted(taken):
+        field = getattr(form, field_name)
+        message = TAKEN_MESSAGES[field_name].format(field.data)
         logger.warning(message)
         flash(message, 'danger')
-        form.username.errors.append(message)
-        return True
-    return False
+        field.errors.append(message)
+
+def commit_user(form: UserForm, exclude_user_id: int = None) -> set:
+    """Commit a new or changed user, returning the fields taken in the meantime (then nothing is saved).
+
+    taken_fields() only spares the work of a doomed write: a concurrent request can
+    claim the email or username between it and the commit, and then the unique
+    constraints decide.
+    """
+    try:
+        db.session.commit()
+        return set()
+    except IntegrityError:
+        db.session.rollback()
+        taken = taken_fields(email=form.email.data, username=form.username.data, exclude_user_id=exclude_user_id)
+        if not taken:
+            raise
+        return taken
 
 # Registering user
 @app.route('/register', methods=['GET', 'POST'])
@@ -220,17 +462,23 @@ def register():
 
     register_form = RegistrationForm()
     if register_form.validate_on_submit():
-        if not email_already_exists(form=register_form) and not username_already_exists(form=register_form):
+        taken = taken_fields(email=register_form.email.data, username=register_form.username.data)
+        if not taken:
             # creating new user
             user = User(username=register_form.username.data, email=register_form.email.data)
             user.password = register_form.password.data
 
             # add user to database
             db.session.add(user)
-            db.session.commit()
-            logger.info(f"User <{user.username}> registered successfully")
-            flash(message="Welcome {register_form.username.data}! Your account created successfully!", category='success')
-            return redirect(url_for(endpoint='login'))
+            taken = commit_user(form=register_form)
+            if not taken:
+                # SQLite may hand out the id of the last deleted user again
+                user_loader.invalidate(user.id)
+                logger.info(f"User <{user.username}> registered successfully")
+                flash(message=f"Welcome {register_form.username.data}! Your account created successfully!",
+                      category='success')
+                return redirect(url_for(endpoint='login'))
+        report_taken_fields(form=register_form, taken=taken)
 
     return render_template(template_name_or_list='register.html', form=register_form)
 
@@ -247,16 +495,33 @@ def login():
         username = login_form.username.data
         password = login_form.password.data
 
+        # Refused before the user lookup and the password hash, see rate_limit.LoginLimiter
+        # (behind a reverse proxy, remote_addr needs werkzeug's ProxyFix to be the client's)
+        blocked_by = login_limiter.blocked(username=username, ip=request.remote_addr)
+        if blocked_by:
+            logger.warning(f'Login attempt by user <{username}> from {request.remote_addr} refused, '
+                           f'too many failures per {blocked_by}')
+            login_form.username.errors.append('Too many failed attempts, please try again later')
+            return (render_template(template_name_or_list='login.html', form=login_form), 429,
+                    {'Retry-After': str(int(login_limiter.window))})
+
         # find user by username
         user = User.query.filter_by(username=username).first()
 
         # check if user exists and password is correct
         if user and user.check_password(password):
+            # Hashes made before the hashing parameters changed are upgraded while the password is at hand
+            if user.password_needs_rehash():
+                user.password = password
+                db.session.commit()
+                logger.info(f"Password of user <{username}> rehashed")
+            login_limiter.succeeded(username=username)
             login_user(user)
             logger.info(f"User <{username}> logged in successfully")
             flash(message='Nice to see you, {username}!', category='info')
             return redirect(url_for('profile'))
         else:
+            login_limiter.failed(username=username, ip=request.remote_addr)
             # Add error to form instead of flash
             login_form.username.errors.append('Invalid username or password')
             logger.warning(f'Failed Login attempt by user <{username}>')
@@ -278,15 +543,38 @@ def logout():
 # Viewing logged-in user's profile page
 def show_user_profile(user: User, endpoint: str):
     per_page = 3
-    page = request.args.get(key='page', default=1, type=int)
-    vacancies_pagination = Vacancy.query.filter_by(author_id=user.id) \
-        .order_by(Vacancy.date_created.desc()) \
-        .paginate(page=page, per_page=per_page, error_out=False)
-    # Redirect to last page if page number is too high
-    if page > vacancies_pagination.pages > 0:
-        return redirect(url_for(endpoint=endpoint, username=user.username, page=vacancies_pagination.pages))
-
-    return render_template(template_name_or_list='profile.html', user=user, vacancies=vacancies_pagination)
+    page = page_arg(per_page=per_page)
+    after, before = cursor_args()
+    query = user_vacancies_query(user_id=user.id)
+
+    # Count and latest change of the author's postings, an index-only scan of (author_id, last_modified)
+    total, last_modified = db.session.execute(
+        select(func.count(), func.max(Vacancy.last_modified)).where(Vacancy.author_id == user.id)
+    ).one()
+    # The owner's view carries CSRF tokens that must not be served from a stale copy
+    is_owner = user == current_user
+    etag = page_etag('profile', user.id, user.username, user.email, user.image_filename,
+                     page, after, before, total, last_modified)
+    if not is_owner and client_is_fresh(etag=etag, last_modified=last_modified):
+        return not_modified(etag=etag, last_modified=last_modified)
+
+    cursor_mode = after is not None or before is not None
+    if cursor_mode:
+        vacancies_pagination = keyset_paginate(query=query, per_page=per_page, after=after, before=before)
+        vacancies_pagination.total = total
+    else:
+        vacancies_pagination = query.paginate(page=page, per_page=per_page, error_out=False, count=False)
+        vacancies_pagination.total = total
+        # Redirect to last page if page number is too high
+        if page > vacancies_pagination.pages > 0:
+            return redirect(url_for(endpoint=endpoint, username=user.username, page=vacancies_pagination.pages))
+
+    prev_cursor, next_cursor = page_cursors(items=vacancies_pagination.items)
+    page_html = render_template(template_name_or_list='profile.html', user=user, vacancies=vacancies_pagination,
+                                cursor_mode=cursor_mode, prev_cursor=prev_cursor, next_cursor=next_cursor)
+    if is_owner:
+        return page_html
+    return add_validators(response=page_html, etag=etag, last_modified=last_modified)
 
 @app.route('/profile')
 @login_required
@@ -305,12 +593,10 @@ def user_profile(username: str):
 def edit_profile():
     edited_form = EditProfileForm()
 
-    if request.method == 'GET':
-        edited_form.username.data = current_user.username
-        edited_form.email.data = current_user.email
-
-        # Only update user if no duplicate errors
-        if not email_already_exists(form=edited_form) and not username_already_exists(form=edited_form):
+    if edited_form.validate_on_submit():
+        taken = taken_fields(email=edited_form.email.data, username=edited_form.username.data,
+                             exclude_user_id=current_user.id)
+        if not taken:
             current_user.username = edited_form.username.data
             current_user.email = edited_form.email.data
 
@@ -322,10 +608,18 @@ def edit_profile():
                 edited_form.image.data.save(image_path)
                 current_user.image_filename = image_filename
 
-            db.session.commit()
-            logger.info(f"User <{current_user.username}> edited profile")
-            flash(message='Your changes have been saved!', category='success')
-            return redirect(url_for(endpoint='profile'))
+            taken = commit_user(form=edited_form, exclude_user_id=current_user.id)
+            if not taken:
+                user_loader.invalidate(current_user.id)
+                # Cards show the author's username
+                invalidate_listing_cache()
+                logger.info(f"User <{current_user.username}> edited profile")
+                flash(message='Your changes have been saved!', category='success')
+                return redirect(url_for(endpoint='profile'))
+        report_taken_fields(form=edited_form, taken=taken)
+    elif request.method == 'GET':
+        edited_form.username.data = current_user.username
+        edited_form.email.data = current_user.email
 
     return render_template(template_name_or_list='edit_profile.html', form=edited_form)
 
@@ -334,16 +628,16 @@ def edit_profile():
 @app.route('/delete_profile', methods=['POST'])
 @login_required
 def delete_profile():
-    # Get current user's vacancies and delete them first
-    vacancies = Vacancy.query.filter_by(author_id=current_user.id).all()
-    for vacancy in vacancies:
-        db.session.delete(vacancy)
+    # Their vacancies go first, in one statement, whatever their number
+    deleted = delete_author_vacancies(author_id=current_user.id)
 
     # Delete the user
     db.session.delete(current_user)
     db.session.commit()
+    user_loader.invalidate(current_user.id)
+    invalidate_listing_cache()
 
-    logger.info(f"User <{current_user.username}> deleted profile")
+    logger.info(f"User <{current_user.username}> deleted profile and {deleted} vacancies")
     logout_user()
     flash(message='Your account and all associated vacancies have been deleted.', category='info')
     return redirect(url_for(endpoint='vacancies'))
@@ -355,10 +649,25 @@ def about():
     return render_template(template_name_or_list='about.html')
 
 
+# -----------------MONITORING-----------------
+@app.route('/cache_stats')
+def cache_stats():
+    return jsonify({'listing': listing_cache.stats(), 'user': user_cache.stats()})
+
+
+@app.route('/cat_api_stats')
+def cat_api_stats():
+    return jsonify({**cat_client.metrics(), 'async_rejected': async_cat_client.rejected})
+
+
 # -----------------FOR EXTERNAL API-----------------
 @app.route('/cat_pics')
-def cat_pics():
-    cat_image_url = get_random_cat()
+async def cat_pics():
+    # The async path keeps a limited number of upstream calls in flight, see cat_api_async
+    if app.config['CAT_PICS_ASYNC']:
+        cat_image_url = await async_cat_client.get_random_cat()
+    else:
+        cat_image_url = get_random_cat()
     return render_template(template_name_or_list='cat_pics.html', cat_image_url=cat_image_url)
 
 
@@ -373,6 +682,12 @@ def internal_server_error(e):
     logger.error(f'Internal server error: {e}')
     return render_template('errors/500.html'), 500
 
+# Login and registration when the password hashing pool is saturated, see passwords.py
+@app.errorhandler(HashingBusy)
+def hashing_busy(e):
+    logger.warning(f'Password hashing busy: {e}')
+    return render_template('errors/503.html'), 503, {'Retry-After': '1'}
+
 @app.route('/test-500')
 def test_500():
     raise Exception("This is a test 500 error!")
\ No newline at end of file
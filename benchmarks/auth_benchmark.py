@@ -0,0 +1,84 @@
+"""Throughput of pages requested by a logged-in user, per user loader mode.
+
+The user is loaded by app.user_loader on every request: 'off' queries the
+user table each time, 'memory' and 'session' rebuild it from a snapshot
+(see user_loader.py). Each mode runs in a fresh process with the Flask test
+client against a copy of a benchmarks.datasets database.
+
+    python -m benchmarks.auth_benchmark --vacancies 10000 --users 100000
+"""
+import argparse
+import multiprocessing
+import os
+import random
+import shutil
+import tempfile
+import time
+
+from benchmarks.datasets import DATA_DIR, build_dataset
+from benchmarks.routes_benchmark import summarize
+from seed import SEED_PASSWORD, username_for
+
+MODES = ['off', 'memory', 'session']
+PATHS = ['/about', '/?category=it', '/profile']
+
+
+def run_mode(database: str, mode: str, users: int, requests: int, results):
+    os.environ['DATABASE_URL'] = f'sqlite:///{database}'
+    os.environ['USER_CACHE_MODE'] = mode
+    from sqlalchemy import event
+
+    from app import app, db
+    app.config['WTF_CSRF_ENABLED'] = False
+
+    statements = [0]
+    with app.app_context():
+        event.listen(db.engine, 'before_cursor_execute', lambda *args: statements.__setitem__(0, statements[0] + 1))
+
+    client = app.test_client()
+    response = client.post('/login', data={'username': username_for(random.Random(1).randint(1, users)),
+                                           'password': SEED_PASSWORD})
+    assert response.status_code == 302, 'login failed'
+    output = {}
+    for path in PATHS:
+        client.get(path)
+        statements[0] = 0
+        timings, errors = [], 0
+        started = time.perf_counter()
+        for _ in range(requests):
+            start = time.perf_counter()
+            response = client.get(path)
+            timings.append((time.perf_counter() - start) * 1000)
+            errors += response.status_code != 200
+        output[path] = {**summarize(timings, errors, time.perf_counter() - started),
+                        'sql_per_request': round(statements[0] / requests, 2)}
+    results.put(output)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--vacancies', type=int, default=10_000)
+    parser.add_argument('--users', type=int, default=100_000)
+    parser.add_argument('--requests', type=int, default=2000)
+    parser.add_argument('--data-dir', default=DATA_DIR)
+    args = parser.parse_args()
+
+    source = build_dataset(args.vacancies, args.users, data_dir=args.data_dir)
+    context = multiprocessing.get_context('spawn')
+    print(f'{"mode":<8} {"path":<14} {"req/s":>8} {"p50 ms":>8} {"p95 ms":>8} {"SQL/req":>8}')
+    with tempfile.TemporaryDirectory() as directory:
+        for mode in MODES:
+            database = os.path.join(directory, f'{mode}.db')
+            shutil.copyfile(source, database)
+            results = context.Queue()
+            process = context.Process(target=run_mode, args=(database, mode, args.users, args.requests, results))
+            process.start()
+            output = results.get()
+            process.join()
+            for path, result in output.items():
+                print(f'{mode:<8} {path:<14} {result["throughput_rps"]:>8} {result["p50_ms"]:>8} '
+                      f'{result["p95_ms"]:>8} {result["sql_per_request"]:>8}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,112 @@
+"""/cat_pics throughput with the sync and the async upstream path, against a slow mock Cat API.
+
+A local HTTP server stands in for thecatapi.com and answers after --delay ms.
+The Flask app is driven by --workers threads, standing in for a fixed pool
+of gunicorn worker threads, each requesting /cat_pics in a loop. Small
+batches keep the prefetch buffer close to empty, so requests keep hitting
+the upstream path, which is what differs between the two modes.
+
+    python -m benchmarks.cat_pics_benchmark --seconds 10 --workers 8 --delay 200
+"""
+import argparse
+import json
+import statistics
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import app as app_module
+from cat_api import CatClient, percentile
+from cat_api_async import AsyncCatClient
+
+
+def start_mock_upstream(delay: float):
+    class MockCatAPI(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+        counter = 0
+
+        def do_GET(self):
+            time.sleep(delay)
+            limit = int(self.path.split('limit=')[1]) if 'limit=' in self.path else 1
+            start = MockCatAPI.counter
+            MockCatAPI.counter += limit
+            body = json.dumps([{'url': f'http://cats.test/{number}.jpg'}
+                               for number in range(start, start + limit)]).encode()
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    class QuietServer(ThreadingHTTPServer):
+        def handle_error(self, request, client_address):
+            pass  # clients hang up on calls that outlive their latency budget
+
+    server = QuietServer(('127.0.0.1', 0), MockCatAPI)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f'http://127.0.0.1:{server.server_address[1]}/v1/images/search'
+
+
+def run(url: str, async_mode: bool, seconds: float, workers: int, batch_size: int, budget: float):
+    client = CatClient(url=url, buffer_size=batch_size, batch_size=batch_size, refill_below=1, budget=budget)
+    app_module.get_random_cat = client.get_random_cat
+    app_module.async_cat_client = AsyncCatClient(client=client, max_concurrency=workers)
+    app_module.app.config['CAT_PICS_ASYNC'] = async_mode
+
+    stop = threading.Event()
+    timings = []
+    lock = threading.Lock()
+
+    def worker():
+        test_client = app_module.app.test_client()
+        local_timings = []
+        while not stop.is_set():
+            start = time.perf_counter()
+            test_client.get('/cat_pics')
+            local_timings.append((time.perf_counter() - start) * 1000)
+        with lock:
+            timings.extend(local_timings)
+
+    threads = [threading.Thread(target=worker) for _ in range(workers)]
+    for thread in threads:
+        thread.start()
+    time.sleep(seconds)
+    stop.set()
+    for thread in threads:
+        thread.join()
+
+    timings.sort()
+    return {
+        'requests_per_s': len(timings) / seconds,
+        # Share of requests given a new cat rather than the last-known-good fallback
+        'fresh': client.stats['served'] / len(timings) if timings else 0.0,
+        'p50_ms': statistics.median(timings) if timings else 0.0,
+        'p95_ms': percentile(timings, 0.95) or 0.0,
+        'upstream_calls': client.stats['fetches'],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--seconds', type=float, default=10)
+    parser.add_argument('--workers', type=int, default=8)
+    parser.add_argument('--delay', type=int, default=200, help='Mock upstream latency in ms.')
+    parser.add_argument('--batch-size', type=int, default=1)
+    parser.add_argument('--budget', type=int, default=300, help='Per-request latency budget in ms.')
+    args = parser.parse_args()
+
+    server, url = start_mock_upstream(delay=args.delay / 1000)
+    print(f'{"mode":<6} {"req/s":>8} {"fresh":>6} {"p50 ms":>8} {"p95 ms":>8} {"upstream":>9}')
+    for mode, async_mode in (('sync', False), ('async', True)):
+        result = run(url, async_mode=async_mode, seconds=args.seconds, workers=args.workers,
+                     batch_size=args.batch_size, budget=args.budget / 1000)
+        print(f'{mode:<6} {result["requests_per_s"]:>8.1f} {result["fresh"]:>6.0%} '
+              f'{result["p50_ms"]:>8.1f} {result["p95_ms"]:>8.1f} {result["upstream_calls"]:>9}')
+    server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,160 @@
+"""Listing read throughput while vacancies are being posted, per SQLite profile.
+
+For each profile of db.SQLITE_PROFILES a throwaway database is created from the
+app's models (counters, search index and triggers included) and seeded. Reader
+threads then run the home page listing query while writer threads insert
+vacancies through the ORM, as add_vacancy does, so every write also updates
+the category counters and the full-text index in the same transaction.
+
+    python -m benchmarks.concurrency_benchmark --seconds 10 --readers 4 --writers 2
+"""
+import argparse
+import multiprocessing
+import os
+import random
+import statistics
+import tempfile
+import time
+
+from flask import Flask
+from sqlalchemy import create_engine, exc, select
+from sqlalchemy.orm import Session, joinedload
+
+import counters  # noqa: F401 -- registers the counter events fired by the writers
+import search  # noqa: F401 -- registers the full-text index DDL
+from db import SQLITE_PROFILES, db, engine_options, tune_engine
+from mock_data import job_data
+from models import DEFAULT_CATEGORIES, User, Vacancy, category_registry
+from pagination import order_by_date
+
+PER_PAGE = 6
+
+
+def new_vacancy(rng, author_id: int) -> Vacancy:
+    job = rng.choice(job_data)
+    return Vacancy(title=job[0], short_description=job[1], full_description=job[2], company=job[4],
+                   salary=job[5], location=job[6], author_id=author_id,
+                   category_id=rng.choice(DEFAULT_CATEGORIES)['id'])
+
+
+def build_database(path: str, profile: str, rows: int) -> int:
+    """Create and seed a database the way app.py does, returning the author id"""
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = f'sqlite:///{path}'
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = engine_options(profile=profile)
+    db.init_app(app)
+
+    rng = random.Random(42)
+    with app.app_context():
+        tune_engine(engine=db.engine, profile=profile)
+        db.create_all()
+        # Loaded before the workers fork, so their counter events resolve categories from memory
+        category_registry.reload()
+
+        user = User(username='benchmark', email='benchmark@test.com', password_hash='x')
+        db.session.add(user)
+        db.session.flush()
+        db.session.add_all(new_vacancy(rng, author_id=user.id) for _ in range(rows))
+        db.session.commit()
+        author_id = user.id
+        db.engine.dispose()
+    return author_id
+
+
+def worker_engine(path: str, profile: str):
+    """The pooled engine of one worker process, as each gunicorn worker has its own"""
+    engine = create_engine(f'sqlite:///{path}', **engine_options(profile=profile))
+    tune_engine(engine=engine, profile=profile)
+    return engine
+
+
+def listing_statement(category_id):
+    statement = select(Vacancy).options(joinedload(Vacancy.author))
+    if category_id is not None:
+        statement = statement.where(Vacancy.category_id == category_id)
+    return order_by_date(statement).limit(PER_PAGE)
+
+
+def read(path: str, profile: str, seed: int, stop, results):
+    engine = worker_engine(path, profile=profile)
+    rng = random.Random(seed)
+    categories = [None] + [category['id'] for category in DEFAULT_CATEGORIES]
+    timings = []
+    while not stop.is_set():
+        start = time.perf_counter()
+        with Session(engine) as session:
+            session.execute(listing_statement(rng.choice(categories))).unique().all()
+        timings.append((time.perf_counter() - start) * 1000)
+    results.put(('read', timings, 0))
+
+
+def write(path: str, profile: str, seed: int, author_id: int, stop, results):
+    engine = worker_engine(path, profile=profile)
+    rng = random.Random(seed)
+    timings = []
+    errors = 0
+    while not stop.is_set():
+        start = time.perf_counter()
+        try:
+            with Session(engine) as session:
+                session.add(new_vacancy(rng, author_id=author_id))
+                session.commit()
+            timings.append((time.perf_counter() - start) * 1000)
+        except exc.OperationalError:
+            # 'database is locked' once the busy timeout is exhausted
+            errors += 1
+    results.put(('write', timings, errors))
+
+
+def run(path: str, profile: str, author_id: int, seconds: float, readers: int, writers: int):
+    context = multiprocessing.get_context('fork')
+    stop = context.Event()
+    results = context.Queue()
+    processes = [context.Process(target=read, args=(path, profile, number, stop, results))
+                 for number in range(readers)]
+    processes += [context.Process(target=write, args=(path, profile, 1000 + number, author_id, stop, results))
+                  for number in range(writers)]
+    for process in processes:
+        process.start()
+    time.sleep(seconds)
+    stop.set()
+
+    reads, writes, write_errors = [], [], 0
+    for _ in processes:
+        kind, timings, errors = results.get()
+        (reads if kind == 'read' else writes).extend(timings)
+        write_errors += errors
+    for process in processes:
+        process.join()
+
+    reads.sort()
+    return {
+        'reads_per_s': len(reads) / seconds,
+        'writes_per_s': len(writes) / seconds,
+        'write_errors': write_errors,
+        'read_p50_ms': statistics.median(reads) if reads else 0.0,
+        'read_p95_ms': reads[int(len(reads) * 0.95) - 1] if reads else 0.0,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=20_000)
+    parser.add_argument('--seconds', type=float, default=10)
+    parser.add_argument('--readers', type=int, default=4)
+    parser.add_argument('--writers', type=int, default=2)
+    args = parser.parse_args()
+
+    print(f'{"profile":<12} {"reads/s":>9} {"writes/s":>9} {"locked":>7} {"p50 ms":>8} {"p95 ms":>8}')
+    for profile in SQLITE_PROFILES:
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'concurrency.db')
+            author_id = build_database(path, profile=profile, rows=args.rows)
+            result = run(path, profile=profile, author_id=author_id, seconds=args.seconds,
+                         readers=args.readers, writers=args.writers)
+        print(f'{profile:<12} {result["reads_per_s"]:>9.0f} {result["writes_per_s"]:>9.0f} '
+              f'{result["write_errors"]:>7} {result["read_p50_ms"]:>8.2f} {result["read_p95_ms"]:>8.2f}')
+
+
+if __name__ == '__main__':
+    main()
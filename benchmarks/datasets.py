@@ -0,0 +1,72 @@
+"""Synthetic job board databases for the benchmarks, reproducible from a seed.
+
+Users and vacancies are generated and bulk-inserted by seed.seed_database,
+every user's password is seed.SEED_PASSWORD. Built files are kept in
+--data-dir and reused by later runs with the same sizes and seed.
+
+    python -m benchmarks.datasets --vacancies 100000 --users 100000
+"""
+import argparse
+import os
+import time
+
+from flask import Flask
+
+import search  # noqa: F401 -- registers the full-text index DDL
+from db import db
+from models import category_registry
+from seed import seed_database
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '.data')
+CHUNK_SIZE = 10_000
+# Part of the file name, bump when the generated rows change so older builds are not reused
+FORMAT_VERSION = 3
+
+
+def dataset_path(vacancies: int, users: int, seed: int, data_dir: str = DATA_DIR) -> str:
+    return os.path.join(data_dir, f'jobboard-{vacancies}v-{users}u-{seed}-v{FORMAT_VERSION}.db')
+
+
+def print_progress(label: str, done: int, total: int):
+    print(f'  {label}: {done:,}/{total:,}', end='\r' if done < total else '\n', flush=True)
+
+
+def build_dataset(vacancies: int, users: int, seed: int = 42, data_dir: str = DATA_DIR) -> str:
+    """Create (or reuse) a database with `vacancies` vacancies by `users` users, returning its path"""
+    path = dataset_path(vacancies, users, seed, data_dir=data_dir)
+    if os.path.exists(path):
+        return path
+    os.makedirs(data_dir, exist_ok=True)
+    partial = f'{path}.partial'
+    if os.path.exists(partial):
+        os.remove(partial)
+
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = f'sqlite:///{partial}'
+    db.init_app(app)
+    start = time.perf_counter()
+    with app.app_context():
+        db.create_all()
+        category_registry.reload()
+        seed_database(users=users, vacancies=vacancies, seed=seed, chunk_size=CHUNK_SIZE, progress=print_progress)
+        db.session.execute(db.text("INSERT INTO vacancy_fts(vacancy_fts) VALUES ('optimize')"))
+        db.session.commit()
+        db.session.remove()
+        db.engine.dispose()
+    os.rename(partial, path)
+    print(f'Built {path} in {time.perf_counter() - start:.1f}s')
+    return path
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--vacancies', type=int, default=10_000)
+    parser.add_argument('--users', type=int, default=100_000)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--data-dir', default=DATA_DIR)
+    args = parser.parse_args()
+    print(build_dataset(args.vacancies, args.users, seed=args.seed, data_dir=args.data_dir))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,85 @@
+"""Time, memory and statements to delete the vacancies of a profile, ORM loop against one DELETE.
+
+'orm' is what delete_profile used to do: load every vacancy of the author
+and delete them one by one through the session, each flush running the
+counter mapper events. 'bulk' is counters.delete_author_vacancies. Each run
+deletes the only author of a benchmarks.datasets database, on its own copy.
+
+    python -m benchmarks.delete_profile_benchmark --vacancies 10000
+"""
+import argparse
+import os
+import shutil
+import tempfile
+import time
+import tracemalloc
+
+from flask import Flask
+from sqlalchemy import event
+
+import counters
+import search  # noqa: F401 -- registers the full-text index DDL
+from benchmarks.datasets import DATA_DIR, build_dataset
+from db import db
+from models import User, Vacancy, category_registry
+
+AUTHOR_ID = 1
+
+
+def delete_with_orm(author_id: int) -> int:
+    vacancies = Vacancy.query.filter_by(author_id=author_id).all()
+    for vacancy in vacancies:
+        db.session.delete(vacancy)
+    return len(vacancies)
+
+
+STRATEGIES = {'orm': delete_with_orm, 'bulk': lambda author_id: counters.delete_author_vacancies(author_id)}
+
+
+def run_strategy(database: str, strategy: str) -> dict:
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = f'sqlite:///{database}'
+    db.init_app(app)
+    with app.app_context():
+        category_registry.reload()
+        statements = [0]
+        event.listen(db.engine, 'before_cursor_execute', lambda *args: statements.__setitem__(0, statements[0] + 1))
+        user = db.session.get(User, AUTHOR_ID)
+
+        tracemalloc.start()
+        start = time.perf_counter()
+        deleted = STRATEGIES[strategy](AUTHOR_ID)
+        db.session.delete(user)
+        db.session.commit()
+        elapsed = time.perf_counter() - start
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+        assert db.session.scalar(db.select(db.func.count()).select_from(Vacancy)) == 0, 'vacancies left behind'
+        db.session.remove()
+        db.engine.dispose()
+    return {'deleted': deleted, 'ms': round(elapsed * 1000, 1), 'peak_mib': round(peak / 2 ** 20, 1),
+            'statements': statements[0]}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--vacancies', type=int, default=10_000)
+    parser.add_argument('--runs', type=int, default=3)
+    parser.add_argument('--data-dir', default=DATA_DIR)
+    args = parser.parse_args()
+
+    source = build_dataset(args.vacancies, users=1, data_dir=args.data_dir)
+    print(f'{"strategy":<8} {"deleted":>8} {"ms":>9} {"peak MiB":>9} {"SQL":>7}')
+    with tempfile.TemporaryDirectory() as directory:
+        for strategy in STRATEGIES:
+            for _ in range(args.runs):
+                database = os.path.join(directory, f'{strategy}.db')
+                shutil.copyfile(source, database)
+                result = run_strategy(database, strategy)
+                print(f'{strategy:<8} {result["deleted"]:>8} {result["ms"]:>9} {result["peak_mib"]:>9} '
+                      f'{result["statements"]:>7}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,97 @@
+"""Request latency with INFO logging, writing log files directly vs through the queue.
+
+'direct' is the previous setup: a RotatingFileHandler with maxBytes=10_000
+attached to the JobBoard logger, so every record is written, flushed and
+regularly rotated on the request thread. 'queued' is logging_config: request
+threads only enqueue, one listener thread writes in batches. Worker threads
+request a missing page in a loop (the 404 handler logs an error per request)
+and each also times bare logger.info calls.
+
+    python -m benchmarks.logging_benchmark --seconds 5 --workers 8
+"""
+import argparse
+import logging
+import os
+import statistics
+import tempfile
+import threading
+import time
+from logging.handlers import RotatingFileHandler
+
+LOG_DIR = tempfile.mkdtemp(prefix='logging-benchmark-')
+os.environ['LOG_DIR'] = LOG_DIR
+
+import app as app_module  # noqa: E402 -- logs to LOG_DIR
+import logging_config  # noqa: E402
+
+
+def use_direct_logging():
+    """Put back the per-logger RotatingFileHandler the app used before logging_config"""
+    logging_config.stop_logging()
+    logger = logging.getLogger('JobBoard')
+    file_handler = RotatingFileHandler(filename=os.path.join(LOG_DIR, 'direct.log'), maxBytes=10_000,
+                                       backupCount=5)
+    file_handler.setFormatter(logging.Formatter('%(asctime)s %(levelname)s JobBoard %(message)s'))
+    logger.addHandler(hdlr=file_handler)
+    logger.propagate = False
+
+
+def run(seconds: float, workers: int):
+    stop = threading.Event()
+    request_ms, log_us = [], []
+    lock = threading.Lock()
+    logger = logging.getLogger('JobBoard')
+
+    def worker(number: int):
+        client = app_module.app.test_client()
+        local_requests, local_logs = [], []
+        while not stop.is_set():
+            start = time.perf_counter()
+            client.get(f'/benchmark-missing-page-{number}')
+            local_requests.append((time.perf_counter() - start) * 1000)
+
+            start = time.perf_counter()
+            logger.info(f'Worker <{number}> benchmark line')
+            local_logs.append((time.perf_counter() - start) * 1_000_000)
+        with lock:
+            request_ms.extend(local_requests)
+            log_us.extend(local_logs)
+
+    threads = [threading.Thread(target=worker, args=(number,)) for number in range(workers)]
+    for thread in threads:
+        thread.start()
+    time.sleep(seconds)
+    stop.set()
+    for thread in threads:
+        thread.join()
+
+    request_ms.sort()
+    log_us.sort()
+    return {
+        'requests_per_s': len(request_ms) / seconds,
+        'p50_ms': statistics.median(request_ms),
+        'p95_ms': request_ms[int(len(request_ms) * 0.95) - 1],
+        'log_p50_us': statistics.median(log_us),
+        'log_p99_us': log_us[int(len(log_us) * 0.99) - 1],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--seconds', type=float, default=5)
+    parser.add_argument('--workers', type=int, default=8)
+    args = parser.parse_args()
+
+    print(f'{"mode":<7} {"req/s":>8} {"p50 ms":>8} {"p95 ms":>8} {"log p50 us":>11} {"log p99 us":>11}')
+    results = {'queued': run(args.seconds, args.workers)}
+    use_direct_logging()
+    results['direct'] = run(args.seconds, args.workers)
+    for mode in ('direct', 'queued'):
+        result = results[mode]
+        print(f'{mode:<7} {result["requests_per_s"]:>8.0f} {result["p50_ms"]:>8.2f} {result["p95_ms"]:>8.2f} '
+              f'{result["log_p50_us"]:>11.1f} {result["log_p99_us"]:>11.1f}')
+    print(f'Log files written to {LOG_DIR}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,111 @@
+"""Password hashing cost, login throughput per core, and page latency during a login storm.
+
+For each hash method: the time of one check, and checks per second per core
+through a passwords.PasswordHasher pool of 1..--max-workers threads. Then
+--storm threads keep checking passwords while the main thread renders /about
+through the Flask test client, once with a pool of --pool-workers threads
+and once with a pool as large as the storm (no bound in practice).
+
+    python -m benchmarks.login_benchmark --methods scrypt:32768:8:1,pbkdf2:sha256:600000
+"""
+import argparse
+import os
+import statistics
+import tempfile
+import threading
+import time
+
+from werkzeug.security import generate_password_hash
+
+from passwords import HashingBusy, PasswordHasher
+
+PASSWORD = 'correct horse battery staple'
+
+
+def checks_per_second(hasher: PasswordHasher, password_hash: str, threads: int, seconds: float) -> float:
+    done = [0]
+    deadline = time.perf_counter() + seconds
+
+    def run():
+        while time.perf_counter() < deadline:
+            hasher.check(password_hash, PASSWORD)
+            done[0] += 1
+
+    workers = [threading.Thread(target=run) for _ in range(threads)]
+    start = time.perf_counter()
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    return done[0] / (time.perf_counter() - start)
+
+
+def page_latency_during_storm(method: str, pool_workers: int, storm: int, pages: int) -> dict:
+    os.environ.setdefault('DATABASE_URL', f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'login.db')}")
+    from app import app
+
+    hasher = PasswordHasher(method=method, workers=pool_workers, max_pending=storm)
+    password_hash = generate_password_hash(PASSWORD, method=method)
+    stop = threading.Event()
+    rejected = [0]
+
+    def attacker():
+        while not stop.is_set():
+            try:
+                hasher.check(password_hash, PASSWORD)
+            except HashingBusy:
+                rejected[0] += 1
+
+    client = app.test_client()
+    client.get('/about')
+    attackers = [threading.Thread(target=attacker) for _ in range(storm)]
+    for thread in attackers:
+        thread.start()
+    timings = []
+    try:
+        for _ in range(pages):
+            start = time.perf_counter()
+            client.get('/about')
+            timings.append((time.perf_counter() - start) * 1000)
+    finally:
+        stop.set()
+        for thread in attackers:
+            thread.join()
+    timings.sort()
+    return {'p50_ms': statistics.median(timings), 'p95_ms': timings[int(len(timings) * 0.95)],
+            'logins_checked': hasher.stats['checked'], 'rejected': rejected[0]}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--methods', default='scrypt:16384:8:1,scrypt:32768:8:1,pbkdf2:sha256:600000')
+    parser.add_argument('--max-workers', type=int, default=os.cpu_count())
+    parser.add_argument('--seconds', type=float, default=3)
+    parser.add_argument('--storm', type=int, default=16, help='Threads checking passwords during the page test.')
+    parser.add_argument('--pool-workers', type=int, default=2)
+    parser.add_argument('--pages', type=int, default=200)
+    args = parser.parse_args()
+    cores = os.cpu_count()
+
+    print(f'{cores} CPU(s)')
+    print(f'{"method":<24} {"workers":>7} {"check ms":>9} {"logins/s":>9} {"per core":>9}')
+    for method in args.methods.split(','):
+        password_hash = generate_password_hash(PASSWORD, method=method)
+        start = time.perf_counter()
+        PasswordHasher(method=method).check(password_hash, PASSWORD)
+        single = (time.perf_counter() - start) * 1000
+        for workers in sorted({1, args.max_workers}):
+            hasher = PasswordHasher(method=method, workers=workers, max_pending=workers)
+            rate = checks_per_second(hasher, password_hash, threads=workers, seconds=args.seconds)
+            print(f'{method:<24} {workers:>7} {single:>9.1f} {rate:>9.1f} {rate / min(workers, cores):>9.1f}')
+
+    method = args.methods.split(',')[0]
+    print(f'\n/about latency with {args.storm} threads logging in ({method})')
+    for workers in (args.pool_workers, args.storm):
+        result = page_latency_during_storm(method, pool_workers=workers, storm=args.storm, pages=args.pages)
+        print(f'  pool of {workers:>3}: p50 {result["p50_ms"]:7.1f} ms  p95 {result["p95_ms"]:7.1f} ms  '
+              f'({result["logins_checked"]} logins checked)')
+
+
+if __name__ == '__main__':
+    main()
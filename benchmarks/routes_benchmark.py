@@ -0,0 +1,306 @@
+"""Throughput and latency of the main routes on synthetic databases of increasing size.
+
+For every --sizes entry a dataset is built (benchmarks.datasets) and the
+routes below are requested through the Flask test client (one process, one
+request at a time) and/or a real gunicorn server (--workers processes, driven
+by --concurrency client threads). Results are saved as JSON; --compare prints
+the change of every p50/p95 against an earlier result file.
+
+    python -m benchmarks.routes_benchmark --sizes 10000,100000,1000000 --mode both
+    python -m benchmarks.routes_benchmark --sizes 10000 --compare benchmarks/results/<earlier>.json
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import random
+import re
+import socket
+import statistics
+import subprocess
+import sys
+import threading
+import time
+from datetime import datetime
+
+from benchmarks.datasets import DATA_DIR, build_dataset
+from seed import SEED_PASSWORD as PASSWORD, username_for
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'results')
+ROUTES = ['home', 'vacancy', 'profile', 'login', 'add_vacancy']
+# A successful login or new vacancy redirects, a rejected form is rendered again with 200
+WRITE_ROUTES = ('login', 'add_vacancy')
+CATEGORIES = ['all', 'it', 'design', 'marketing', 'sales', 'other']
+
+NEW_VACANCY = {
+    'title': 'Benchmark Engineer',
+    'category': 'it',
+    'short_description': 'Keeps the numbers honest.',
+    'full_description': 'Runs the benchmark suite before every release.',
+    'company': 'Benchmark Co',
+    'salary': '$90,000-$120,000',
+    'location': 'Tbilisi',
+}
+
+
+def summarize(timings: list, errors: int, elapsed: float) -> dict:
+    timings = sorted(timings)
+
+    def percentile(fraction):
+        return round(timings[min(len(timings) - 1, int(len(timings) * fraction))], 3) if timings else None
+
+    return {
+        'requests': len(timings),
+        'errors': errors,
+        'throughput_rps': round(len(timings) / elapsed, 1) if elapsed else None,
+        'p50_ms': percentile(0.50),
+        'p95_ms': percentile(0.95),
+        'p99_ms': percentile(0.99),
+        'mean_ms': round(statistics.fmean(timings), 3) if timings else None,
+    }
+
+
+def request_path(route: str, rng: random.Random, vacancies: int, users: int) -> str:
+    if route == 'home':
+        return f'/?category={rng.choice(CATEGORIES)}&page={rng.randint(1, 5)}'
+    if route == 'vacancy':
+        return f'/vacancy/{rng.randint(1, vacancies)}'
+    if route == 'profile':
+        return f'/user/{username_for(rng.randint(1, users))}'
+    return f'/{route}'
+
+
+# ------------------------TEST CLIENT------------------------
+def run_test_client(database: str, vacancies: int, users: int, requests: int, seed: int, results):
+    """Runs in a fresh process, so the app is imported against this dataset"""
+    os.environ['DATABASE_URL'] = f'sqlite:///{database}'
+    from app import app
+    app.config['WTF_CSRF_ENABLED'] = False
+
+    rng = random.Random(seed)
+    anonymous = app.test_client()
+    author = app.test_client()
+    author.post('/login', data={'username': username_for(1), 'password': PASSWORD})
+    for route in ('home', 'vacancy', 'profile'):
+        anonymous.get(request_path(route, random.Random(seed), vacancies, users))
+
+    output = {}
+    for route in ROUTES:
+        count = max(requests // 10, 5) if route in WRITE_ROUTES else requests
+        expected = 302 if route in WRITE_ROUTES else 200
+        timings, errors = [], 0
+        started = time.perf_counter()
+        for _ in range(count):
+            start = time.perf_counter()
+            if route == 'login':
+                # A new client each time, a logged-in one would just be redirected
+                response = app.test_client().post('/login', data={
+                    'username': username_for(rng.randint(1, users)), 'password': PASSWORD})
+            elif route == 'add_vacancy':
+                response = author.post('/add_vacancy', data=NEW_VACANCY)
+            else:
+                response = anonymous.get(request_path(route, rng, vacancies, users))
+            timings.append((time.perf_counter() - start) * 1000)
+            errors += response.status_code != expected
+        output[route] = summarize(timings, errors, time.perf_counter() - started)
+    results.put(output)
+
+
+def measure_test_client(database: str, vacancies: int, users: int, requests: int, seed: int) -> dict:
+    context = multiprocessing.get_context('spawn')
+    results = context.Queue()
+    process = context.Process(target=run_test_client, args=(database, vacancies, users, requests, seed, results))
+    process.start()
+    output = results.get()
+    process.join()
+    return output
+
+
+# ------------------------GUNICORN------------------------
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def wait_for_port(port: int, timeout: float = 60):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        with socket.socket() as sock:
+            if sock.connect_ex(('127.0.0.1', port)) == 0:
+                return
+        time.sleep(0.1)
+    raise RuntimeError(f'gunicorn did not start listening on port {port}')
+
+
+def logged_in_session(base_url: str, username: str):
+    """A requests session logged in through the real form, CSRF token included"""
+    import requests
+    session = requests.Session()
+    page = session.get(f'{base_url}/login').text
+    token = re.search(r'name="csrf_token" type="hidden" value="([^"]+)"', page).group(1)
+    session.post(f'{base_url}/login', data={'csrf_token': token, 'username': username, 'password': PASSWORD})
+    return session
+
+
+def csrf_token(session, url: str) -> str:
+    return re.search(r'name="csrf_token" type="hidden" value="([^"]+)"', session.get(url).text).group(1)
+
+
+def measure_gunicorn(database: str, vacancies: int, users: int, requests: int, seed: int,
+                     workers: int, concurrency: int) -> dict:
+    import requests as http
+
+    port = free_port()
+    base_url = f'http://127.0.0.1:{port}'
+    env = {**os.environ, 'DATABASE_URL': f'sqlite:///{database}'}
+    server = subprocess.Popen(
+        [sys.executable, '-m', 'gunicorn', '--config', 'gunicorn.conf.py', '--workers', str(workers),
+         '--bind', f'127.0.0.1:{port}', '--log-level', 'warning', 'app:app'],
+        cwd=ROOT, env=env,
+    )
+    output = {}
+    try:
+        wait_for_port(port)
+        # Every worker loads its caches and connections before anything is timed
+        warm_up = http.Session()
+        for _ in range(workers * 5):
+            for route in ('home', 'vacancy', 'profile'):
+                warm_up.get(base_url + request_path(route, random.Random(seed), vacancies, users))
+        for route in ROUTES:
+            count = max(requests // 10, 5) if route in WRITE_ROUTES else requests
+            expected = 302 if route in WRITE_ROUTES else 200
+            per_thread = max(count // concurrency, 1)
+            timings, errors = [], [0]
+            lock = threading.Lock()
+
+            def client(number: int):
+                rng = random.Random(seed + number)
+                session = http.Session()
+                if route == 'add_vacancy':
+                    session = logged_in_session(base_url, username_for(number + 1))
+                local = []
+                for _ in range(per_thread):
+                    if route == 'login':
+                        session = http.Session()
+                        data = {'csrf_token': csrf_token(session, f'{base_url}/login'),
+                                'username': username_for(rng.randint(1, users)), 'password': PASSWORD}
+                        start = time.perf_counter()
+                        response = session.post(f'{base_url}/login', data=data, allow_redirects=False)
+                    elif route == 'add_vacancy':
+                        data = {**NEW_VACANCY, 'csrf_token': csrf_token(session, f'{base_url}/add_vacancy')}
+                        start = time.perf_counter()
+                        response = session.post(f'{base_url}/add_vacancy', data=data, allow_redirects=False)
+                    else:
+                        start = time.perf_counter()
+                        response = session.get(base_url + request_path(route, rng, vacancies, users))
+                    local.append((time.perf_counter() - start) * 1000)
+                    with lock:
+                        errors[0] += response.status_code != expected
+                with lock:
+                    timings.extend(local)
+
+            threads = [threading.Thread(target=client, args=(number,)) for number in range(concurrency)]
+            started = time.perf_counter()
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            output[route] = summarize(timings, errors[0], time.perf_counter() - started)
+    finally:
+        server.terminate()
+        server.wait(timeout=30)
+    return output
+
+
+# ------------------------REPORTING------------------------
+def print_table(size: int, mode: str, output: dict):
+    print(f'\n{mode}, {size:,} vacancies')
+    print(f'{"route":<12} {"req/s":>8} {"p50 ms":>8} {"p95 ms":>8} {"p99 ms":>8} {"errors":>7}')
+    for route, result in output.items():
+        print(f'{route:<12} {result["throughput_rps"]:>8} {result["p50_ms"]:>8} {result["p95_ms"]:>8} '
+              f'{result["p99_ms"]:>8} {result["errors"]:>7}')
+
+
+def compare(current: dict, baseline_path: str):
+    with open(baseline_path) as baseline_file:
+        baseline = json.load(baseline_file)
+    previous = {(run['vacancies'], run['mode']): run['routes'] for run in baseline['runs']}
+    print(f'\nChange against {baseline_path} (negative is faster)')
+    for run in current['runs']:
+        old_routes = previous.get((run['vacancies'], run['mode']))
+        if not old_routes:
+            continue
+        for route, result in run['routes'].items():
+            old = old_routes.get(route)
+            if not old or not old['p50_ms'] or not old['p95_ms']:
+                continue
+            p50 = (result['p50_ms'] - old['p50_ms']) / old['p50_ms']
+            p95 = (result['p95_ms'] - old['p95_ms']) / old['p95_ms']
+            print(f'{run["mode"]:<12} {run["vacancies"]:>9,} {route:<12} p50 {p50:>+7.1%}  p95 {p95:>+7.1%}')
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', default='10000', help='Comma-separated vacancy counts.')
+    parser.add_argument('--users', type=int, default=100_000)
+    parser.add_argument('--requests', type=int, default=500, help='Requests per route (a tenth for writes).')
+    parser.add_argument('--mode', choices=['test-client', 'gunicorn', 'both'], default='test-client')
+    parser.add_argument('--workers', type=int, default=4, help='gunicorn worker processes.')
+    parser.add_argument('--concurrency', type=int, default=8, help='Client threads against gunicorn.')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--data-dir', default=DATA_DIR)
+    parser.add_argument('--output', help='Result file, by default benchmarks/results/<timestamp>.json.')
+    parser.add_argument('--compare', help='Earlier result file to compare against.')
+    args = parser.parse_args()
+
+    modes = ['test-client', 'gunicorn'] if args.mode == 'both' else [args.mode]
+    report = {
+        'created': datetime.now().isoformat(timespec='seconds'),
+        'commit': git_commit(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpus': os.cpu_count(),
+        'settings': {key: value for key, value in vars(args).items() if key not in ('output', 'compare', 'data_dir')},
+        'runs': [],
+    }
+    for size in (int(size) for size in args.sizes.split(',')):
+        # Every run writes vacancies, so each one starts from a fresh copy of the dataset
+        for mode in modes:
+            source = build_dataset(size, args.users, seed=args.seed, data_dir=args.data_dir)
+            database = f'{source}.{mode}.run'
+            subprocess.run(['cp', source, database], check=True)
+            try:
+                if mode == 'test-client':
+                    output = measure_test_client(database, size, args.users, args.requests, args.seed)
+                else:
+                    output = measure_gunicorn(database, size, args.users, args.requests, args.seed,
+                                              workers=args.workers, concurrency=args.concurrency)
+            finally:
+                for suffix in ('', '-wal', '-shm'):
+                    if os.path.exists(database + suffix):
+                        os.remove(database + suffix)
+            report['runs'].append({'vacancies': size, 'users': args.users, 'mode': mode, 'routes': output})
+            print_table(size, mode, output)
+
+    output_path = args.output or os.path.join(RESULTS_DIR, f'{datetime.now():%Y%m%d-%H%M%S}.json')
+    os.makedirs(os.path.dirname(os.path.abspath(output_path)), exist_ok=True)
+    with open(output_path, 'w') as output_file:
+        json.dump(report, output_file, indent=2)
+    print(f'\nSaved {output_path}')
+    if args.compare:
+        compare(report, args.compare)
+
+
+if __name__ == '__main__':
+    main()
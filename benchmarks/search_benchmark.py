@@ -0,0 +1,86 @@
+"""Full-text search latency on a synthetic vacancy table.
+
+Builds a throwaway SQLite database with the same FTS5 index and triggers as the
+app (search.SEARCH_INDEX_DDL), fills it from mock_data.job_data and times the
+ranked query used by the /search route.
+
+    python -m benchmarks.search_benchmark --rows 1000000
+"""
+import argparse
+import os
+import random
+import sqlite3
+import statistics
+import tempfile
+import time
+
+from mock_data import job_data
+from search import RANKED_SEARCH_SQL, SEARCH_INDEX_DDL, match_expression
+
+COMPANIES = sorted({job[4] for job in job_data})
+LOCATIONS = sorted({job[6] for job in job_data})
+
+# From selective to very common terms; ranking cost grows with the number of matches
+QUERIES = ['devops batumi', 'devops', 'graphic design', 'marketing manager', 'sales', 'develop']
+
+
+def build_database(path: str, rows: int, seed: int = 42):
+    rng = random.Random(seed)
+    connection = sqlite3.connect(path)
+    connection.execute("""CREATE TABLE vacancy (
+        id INTEGER PRIMARY KEY, title TEXT, short_description TEXT, full_description TEXT,
+        company TEXT, location TEXT)""")
+    for statement in SEARCH_INDEX_DDL:
+        connection.execute(statement)
+
+    def generate():
+        for _ in range(rows):
+            job = rng.choice(job_data)
+            yield job[0], job[1], job[2], rng.choice(COMPANIES), rng.choice(LOCATIONS)
+
+    connection.executemany(
+        'INSERT INTO vacancy (title, short_description, full_description, company, location) VALUES (?, ?, ?, ?, ?)',
+        generate()
+    )
+    connection.execute("INSERT INTO vacancy_fts(vacancy_fts) VALUES ('optimize')")
+    connection.commit()
+    return connection
+
+
+def time_query(connection, query: str, repeat: int):
+    parameters = {'match': match_expression(query), 'start': '<mark>', 'end': '</mark>', 'limit': 10, 'offset': 0}
+    matches = connection.execute('SELECT COUNT(*) FROM vacancy_fts WHERE vacancy_fts MATCH ?',
+                                 (parameters['match'],)).fetchone()[0]
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        connection.execute(RANKED_SEARCH_SQL, parameters).fetchall()
+        timings.append((time.perf_counter() - start) * 1000)
+    timings.sort()
+    return {
+        'matches': matches,
+        'p50_ms': statistics.median(timings),
+        'p95_ms': timings[int(len(timings) * 0.95) - 1],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=1_000_000)
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        start = time.perf_counter()
+        connection = build_database(os.path.join(directory, 'search.db'), rows=args.rows)
+        print(f'Indexed {args.rows:,} vacancies in {time.perf_counter() - start:.1f}s')
+
+        print(f'{"query":<20} {"matches":>10} {"p50 ms":>9} {"p95 ms":>9}')
+        for query in QUERIES:
+            result = time_query(connection, query, repeat=args.repeat)
+            print(f'{query:<20} {result["matches"]:>10,} {result["p50_ms"]:>9.2f} {result["p95_ms"]:>9.2f}')
+        connection.close()
+
+
+if __name__ == '__main__':
+    main()
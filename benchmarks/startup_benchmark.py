@@ -0,0 +1,105 @@
+"""Startup cost of the app: importing app.py and booting gunicorn workers.
+
+Each measurement runs in fresh processes against a throwaway copy of a
+database: an empty file (first start) and a dataset built by
+benchmarks.datasets (a restart of a populated site).
+
+    python -m benchmarks.startup_benchmark --vacancies 100000 --workers 4
+"""
+import argparse
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+from benchmarks.datasets import DATA_DIR, build_dataset
+from benchmarks.routes_benchmark import ROOT, free_port
+
+IMPORT_APP = 'import time; start = time.perf_counter(); import app; print(time.perf_counter() - start)'
+
+
+def fresh_copy(source, directory: str) -> str:
+    """Path of a new database in `directory`, a copy of `source` or a missing file when None"""
+    path = os.path.join(directory, 'startup.db')
+    for suffix in ('', '-wal', '-shm'):
+        if os.path.exists(path + suffix):
+            os.remove(path + suffix)
+    if source:
+        shutil.copyfile(source, path)
+    return path
+
+
+def import_seconds(database: str) -> float:
+    env = {**os.environ, 'DATABASE_URL': f'sqlite:///{database}'}
+    result = subprocess.run([sys.executable, '-c', IMPORT_APP], cwd=ROOT, env=env, capture_output=True,
+                            text=True, check=True)
+    return float(result.stdout.strip().splitlines()[-1])
+
+
+def gunicorn_boot_seconds(database: str, workers: int, timeout: float = 120) -> tuple:
+    """Seconds from launching gunicorn to its first response and to `workers` concurrent responses"""
+    import requests
+
+    port = free_port()
+    url = f'http://127.0.0.1:{port}/about'
+    env = {**os.environ, 'DATABASE_URL': f'sqlite:///{database}'}
+    start = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, '-m', 'gunicorn', '--config', 'gunicorn.conf.py', '--workers', str(workers),
+         '--bind', f'127.0.0.1:{port}', '--log-level', 'warning', 'app:app'],
+        cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    try:
+        first = None
+        while first is None:
+            if time.perf_counter() - start > timeout:
+                raise RuntimeError('gunicorn did not answer in time')
+            try:
+                if requests.get(url, timeout=timeout).status_code == 200:
+                    first = time.perf_counter() - start
+            except requests.ConnectionError:
+                time.sleep(0.05)
+
+        # One request per worker at the same time, answered once enough workers are up
+        statuses = []
+        threads = [threading.Thread(target=lambda: statuses.append(requests.get(url, timeout=timeout).status_code))
+                   for _ in range(workers)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        if statuses != [200] * workers:
+            raise RuntimeError(f'gunicorn answered {statuses}')
+        return first, time.perf_counter() - start
+    finally:
+        server.terminate()
+        server.wait(timeout=30)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--vacancies', type=int, default=100_000)
+    parser.add_argument('--users', type=int, default=100_000)
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--data-dir', default=DATA_DIR)
+    args = parser.parse_args()
+
+    populated = build_dataset(args.vacancies, args.users, data_dir=args.data_dir)
+    with tempfile.TemporaryDirectory() as directory:
+        for label, source in (('empty database', None), (f'{args.vacancies:,} vacancies', populated)):
+            imports = [import_seconds(fresh_copy(source, directory)) for _ in range(args.repeat)]
+            boots = [gunicorn_boot_seconds(fresh_copy(source, directory), workers=args.workers)
+                     for _ in range(args.repeat)]
+            print(f'\n{label}')
+            print(f'  import app               median {statistics.median(imports) * 1000:8.1f} ms')
+            print(f'  gunicorn first response  median {statistics.median(b[0] for b in boots) * 1000:8.1f} ms')
+            print(f'  gunicorn {args.workers} workers serving median {statistics.median(b[1] for b in boots) * 1000:8.1f} ms')
+
+
+if __name__ == '__main__':
+    main()
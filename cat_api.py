@@ -1,27 +1,243 @@
+import os
+import threading
+import time
+from collections import deque
+
 import requests
 import logging
-from logging.handlers import RotatingFileHandler
+from requests.adapters import HTTPAdapter
+
+from metrics import CAT_API_ERRORS, CAT_API_SECONDS
 
+# Written to logs/cat_api.log, see logging_config
 logger = logging.getLogger('CatAPI')
-file_handler = RotatingFileHandler(filename='logs/cat_api.log', maxBytes=10_000, backupCount=5)
-file_handler.setFormatter(logging.Formatter('%(asctime)s %(levelname)s CatAPI %(message)s'))
-logger.addHandler(hdlr=file_handler)
-logger.setLevel(level=logging.INFO)
-logger.propagate = False  # Important: don't duplicate to basic config handlers
 
-def get_random_cat():
-    try:
-        url = "https://api.thecatapi.com/v1/images/search"
+CAT_API_URL = "https://api.thecatapi.com/v1/images/search"
 
-        response = requests.get(url=url, timeout=10)
-        response.raise_for_status()
 
-        data = response.json()
-        if data and len(data) > 0:
-            logger.info(f"Cat pic generated successfully: {data}")
-            return data[0]['url']
+def percentile(sorted_values: list, fraction: float):
+    """Nearest-rank percentile of an already sorted list, None if it's empty"""
+    if not sorted_values:
         return None
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * fraction))]
+
+
+def image_urls(payload) -> list:
+    """URLs of an /images/search response body, ValueError unless it is a list of image objects"""
+    if not isinstance(payload, list) or not all(isinstance(image, dict) for image in payload):
+        raise ValueError(f"Unexpected Cat API response: {str(payload)[:200]}")
+    return [image['url'] for image in payload if isinstance(image.get('url'), str) and image['url']]
+
+
+class CircuitBreaker:
+    """Stops calling an upstream that keeps failing.
+
+    Closed: calls go through and consecutive failures are counted. After
+    `failure_threshold` of them the breaker opens and every call is refused
+    for `reset_timeout` seconds. Then it is half-open: one probe call is let
+    through, closing the breaker if it succeeds and reopening it if it fails.
+    """
+
+    CLOSED, OPEN, HALF_OPEN = 'closed', 'open', 'half_open'
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened = 0
+        self.rejected = 0
+        self._opened_at = 0.0
+        self._probing = False
+        self._lock = threading.Lock()
+
+    def allow_request(self) -> bool:
+        with self._lock:
+            if self.state == self.OPEN and time.monotonic() - self._opened_at >= self.reset_timeout:
+                self.state = self.HALF_OPEN
+                self._probing = False
+            if self.state == self.CLOSED:
+                return True
+            if self.state == self.HALF_OPEN and not self._probing:
+                self._probing = True
+                return True
+            self.rejected += 1
+            return False
+
+    def record_success(self):
+        with self._lock:
+            if self.state != self.CLOSED:
+                logger.info("Cat API circuit closed")
+            self.state = self.CLOSED
+            self.failures = 0
+            self._probing = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+                if self.state != self.OPEN:
+                    self.opened += 1
+                    logger.warning(f"Cat API circuit opened after {self.failures} failures")
+                self.state = self.OPEN
+                self._opened_at = time.monotonic()
+                self._probing = False
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                'state': self.state,
+                'failures': self.failures,
+                'opened': self.opened,
+                'rejected': self.rejected,
+            }
+
+
+class CatClient:
+    """Serves cat pic URLs from a ring buffer kept full by a background thread.
 
-    except requests.exceptions.RequestException as e:
-        logger.error(f"Cat API request failed: {e}")
-        return None
\ No newline at end of file
+    Requests never wait on thecatapi.com while the buffer has URLs: they pop one
+    and, once it runs low, wake the prefetch thread, which fetches `batch_size`
+    images per call over a pooled keep-alive session. When the buffer is empty
+    a request waits at most its latency `budget` (seconds) and then falls back
+    to the last URL it served, so a slow or failing API degrades to a repeated
+    cat, not a hung worker. Fetches go through a circuit breaker, so an API
+    that keeps failing is left alone for a while instead of being hammered.
+    The thread is started lazily, so every gunicorn worker gets its own.
+    """
+
+    def __init__(self, url: str = CAT_API_URL, buffer_size: int = 50, batch_size: int = 10,
+                 refill_below: int = 10, timeout: float = 5, budget: float = 0.3,
+                 breaker: CircuitBreaker = None):
+        self.url = url
+        self.batch_size = batch_size
+        self.refill_below = refill_below
+        self.timeout = timeout
+        self.budget = budget
+        self.breaker = breaker or CircuitBreaker()
+        self.session = requests.Session()
+        self.session.mount(prefix='https://', adapter=HTTPAdapter(pool_connections=1, pool_maxsize=2))
+        self.session.mount(prefix='http://', adapter=HTTPAdapter(pool_connections=1, pool_maxsize=2))
+        self.last_url = None
+        self.stats = {'served': 0, 'fallbacks': 0, 'fetches': 0, 'errors': 0}
+        # Durations of the most recent upstream calls, in milliseconds
+        self._latencies = deque(maxlen=1000)
+        self._buffer = deque(maxlen=buffer_size)
+        self._condition = threading.Condition()
+        self._refill = threading.Event()
+        self._worker = None
+        self._worker_pid = None
+
+    def fetch_batch(self) -> list:
+        """Fetch up to `batch_size` image URLs in one call, [] on failure or while the circuit is open"""
+        if not self.breaker.allow_request():
+            return []
+        self.stats['fetches'] += 1
+        start = time.perf_counter()
+        try:
+            response = self.session.get(url=self.url, params={'limit': self.batch_size}, timeout=self.timeout)
+            response.raise_for_status()
+            urls = image_urls(response.json())
+        except (requests.exceptions.RequestException, ValueError) as e:
+            self.record_upstream_call(start=start, error=e)
+            return []
+        self.record_upstream_call(start=start)
+        logger.info(f"Prefetched {len(urls)} cat pics")
+        return urls
+
+    def record_upstream_call(self, start: float, error: Exception = None):
+        """Feed one upstream call, started at perf_counter() `start`, to the latency metrics and the breaker"""
+        elapsed = time.perf_counter() - start
+        self._latencies.append(elapsed * 1000)
+        CAT_API_SECONDS.observe(elapsed)
+        if error is None:
+            self.breaker.record_success()
+            return
+        self.stats['errors'] += 1
+        CAT_API_ERRORS.inc()
+        self.breaker.record_failure()
+        logger.error(f"Cat API request failed: {error!r}")
+
+    def add_urls(self, urls: list):
+        with self._condition:
+            self._buffer.extend(urls)
+            self._condition.notify_all()
+
+    def refill(self):
+        """Top the buffer up to its size, stopping at the first failed fetch"""
+        while len(self._buffer) < self._buffer.maxlen:
+            urls = self.fetch_batch()
+            if not urls:
+                return
+            self.add_urls(urls)
+
+    def _run(self):
+        while True:
+            self._refill.wait()
+            self._refill.clear()
+            # Nothing restarts this thread, so no error may end it
+            try:
+                self.refill()
+            except Exception:
+                logger.exception("Cat pic prefetch failed")
+
+    def _ensure_worker(self):
+        # Threads don't survive a fork, so a worker forked from a process that
+        # already started one has to start its own
+        if self._worker is None or self._worker_pid != os.getpid():
+            self._worker_pid = os.getpid()
+            self._worker = threading.Thread(target=self._run, name='cat-prefetch', daemon=True)
+            self._worker.start()
+            self._refill.set()
+
+    def take_buffered(self):
+        """Pop a prefetched URL without waiting, None if the buffer is empty"""
+        self._ensure_worker()
+        with self._condition:
+            url = self._buffer.popleft() if self._buffer else None
+            if len(self._buffer) < self.refill_below:
+                self._refill.set()
+        if url:
+            self.last_url = url
+            self.stats['served'] += 1
+        return url
+
+    def fallback(self):
+        """The last URL served, for requests that ran out of latency budget"""
+        self.stats['fallbacks'] += 1
+        logger.warning(f"No prefetched cat pics, serving last known: {self.last_url}")
+        return self.last_url
+
+    def get_random_cat(self):
+        url = self.take_buffered()
+        if url:
+            return url
+        with self._condition:
+            self._condition.wait_for(lambda: self._buffer, timeout=self.budget)
+        return self.take_buffered() or self.fallback()
+
+    def metrics(self) -> dict:
+        latencies = sorted(self._latencies)
+        return {
+            **self.stats,
+            'buffered': len(self._buffer),
+            'breaker': self.breaker.stats(),
+            'upstream_latency_ms': {
+                'count': len(latencies),
+                'p50': percentile(latencies, 0.5),
+                'p95': percentile(latencies, 0.95),
+                'p99': percentile(latencies, 0.99),
+            },
+        }
+
+
+cat_client = CatClient(
+    url=os.environ.get('CAT_API_URL') or CAT_API_URL,
+    budget=int(os.environ.get('CAT_API_BUDGET_MS', 300)) / 1000,
+    breaker=CircuitBreaker(failure_threshold=int(os.environ.get('CAT_API_FAILURE_THRESHOLD', 5)),
+                           reset_timeout=float(os.environ.get('CAT_API_RESET_TIMEOUT', 30))),
+)
+
+
+def get_random_cat():
+    return cat_client.get_random_cat()
@@ -0,0 +1,93 @@
+import asyncio
+import logging
+import os
+import threading
+import time
+
+import httpx
+
+from cat_api import CatClient, cat_client, image_urls
+
+# httpx logs every request at INFO, the Cat API logger already covers failures
+logging.getLogger("httpx").setLevel(logging.WARNING)
+
+
+class AsyncCatClient:
+    """Async path of the /cat_pics route, sharing buffer, breaker and metrics with a CatClient.
+
+    Flask runs every async view in an event loop of its own, which can't share
+    connections with other requests. So upstream calls are instead run on one
+    long-lived loop per process, owning a pooled httpx.AsyncClient, and views
+    await them from their own loop. At most `max_concurrency` calls are in
+    flight per process; requests beyond that, and calls that outlive the
+    latency budget, fall back right away instead of piling up on the API.
+    """
+
+    def __init__(self, client: CatClient, max_concurrency: int = 10):
+        self.client = client
+        self.max_concurrency = max_concurrency
+        self.rejected = 0
+        self._in_flight = threading.BoundedSemaphore(max_concurrency)
+        self._loop = None
+        self._loop_pid = None
+        self._http = None
+        self._lock = threading.Lock()
+
+    def _ensure_loop(self):
+        # Like the prefetch thread, the loop thread doesn't survive a fork
+        with self._lock:
+            if self._loop is None or self._loop_pid != os.getpid():
+                self._loop_pid = os.getpid()
+                self._loop = asyncio.new_event_loop()
+                # Built here rather than on first use: loading the TLS context takes
+                # long enough to blow the latency budget of the first requests
+                self._http = httpx.AsyncClient(
+                    timeout=self.client.timeout,
+                    limits=httpx.Limits(max_connections=self.max_concurrency,
+                                        max_keepalive_connections=self.max_concurrency),
+                )
+                threading.Thread(target=self._loop.run_forever, name='cat-async', daemon=True).start()
+        return self._loop
+
+    async def _fetch_batch(self) -> list:
+        response = await self._http.get(self.client.url, params={'limit': self.client.batch_size})
+        response.raise_for_status()
+        return image_urls(response.json())
+
+    async def get_random_cat(self):
+        url = self.client.take_buffered()
+        if url:
+            return url
+        if not self._in_flight.acquire(blocking=False):
+            self.rejected += 1
+            return self.client.fallback()
+        try:
+            if not self.client.breaker.allow_request():
+                return self.client.fallback()
+            self.client.stats['fetches'] += 1
+            loop = self._ensure_loop()
+            start = time.perf_counter()
+            future = asyncio.run_coroutine_threadsafe(self._fetch_batch(), loop)
+            try:
+                urls = await asyncio.wait_for(asyncio.wrap_future(future), timeout=self.client.budget)
+            except Exception as e:
+                # Anything but a cancellation (a BaseException) is the upstream's failure: the
+                # breaker must hear of it, or a failed half-open probe would keep it probing
+                future.cancel()
+                self.client.record_upstream_call(start=start, error=e)
+                return self.client.fallback()
+            self.client.record_upstream_call(start=start)
+        finally:
+            self._in_flight.release()
+
+        if not urls:
+            return self.client.fallback()
+        # One for this request, the rest saves the next ones an upstream call
+        self.client.add_urls(urls[1:])
+        self.client.last_url = urls[0]
+        self.client.stats['served'] += 1
+        return urls[0]
+
+
+async_cat_client = AsyncCatClient(client=cat_client,
+                                  max_concurrency=int(os.environ.get('CAT_API_MAX_CONCURRENCY', 10)))
@@ -0,0 +1,47 @@
+import hashlib
+from datetime import timezone
+
+from flask import make_response, request, session
+from flask_login import current_user
+
+
+def page_etag(*parts) -> str:
+    """ETag of a page, built from the data it shows and who is looking at it"""
+    # The navbar shows the viewer's name and avatar, so renaming oneself changes every page
+    viewer = ((current_user.get_id(), current_user.username, current_user.image_filename)
+              if current_user.is_authenticated else None)
+    return hashlib.sha1(repr(parts + (viewer,)).encode()).hexdigest()
+
+
+def http_date(last_modified):
+    # Timestamps are stored as naive local time, HTTP dates are whole seconds in UTC
+    return last_modified.astimezone(timezone.utc).replace(microsecond=0)
+
+
+def client_is_fresh(etag: str, last_modified) -> bool:
+    """Whether the client's If-None-Match/If-Modified-Since still match the page"""
+    # Pending flash messages must be rendered, a cached copy wouldn't show them
+    if session.get('_flashes'):
+        return False
+    if request.if_none_match:
+        return request.if_none_match.contains(etag)
+    if request.if_modified_since and last_modified is not None:
+        return http_date(last_modified) <= request.if_modified_since
+    return False
+
+
+def add_validators(response, etag: str, last_modified):
+    """Attach ETag/Last-Modified and make clients revalidate before reusing the page"""
+    response = make_response(response)
+    response.set_etag(etag)
+    if last_modified is not None:
+        response.last_modified = http_date(last_modified)
+    # Pages differ per logged-in user, whose session travels in the cookie
+    response.vary.add('Cookie')
+    response.cache_control.private = True
+    response.cache_control.no_cache = True
+    return response
+
+
+def not_modified(etag: str, last_modified):
+    return add_validators(make_response('', 304), etag=etag, last_modified=last_modified)
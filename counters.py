@@ -0,0 +1,101 @@
+from collections import Counter
+from datetime import datetime
+
+from sqlalchemy import delete, event, func, inspect, select, update
+from sqlalchemy.dialects.sqlite import insert
+
+from db import db
+from models import CategoryCount, User, Vacancy, category_registry
+
+ALL_CATEGORIES = 'all'
+
+
+def adjust_category_count(connection, category: str, delta: int):
+    """Add `delta` to the counter of `category` and mark it modified, creating the row if needed"""
+    now = datetime.now()
+    statement = insert(CategoryCount).values(category=category, total=delta, last_modified=now)
+    statement = statement.on_conflict_do_update(
+        index_elements=[CategoryCount.category],
+        set_={'total': CategoryCount.total + delta, 'last_modified': now},
+    )
+    connection.execute(statement)
+
+
+def category_state(category: str = ALL_CATEGORIES):
+    """Return (total, last_modified) of a category, (0, None) if it never had a vacancy"""
+    row = db.session.execute(
+        select(CategoryCount.total, CategoryCount.last_modified).where(CategoryCount.category == category)
+    ).first()
+    return tuple(row) if row else (0, None)
+
+
+def category_total(category: str = ALL_CATEGORIES) -> int:
+    return category_state(category=category)[0]
+
+
+def rebuild_category_counts():
+    """Recount every category from the vacancy table, e.g. after bulk writes"""
+    db.session.execute(CategoryCount.__table__.delete())
+    rows = db.session.execute(
+        select(Vacancy.category_id, func.count()).group_by(Vacancy.category_id)
+    ).all()
+    now = datetime.now()
+    counts = [{'category': category_registry.slug_for(category_id), 'total': total, 'last_modified': now}
+              for category_id, total in rows]
+    counts.append({'category': ALL_CATEGORIES, 'total': sum(row['total'] for row in counts), 'last_modified': now})
+    db.session.execute(CategoryCount.__table__.insert(), counts)
+    db.session.commit()
+
+
+def delete_author_vacancies(author_id: int) -> int:
+    """Delete every vacancy of an author with one statement, returning how many went.
+
+    A bulk DELETE skips the mapper events below, so the counters are adjusted
+    here, in the same transaction, from the categories the DELETE returned.
+    The full-text index follows through its SQL triggers.
+    """
+    deleted = Counter(db.session.scalars(
+        delete(Vacancy).where(Vacancy.author_id == author_id).returning(Vacancy.category_id),
+        execution_options={'synchronize_session': False},
+    ))
+    connection = db.session.connection()
+    for category_id, total in deleted.items():
+        adjust_category_count(connection, category=category_registry.slug_for(category_id), delta=-total)
+    if deleted:
+        adjust_category_count(connection, category=ALL_CATEGORIES, delta=-sum(deleted.values()))
+    return sum(deleted.values())
+
+
+# The counters are updated from mapper events, so they are written in the same
+# flush (and transaction) as the vacancy rows they describe
+@event.listens_for(Vacancy, 'after_insert')
+def count_inserted_vacancy(mapper, connection, target):
+    adjust_category_count(connection, category=target.category, delta=1)
+    adjust_category_count(connection, category=ALL_CATEGORIES, delta=1)
+
+
+@event.listens_for(Vacancy, 'after_delete')
+def count_deleted_vacancy(mapper, connection, target):
+    adjust_category_count(connection, category=target.category, delta=-1)
+    adjust_category_count(connection, category=ALL_CATEGORIES, delta=-1)
+
+
+@event.listens_for(Vacancy, 'after_update')
+def count_updated_vacancy(mapper, connection, target):
+    state = inspect(target)
+    if not any(state.attrs[column.key].history.has_changes() for column in mapper.column_attrs):
+        return
+    history = state.attrs.category_id.history
+    if history.deleted and history.added:
+        adjust_category_count(connection, category=category_registry.slug_for(history.deleted[0]), delta=-1)
+        adjust_category_count(connection, category=category_registry.slug_for(history.added[0]), delta=1)
+    else:
+        adjust_category_count(connection, category=target.category, delta=0)
+    adjust_category_count(connection, category=ALL_CATEGORIES, delta=0)
+
+
+@event.listens_for(User, 'after_update')
+def touch_renamed_author(mapper, connection, target):
+    # Listing cards show the author's username
+    if inspect(target).attrs.username.history.has_changes():
+        connection.execute(update(CategoryCount).values(last_modified=datetime.now()))
@@ -1,3 +1,88 @@
+import os
+
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy import event, exc
+from sqlalchemy.engine import make_url
+
+db = SQLAlchemy()
+
+# Largest value of an SQLite INTEGER; bigger Python ints can't be bound as parameters
+SQLITE_MAX_INTEGER = 2 ** 63 - 1
+
+# PRAGMAs run on every new SQLite connection, per profile. 'default' keeps
+# SQLite's own settings; 'production' lets readers work while a write is in
+# flight (WAL), stops fsyncing on every commit, and gives each connection a
+# 64 MB page cache, a 256 MB memory map and 5 s to wait for a lock.
+SQLITE_PROFILES = {
+    'default': {},
+    'production': {
+        'journal_mode': 'WAL',
+        'synchronous': 'NORMAL',
+        'cache_size': -64_000,
+        'mmap_size': 256 * 1024 * 1024,
+        'busy_timeout': 5000,
+        'temp_store': 'MEMORY',
+    },
+}
+
+
+def sqlite_pragmas(profile: str) -> dict:
+    """PRAGMAs of `profile`, each overridable with an env var, e.g. SQLITE_CACHE_SIZE=-128000"""
+    pragmas = dict(SQLITE_PROFILES[profile])
+    for name in SQLITE_PROFILES['production']:
+        value = os.environ.get(f'SQLITE_{name.upper()}')
+        if value is not None:
+            pragmas[name] = value
+    return pragmas
+
+
+def is_memory_database(url: str) -> bool:
+    url = make_url(url)
+    return url.database in (None, '', ':memory:') or url.query.get('mode') == 'memory'
+
+
+def engine_options(profile: str, url: str = None) -> dict:
+    """SQLALCHEMY_ENGINE_OPTIONS of `profile`: the connection pool of each worker process.
+
+    An in-memory database lives in a single connection (SQLAlchemy gives it a
+    StaticPool, which takes no pool size), so only file databases get the pool options.
+    """
+    if profile == 'default':
+        return {}
+    busy_timeout = int(sqlite_pragmas(profile).get('busy_timeout', 5000))
+    # Also covers the lock waits of the driver's own BEGIN statements
+    options = {'connect_args': {'timeout': busy_timeout / 1000}}
+    if url is None or not is_memory_database(url):
+        options.update({
+            'pool_size': int(os.environ.get('DB_POOL_SIZE', 5)),
+            'max_overflow': int(os.environ.get('DB_MAX_OVERFLOW', 10)),
+            'pool_timeout': 30,
+        })
+    return options
+
+
+def tune_engine(engine, profile: str):
+    """Apply the PRAGMAs of `profile` to every connection `engine` opens.
+
+    Pooled connections are also tagged with the process that opened them, so a
+    gunicorn worker forked after the app was loaded never reuses a connection
+    of its parent; it opens its own instead.
+    """
+    pragmas = sqlite_pragmas(profile)
+
+    @event.listens_for(engine, 'connect')
+    def set_pragmas(dbapi_connection, connection_record):
+        connection_record.info['pid'] = os.getpid()
+        cursor = dbapi_connection.cursor()
+        for name, value in pragmas.items():
+            cursor.execute(f'PRAGMA {name} = {value}')
+        cursor.close()
 
-db = SQLAlchemy()
\ No newline at end of file
+    @event.listens_for(engine, 'checkout')
+    def check_process(dbapi_connection, connection_record, connection_proxy):
+        if connection_record.info['pid'] != os.getpid():
+            connection_record.dbapi_connection = connection_proxy.dbapi_connection = None
+            raise exc.DisconnectionError(
+                f"Connection record belongs to pid {connection_record.info['pid']}, "
+                f"attempting to check out in pid {os.getpid()}"
+            )
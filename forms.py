@@ -10,6 +10,8 @@ from wtforms import (
 )
 from wtforms.validators import DataRequired, Email, EqualTo, Length
 
+from models import category_registry
+
 class UserForm(FlaskForm):
     email = StringField(
         "Email",
@@ -79,13 +81,7 @@ class VacancyForm(FlaskForm):
     )
     category = SelectField(
         "Category",
-        choices=[
-            ("it", "IT"),
-            ("design", "Design"),
-            ("marketing", "Marketing"),
-            ("sales", "Sales"),
-            ("other", "Other"),
-        ],
+        choices=lambda: category_registry.choices(),
         validators=[DataRequired()]
     )
     submit = SubmitField("Post Vacancy")
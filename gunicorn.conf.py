@@ -0,0 +1,37 @@
+import os
+import shutil
+import tempfile
+
+# Every worker writes its metrics to files in this directory, /metrics adds them up.
+# Set before the app is imported, which reads it when prometheus_client loads.
+metrics_dir = os.environ.setdefault('PROMETHEUS_MULTIPROC_DIR',
+                                    os.path.join(tempfile.gettempdir(), 'jobboard-metrics'))
+os.makedirs(metrics_dir, exist_ok=True)
+
+# Imported here, not in child_exit: that runs from the arbiter's SIGCHLD handler,
+# which may interrupt an import still in progress
+from prometheus_client import multiprocess  # noqa: E402
+
+# The master imports the app once and forks ready workers, instead of every worker
+# importing it again. Threads and pooled connections are per process (see
+# logging_config, cat_api and db.tune_engine), so nothing is shared across the fork.
+# Code changes then need a restart rather than a HUP.
+preload_app = True
+
+
+def on_starting(server):
+    # Counters of a previous run must not be added to this one
+    shutil.rmtree(metrics_dir, ignore_errors=True)
+    os.makedirs(metrics_dir)
+    # Prepare the database once, here, rather than on the first request of every worker
+    from app import app, db, init_database
+    if app.config['AUTO_INIT_DB']:
+        with app.app_context():
+            init_database()
+            db.session.remove()
+            db.engine.dispose()
+        app.config['AUTO_INIT_DB'] = False
+
+
+def child_exit(server, worker):
+    multiprocess.mark_process_dead(worker.pid)
@@ -0,0 +1,108 @@
+import atexit
+import logging
+import os
+import queue
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+
+# Loggers with a file of their own in LOG_DIR; everything else goes to the console
+LOG_FILES = {
+    'JobBoard': 'job_portal.log',
+    'CatAPI': 'cat_api.log',
+    'RequestLog': 'requests.log',
+}
+# Loggers whose messages are complete lines already (JSON), written without a prefix
+BARE_LOGGERS = {'RequestLog'}
+LOG_DIR = os.environ.get('LOG_DIR') or 'logs'
+LOG_MAX_BYTES = int(os.environ.get('LOG_MAX_BYTES', 10 * 1024 * 1024))
+LOG_BACKUP_COUNT = int(os.environ.get('LOG_BACKUP_COUNT', 5))
+
+
+class BatchedRotatingFileHandler(RotatingFileHandler):
+    """RotatingFileHandler that leaves flushing to its BatchingQueueListener"""
+
+    def flush(self):
+        pass
+
+    def flush_batch(self):
+        super().flush()
+
+
+class BatchingQueueListener(QueueListener):
+    """Writes queued records on one thread, flushing the files once the queue is drained.
+
+    A burst of records then costs one write to disk instead of one per record.
+    """
+
+    def handle(self, record):
+        super().handle(record)
+        if self.queue.empty():
+            self.flush()
+
+    def flush(self):
+        for handler in self.handlers:
+            if isinstance(handler, BatchedRotatingFileHandler):
+                handler.flush_batch()
+            else:
+                handler.flush()
+
+
+class _OwnFileFilter(logging.Filter):
+    # Keeps records of loggers that have a log file out of the console
+    def filter(self, record):
+        return record.name.split('.')[0] not in LOG_FILES
+
+
+_queue_handler = None
+_listener = None
+
+
+def _start_listener(handlers):
+    global _listener
+    # A new queue each time: one inherited through fork may have its lock held
+    # by the parent's listener thread, which doesn't exist in the child
+    _queue_handler.queue = queue.SimpleQueue()
+    _listener = BatchingQueueListener(_queue_handler.queue, *handlers, respect_handler_level=True)
+    _listener.start()
+
+
+def stop_logging():
+    """Write out every queued record and stop the writer thread"""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+def configure_logging(level: int = logging.INFO):
+    """Route all logging through a queue drained by a single writer thread.
+
+    Request threads only put records on the queue; formatting, writing and
+    rotating the files happen on the listener thread. Safe to call more than
+    once, later calls do nothing.
+    """
+    global _queue_handler
+    if _queue_handler is not None:
+        return
+
+    handlers = []
+    for name, filename in LOG_FILES.items():
+        file_handler = BatchedRotatingFileHandler(filename=os.path.join(LOG_DIR, filename),
+                                                  maxBytes=LOG_MAX_BYTES, backupCount=LOG_BACKUP_COUNT)
+        line_format = '%(message)s' if name in BARE_LOGGERS else f'%(asctime)s %(levelname)s {name} %(message)s'
+        file_handler.setFormatter(logging.Formatter(line_format))
+        file_handler.addFilter(logging.Filter(name))
+        handlers.append(file_handler)
+    console_handler = logging.StreamHandler()
+    console_handler.setFormatter(logging.Formatter('%(asctime)s %(levelname)s %(name)s %(message)s'))
+    console_handler.addFilter(_OwnFileFilter())
+    handlers.append(console_handler)
+
+    _queue_handler = QueueHandler(queue.SimpleQueue())
+    root = logging.getLogger()
+    root.handlers = [_queue_handler]
+    root.setLevel(level)
+
+    _start_listener(handlers)
+    # The writer thread doesn't survive a fork (gunicorn --preload), start a new one in the child
+    os.register_at_fork(after_in_child=lambda: _start_listener(handlers))
+    atexit.register(stop_logging)
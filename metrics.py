@@ -0,0 +1,100 @@
+import os
+import time
+
+from flask import Response, g, request
+from prometheus_client import (CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Counter, Gauge, Histogram,
+                               generate_latest, multiprocess)
+
+# Under gunicorn every worker writes its metrics to files in this directory and
+# /metrics aggregates them, see gunicorn.conf.py. Without it, only this process is reported.
+MULTIPROCESS = bool(os.environ.get('PROMETHEUS_MULTIPROC_DIR'))
+
+# Process-level gauges are refreshed after a request at most this often (seconds)
+SYNC_INTERVAL = 1.0
+
+REQUESTS = Counter('jobboard_http_requests_total', 'HTTP requests served',
+                   ['endpoint', 'method', 'status'])
+REQUEST_SECONDS = Histogram('jobboard_http_request_duration_seconds', 'HTTP request latency',
+                            ['endpoint'])
+DB_POOL_CONNECTIONS = Gauge('jobboard_db_pool_connections', 'Connections of the SQLAlchemy pool',
+                            ['state'], multiprocess_mode='livesum')
+CACHE_LOOKUPS = Gauge('jobboard_cache_lookups', 'Lookups of in-process caches since the worker started',
+                      ['cache', 'result'], multiprocess_mode='livesum')
+CACHE_ENTRIES = Gauge('jobboard_cache_entries', 'Entries held by in-process caches',
+                      ['cache'], multiprocess_mode='livesum')
+CAT_API_SECONDS = Histogram('jobboard_cat_api_upstream_seconds', 'Latency of calls to thecatapi.com')
+CAT_API_ERRORS = Counter('jobboard_cat_api_errors_total', 'Failed calls to thecatapi.com')
+CAT_API_FALLBACKS = Gauge('jobboard_cat_api_fallbacks', 'Cat pics served from the last-known-good URL',
+                          multiprocess_mode='livesum')
+CAT_API_CIRCUIT_OPEN = Gauge('jobboard_cat_api_circuit_open', '1 while the Cat API circuit breaker is not closed',
+                             multiprocess_mode='max')
+LOGIN_ATTEMPTS = Counter('jobboard_login_attempts_total', 'Login attempts by outcome, blocked ones never checked',
+                         ['result'])
+PROCESS_MEMORY = Gauge('jobboard_process_resident_memory_bytes', 'Resident memory of each worker process',
+                       multiprocess_mode='all')
+
+
+def resident_memory() -> int:
+    """Current RSS of this process in bytes, from /proc where available"""
+    try:
+        with open('/proc/self/statm') as statm:
+            return int(statm.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError):
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+class AppMetrics:
+    """Per-request metrics plus periodically synced gauges of the process state"""
+
+    def __init__(self, engine, caches: dict, cat_client):
+        self.engine = engine
+        self.caches = caches
+        self.cat_client = cat_client
+        self._last_sync = 0.0
+
+    def sync_gauges(self):
+        pool = self.engine.pool
+        for state, method in (('checked_out', 'checkedout'), ('idle', 'checkedin'), ('overflow', 'overflow')):
+            if hasattr(pool, method):
+                DB_POOL_CONNECTIONS.labels(state=state).set(max(getattr(pool, method)(), 0))
+        for name, cache in self.caches.items():
+            stats = cache.stats()
+            CACHE_LOOKUPS.labels(cache=name, result='hit').set(stats['hits'])
+            CACHE_LOOKUPS.labels(cache=name, result='miss').set(stats['misses'])
+            CACHE_ENTRIES.labels(cache=name).set(stats['size'])
+        CAT_API_FALLBACKS.set(self.cat_client.stats['fallbacks'])
+        CAT_API_CIRCUIT_OPEN.set(int(self.cat_client.breaker.state != 'closed'))
+        PROCESS_MEMORY.set(resident_memory())
+        self._last_sync = time.monotonic()
+
+    def start_request(self):
+        g.metrics_start = time.perf_counter()
+
+    def end_request(self, response):
+        start = g.pop('metrics_start', None)
+        if start is not None:
+            endpoint = request.endpoint or 'unmatched'
+            REQUESTS.labels(endpoint=endpoint, method=request.method, status=response.status_code).inc()
+            REQUEST_SECONDS.labels(endpoint=endpoint).observe(time.perf_counter() - start)
+        if time.monotonic() - self._last_sync >= SYNC_INTERVAL:
+            self.sync_gauges()
+        return response
+
+    def render(self) -> Response:
+        self.sync_gauges()
+        if MULTIPROCESS:
+            registry = CollectorRegistry()
+            multiprocess.MultiProcessCollector(registry)
+        else:
+            registry = REGISTRY
+        return Response(generate_latest(registry), mimetype=CONTENT_TYPE_LATEST)
+
+
+def init_metrics(app, engine, caches: dict, cat_client) -> AppMetrics:
+    """Record metrics for every request of `app` and serve them at /metrics"""
+    app_metrics = AppMetrics(engine=engine, caches=caches, cat_client=cat_client)
+    app.before_request(app_metrics.start_request)
+    app.after_request(app_metrics.end_request)
+    app.add_url_rule('/metrics', endpoint='metrics', view_func=app_metrics.render)
+    return app_metrics
@@ -0,0 +1,134 @@
+from datetime import datetime
+
+from sqlalchemy import bindparam, inspect, select, text
+
+from counters import rebuild_category_counts
+from db import db
+from models import CategoryCount, Vacancy, category_registry
+from normalize import normalize_location, parse_salary
+from search import create_search_index
+
+# How to fill columns added to existing tables, keyed by (table, column)
+BACKFILLS = {
+    ('vacancy', 'last_modified'): 'UPDATE vacancy SET last_modified = date_created',
+    ('category_count', 'last_modified'): 'UPDATE category_count SET last_modified = :now',
+}
+
+
+def add_missing_columns():
+    """Add model columns missing from existing tables, returning the added (table, column) pairs"""
+    added = set()
+    inspector = inspect(db.engine)
+    for table in db.metadata.sorted_tables:
+        existing = {column['name'] for column in inspector.get_columns(table.name)}
+        for column in table.columns:
+            if column.name in existing:
+                continue
+            # SQLite can only add NOT NULL columns with a constant default, so the
+            # column is added nullable and filled in; the models still require a value
+            column_type = column.type.compile(dialect=db.engine.dialect)
+            db.session.execute(text(f'ALTER TABLE {table.name} ADD COLUMN {column.name} {column_type}'))
+            added.add((table.name, column.name))
+            backfill = BACKFILLS.get((table.name, column.name))
+            if backfill:
+                db.session.execute(text(backfill), {'now': str(datetime.now())})
+    db.session.commit()
+    return added
+
+
+def migrate_category_column():
+    """Move vacancies from the old free-text category column to the category table.
+
+    Slugs without a category row (anything beyond the defaults) get one, every
+    vacancy gets its category_id, and the old column and its index are dropped.
+    Does nothing on databases that were created with category_id.
+    """
+    existing = {column['name'] for column in inspect(db.engine).get_columns('vacancy')}
+    if 'category' not in existing:
+        return
+    db.session.execute(text(
+        'INSERT OR IGNORE INTO category (slug, name) '
+        'SELECT DISTINCT category, upper(substr(category, 1, 1)) || substr(category, 2) FROM vacancy'
+    ))
+    db.session.execute(text(
+        'UPDATE vacancy SET category_id = (SELECT id FROM category WHERE category.slug = vacancy.category)'
+    ))
+    # SQLite can't drop a column that is still indexed
+    db.session.execute(text('DROP INDEX IF EXISTS ix_vacancy_category_date_created'))
+    db.session.execute(text('ALTER TABLE vacancy DROP COLUMN category'))
+    db.session.commit()
+    category_registry.reload()
+
+
+def structured_fields_missing():
+    """Vacancies with none of the parsed columns set: not backfilled yet (or, rarely, nothing to parse)"""
+    table = Vacancy.__table__
+    return (table.c.location_key.is_(None) & table.c.salary_min.is_(None) & table.c.salary_max.is_(None)
+            & table.c.currency.is_(None))
+
+
+def backfill_structured_fields(batch_size: int = 1000, progress=None, only_missing: bool = False):
+    """Parse salary_min/salary_max/currency/location_key for every existing vacancy.
+
+    Rows are read and updated in id-ordered batches, each committed on its own,
+    so the command can run on a live database. last_modified is left untouched
+    as nothing visible changes. `progress` is called with the number of rows done.
+    With `only_missing`, rows that already have parsed values are skipped, so an
+    interrupted backfill picks up where it stopped.
+    """
+    table = Vacancy.__table__
+    statement = table.update().where(table.c.id == bindparam('row_id')).values(
+        salary_min=bindparam('salary_min'),
+        salary_max=bindparam('salary_max'),
+        currency=bindparam('currency'),
+        location_key=bindparam('location_key'),
+        last_modified=table.c.last_modified,
+    )
+
+    done = 0
+    last_id = 0
+    while True:
+        query = select(table.c.id, table.c.salary, table.c.location).where(table.c.id > last_id)
+        if only_missing:
+            query = query.where(structured_fields_missing())
+        rows = db.session.execute(query.order_by(table.c.id).limit(batch_size)).all()
+        if not rows:
+            return done
+
+        values = []
+        for row_id, salary, location in rows:
+            salary_min, salary_max, currency = parse_salary(salary)
+            values.append({'row_id': row_id, 'salary_min': salary_min, 'salary_max': salary_max,
+                           'currency': currency, 'location_key': normalize_location(location)})
+        db.session.execute(statement, values)
+        db.session.commit()
+
+        done += len(rows)
+        last_id = rows[-1].id
+        if progress:
+            progress(done)
+
+
+def upgrade_database():
+    """Bring an existing database file up to date with the models.
+
+    db.create_all() only creates missing tables, so columns and indexes
+    added to models after a database was first created are applied here.
+    Every step is idempotent and safe to run on each startup.
+    """
+    add_missing_columns()
+    # Decided from the rows rather than from the columns just added, so a
+    # backfill cut short on an earlier start is finished on the next one
+    backfill_structured_fields(only_missing=True)
+    migrate_category_column()
+
+    for table in db.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(bind=db.engine, checkfirst=True)
+
+    # Databases created before the counter table existed start with it empty
+    if db.session.query(CategoryCount).first() is None:
+        rebuild_category_counts()
+
+    # Databases created before full-text search get the index built from their rows
+    create_search_index()
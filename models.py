@@ -1,9 +1,14 @@
+import threading
+from collections import namedtuple
 from datetime import datetime
 
 from flask_login import UserMixin
-from werkzeug.security import generate_password_hash, check_password_hash
-
+from sqlalchemy import event
+from sqlalchemy.ext.hybrid import Comparator, hybrid_property
+from sqlalchemy.orm import validates
 from db import db
+from normalize import normalize_location, parse_salary
+from passwords import password_hasher
 
 
 class User(db.Model, UserMixin):
@@ -22,19 +27,116 @@ class User(db.Model, UserMixin):
 
     @password.setter
     def password(self, password):
-        self.password_hash = generate_password_hash(password)
+        self.password_hash = password_hasher.hash(password)
 
     def check_password(self, password):
-        return check_password_hash(self.password_hash, password)
+        return password_hasher.check(self.password_hash, password)
+
+    def password_needs_rehash(self):
+        return password_hasher.needs_rehash(self.password_hash)
 
     def __repr__(self):
         return f"<Id: {self.id}, Username: {self.username}>"
 
 
+class Category(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    slug = db.Column(db.String(50), unique=True, nullable=False)
+    name = db.Column(db.String(100), nullable=False)
+
+    def __repr__(self):
+        return f"<Id: {self.id}, Category: {self.slug}>"
+
+
+# Inserted whenever the category table is created, so ids are the same in every database
+DEFAULT_CATEGORIES = [
+    {"id": 1, "slug": "it", "name": "IT"},
+    {"id": 2, "slug": "design", "name": "Design"},
+    {"id": 3, "slug": "marketing", "name": "Marketing"},
+    {"id": 4, "slug": "sales", "name": "Sales"},
+    {"id": 5, "slug": "other", "name": "Other"},
+]
+
+
+@event.listens_for(Category.__table__, "after_create")
+def insert_default_categories(target, connection, **kw):
+    connection.execute(target.insert(), DEFAULT_CATEGORIES)
+
+
+CategoryInfo = namedtuple("CategoryInfo", ["id", "slug", "name"])
+
+
+class CategoryRegistry:
+    """Process-wide cache of the category table.
+
+    Categories change about never, so they are read once (at startup or on first
+    use) and every form, template and filter resolves slugs and ids from memory.
+    Call reload() after adding a category to pick it up in this process.
+    """
+
+    def __init__(self):
+        self._by_id = {}
+        self._by_slug = {}
+        self._lock = threading.Lock()
+
+    def reload(self):
+        rows = db.session.execute(db.select(Category).order_by(Category.id)).scalars()
+        categories = [CategoryInfo(id=row.id, slug=row.slug, name=row.name) for row in rows]
+        with self._lock:
+            self._by_id = {category.id: category for category in categories}
+            self._by_slug = {category.slug: category for category in categories}
+
+    def _ensure_loaded(self):
+        # An empty registry was read before the table was filled, so try again
+        if not self._by_id:
+            self.reload()
+
+    def all(self):
+        self._ensure_loaded()
+        return list(self._by_id.values())
+
+    def choices(self):
+        return [(category.slug, category.name) for category in self.all()]
+
+    def id_for(self, slug):
+        self._ensure_loaded()
+        category = self._by_slug.get(slug)
+        return category.id if category else None
+
+    def slug_for(self, category_id):
+        self._ensure_loaded()
+        category = self._by_id.get(category_id)
+        return category.slug if category else None
+
+
+category_registry = CategoryRegistry()
+
+
+class CategorySlugComparator(Comparator):
+    # Lets queries compare Vacancy.category with a slug while filtering on the integer key
+    def __eq__(self, slug):
+        return self.expression == category_registry.id_for(slug)
+
+    def __ne__(self, slug):
+        return self.expression != category_registry.id_for(slug)
+
+
 class Vacancy(db.Model):
+    # Composite indexes backing the listing and profile queries, so that
+    # filtering and ordering by date never falls back to a full scan + sort
+    __table_args__ = (
+        db.Index("ix_vacancy_date_created", "date_created"),
+        db.Index("ix_vacancy_category_id_date_created", "category_id", "date_created"),
+        db.Index("ix_vacancy_author_id_date_created", "author_id", "date_created"),
+        db.Index("ix_vacancy_author_id_last_modified", "author_id", "last_modified"),
+        db.Index("ix_vacancy_salary_min", "salary_min"),
+        db.Index("ix_vacancy_salary_max", "salary_max"),
+        db.Index("ix_vacancy_location_key_date_created", "location_key", "date_created"),
+    )
+
     id = db.Column(db.Integer, primary_key=True)
     title = db.Column(db.String(100), nullable=False)
-    category = db.Column(db.String(100), nullable=False)  #TODO create category table rearrange code
+    category_id = db.Column(db.Integer, db.ForeignKey("category.id"), nullable=False)
     author_id = db.Column(db.Integer, db.ForeignKey("user.id"), nullable=False)
     short_description = db.Column(db.String(200), nullable=False)
     full_description = db.Column(db.Text, nullable=False)
@@ -42,6 +144,49 @@ class Vacancy(db.Model):
     salary = db.Column(db.String(50), nullable=False)
     location = db.Column(db.String(50), nullable=False)
     date_created = db.Column(db.DateTime, nullable=False, default=datetime.now)
+    last_modified = db.Column(db.DateTime, nullable=False, default=datetime.now, onupdate=datetime.now)
+
+    # Parsed from salary/location whenever those are set, for indexed filtering
+    salary_min = db.Column(db.Integer)
+    salary_max = db.Column(db.Integer)
+    currency = db.Column(db.String(3))
+    location_key = db.Column(db.String(50))
+
+    # The category slug ('it', 'design', ...), resolved through the category registry
+    @hybrid_property
+    def category(self):
+        return category_registry.slug_for(self.category_id)
+
+    @category.setter
+    def category(self, slug):
+        self.category_id = category_registry.id_for(slug)
+
+    @category.comparator
+    def category(cls):
+        return CategorySlugComparator(cls.category_id)
+
+    @validates("salary")
+    def parse_salary_range(self, key, salary):
+        self.salary_min, self.salary_max, self.currency = parse_salary(salary)
+        return salary
+
+    @validates("location")
+    def normalize_location_key(self, key, location):
+        self.location_key = normalize_location(location)
+        return location
 
     def __repr__(self):
         return f"<Id: {self.id}, Vacancy: {self.title}>"
+
+
+class CategoryCount(db.Model):
+    # Number of vacancies per category ('all' holds the grand total), kept up to
+    # date by counters.py so pagination never has to run COUNT(*) on the listing.
+    # last_modified is bumped on every change to a vacancy shown in the category
+    # and serves as the listing's Last-Modified/ETag validator
+    category = db.Column(db.String(100), primary_key=True)
+    total = db.Column(db.Integer, nullable=False, default=0)
+    last_modified = db.Column(db.DateTime, nullable=False, default=datetime.now)
+
+    def __repr__(self):
+        return f"<Category: {self.category}, Total: {self.total}>"
@@ -0,0 +1,66 @@
+import re
+import unicodedata
+from decimal import Decimal
+
+from db import SQLITE_MAX_INTEGER
+
+# Currency symbols and codes recognised in salary text, mapped to ISO 4217 codes
+CURRENCIES = {
+    '$': 'USD', 'usd': 'USD',
+    '€': 'EUR', 'eur': 'EUR',
+    '£': 'GBP', 'gbp': 'GBP',
+    '₾': 'GEL', 'gel': 'GEL', 'lari': 'GEL',
+}
+
+_AMOUNT = re.compile(r'(\d[\d,. ]*)\s*(k)?', re.IGNORECASE)
+# Cents or a decimal before 'k' ('85,000.00', '50.5k'), any other separator groups thousands
+_FRACTION = re.compile(r'\.(\d{1,2})$')
+_CURRENCY = re.compile(r'[$€£₾]|\b(?:usd|eur|gbp|gel|lari)\b', re.IGNORECASE)
+
+
+def parse_salary(salary: str):
+    """Parse free-form salary text into (salary_min, salary_max, currency).
+
+    Handles single amounts and ranges such as '$85,000-$110,000', '80k - 95k EUR',
+    '$50.5k' or '3000 GEL', cents dropped. Parts that can't be recognised are
+    None, as are amounts too large for an SQLite INTEGER; a single amount is
+    both the minimum and the maximum.
+    """
+    if not salary:
+        return None, None, None
+
+    amounts = []
+    for number, thousands in _AMOUNT.findall(salary):
+        number = number.strip()
+        fraction = _FRACTION.search(number)
+        if fraction:
+            number = number[:fraction.start()]
+        digits = re.sub(r'[,. ]', '', number)
+        if not digits:
+            continue
+        amount = Decimal(f"{digits}.{fraction.group(1) if fraction else 0}")
+        if thousands:
+            amount *= 1000
+        amounts.append(int(amount))
+
+    currency_match = _CURRENCY.search(salary)
+    currency = CURRENCIES[currency_match.group(0).lower()] if currency_match else None
+
+    if not amounts:
+        return None, None, currency
+    salary_min, salary_max = (amount if amount <= SQLITE_MAX_INTEGER else None
+                              for amount in (min(amounts[:2]), max(amounts[:2])))
+    return salary_min, salary_max, currency
+
+
+def normalize_location(location: str):
+    """Lookup key of a location: accents stripped, lowercase, single spaces.
+
+    'Tbilisi ', 'TBILISI' and 'Tbilísi' all map to 'tbilisi'.
+    """
+    if not location:
+        return None
+    decomposed = unicodedata.normalize('NFKD', location)
+    ascii_text = ''.join(char for char in decomposed if not unicodedata.combining(char))
+    key = ' '.join(re.sub(r'[^\w\s]', ' ', ascii_text.lower()).split())
+    return key or None
@@ -0,0 +1,83 @@
+import base64
+import binascii
+from datetime import datetime
+
+from sqlalchemy import tuple_
+
+from db import SQLITE_MAX_INTEGER
+from models import Vacancy
+
+
+class KeysetPage:
+    """A page of vacancies fetched by seeking past a (date_created, id) cursor.
+
+    Unlike Flask-SQLAlchemy's Pagination it issues neither OFFSET nor COUNT(*),
+    so every page costs the same index seek no matter how deep it is.
+    """
+
+    def __init__(self, items, has_prev, has_next, total=None):
+        self.items = items
+        self.has_prev = has_prev
+        self.has_next = has_next
+        self.total = total
+
+    def __iter__(self):
+        return iter(self.items)
+
+
+def encode_cursor(vacancy: Vacancy) -> str:
+    raw = f'{vacancy.date_created.isoformat()}|{vacancy.id}'
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(token: str):
+    """Return the (date_created, id) key of a cursor token, or None if it is malformed"""
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        date_created, vacancy_id = base64.urlsafe_b64decode(padded.encode()).decode().split('|')
+        date_created, vacancy_id = datetime.fromisoformat(date_created), int(vacancy_id)
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        return None
+    # An id SQLite can't store would fail the query, not just find nothing
+    if abs(vacancy_id) > SQLITE_MAX_INTEGER:
+        return None
+    return date_created, vacancy_id
+
+
+def page_cursors(items):
+    """Cursors pointing before the first and after the last item of a page"""
+    if not items:
+        return None, None
+    return encode_cursor(items[0]), encode_cursor(items[-1])
+
+
+def order_by_date(query, descending: bool = True):
+    # id breaks ties between equal timestamps so the cursor key is unique
+    if descending:
+        return query.order_by(Vacancy.date_created.desc(), Vacancy.id.desc())
+    return query.order_by(Vacancy.date_created.asc(), Vacancy.id.asc())
+
+
+def keyset_paginate(query, per_page: int, after=None, before=None, descending: bool = True) -> KeysetPage:
+    """Fetch the page following `after` (or preceding `before`) in date order.
+
+    `after`/`before` are decoded cursor keys; with neither the first page is returned.
+    One extra row is fetched to tell whether there is another page in that direction.
+    """
+    backwards = before is not None and after is None
+    cursor = before if backwards else after
+    seek_descending = descending != backwards
+
+    query = order_by_date(query.order_by(None), descending=seek_descending)
+    if cursor is not None:
+        key = tuple_(Vacancy.date_created, Vacancy.id)
+        query = query.filter(key < cursor if seek_descending else key > cursor)
+
+    rows = query.limit(per_page + 1).all()
+    has_more = len(rows) > per_page
+    rows = rows[:per_page]
+
+    if backwards:
+        rows.reverse()
+        return KeysetPage(items=rows, has_prev=has_more, has_next=True)
+    return KeysetPage(items=rows, has_prev=cursor is not None, has_next=has_more)
@@ -0,0 +1,90 @@
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor, TimeoutError
+
+from werkzeug.security import DEFAULT_PBKDF2_ITERATIONS, check_password_hash, generate_password_hash
+
+
+class HashingBusy(Exception):
+    """Raised instead of queueing a password hash when too many are already waiting"""
+
+
+def hash_method(algorithm: str = 'scrypt', iterations: int = DEFAULT_PBKDF2_ITERATIONS, scrypt_n: int = 2 ** 15,
+                scrypt_r: int = 8, scrypt_p: int = 1) -> str:
+    """Werkzeug method string with every parameter spelled out, as it is stored in the hash.
+
+    scrypt takes 128 * n * r bytes of memory per hash (32 MiB by default).
+    """
+    name, _, digest = algorithm.partition(':')
+    if name == 'scrypt':
+        return f'scrypt:{scrypt_n}:{scrypt_r}:{scrypt_p}'
+    if name == 'pbkdf2':
+        return f"pbkdf2:{digest or 'sha256'}:{iterations}"
+    raise ValueError(f"Unsupported password hash algorithm '{algorithm}', expected scrypt or pbkdf2[:digest]")
+
+
+class PasswordHasher:
+    """Hashes and checks passwords on a small pool of threads.
+
+    hashlib releases the GIL for scrypt and PBKDF2, so the request thread
+    waiting on the pool costs nothing. The pool bounds how many KDFs one
+    process runs at once; at most `max_pending` more may wait, later ones
+    get HashingBusy, so a login storm cannot take every worker thread and
+    starve the pages. Hashes made with other parameters still verify and are
+    reported by needs_rehash().
+    """
+
+    def __init__(self, method: str, workers: int = 2, max_pending: int = 16, timeout: float = 10):
+        self.method = method
+        self.workers = workers
+        self.timeout = timeout
+        self._slots = threading.BoundedSemaphore(workers + max_pending)
+        self._lock = threading.Lock()
+        self._pool = None
+        self._pool_pid = None
+        self.stats = {'hashed': 0, 'checked': 0, 'rejected': 0}
+
+    def _executor(self) -> ThreadPoolExecutor:
+        # Pool threads don't survive a fork, a forked worker starts its own
+        with self._lock:
+            if self._pool is None or self._pool_pid != os.getpid():
+                self._pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='password-hash')
+                self._pool_pid = os.getpid()
+            return self._pool
+
+    def _run(self, function, *args):
+        if not self._slots.acquire(blocking=False):
+            self.stats['rejected'] += 1
+            raise HashingBusy('Too many password hashes waiting')
+        try:
+            return self._executor().submit(function, *args).result(timeout=self.timeout)
+        except TimeoutError:
+            self.stats['rejected'] += 1
+            raise HashingBusy(f'Password hash not done within {self.timeout}s')
+        finally:
+            self._slots.release()
+
+    def hash(self, password: str) -> str:
+        self.stats['hashed'] += 1
+        return self._run(generate_password_hash, password, self.method)
+
+    def check(self, password_hash: str, password: str) -> bool:
+        self.stats['checked'] += 1
+        return self._run(check_password_hash, password_hash, password)
+
+    def needs_rehash(self, password_hash: str) -> bool:
+        """Whether a hash was made with other parameters than the configured ones"""
+        return password_hash.split('$', 1)[0] != self.method
+
+
+password_hasher = PasswordHasher(
+    method=hash_method(
+        algorithm=os.environ.get('PASSWORD_HASH_ALGORITHM') or 'scrypt',
+        iterations=int(os.environ.get('PASSWORD_HASH_ITERATIONS', DEFAULT_PBKDF2_ITERATIONS)),
+        scrypt_n=int(os.environ.get('PASSWORD_SCRYPT_N', 2 ** 15)),
+        scrypt_r=int(os.environ.get('PASSWORD_SCRYPT_R', 8)),
+        scrypt_p=int(os.environ.get('PASSWORD_SCRYPT_P', 1)),
+    ),
+    workers=int(os.environ.get('PASSWORD_HASH_WORKERS', 2)),
+    max_pending=int(os.environ.get('PASSWORD_HASH_MAX_PENDING', 16)),
+)
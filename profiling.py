@@ -0,0 +1,150 @@
+import cProfile
+import hmac
+import io
+import logging
+import os
+import pstats
+import time
+from contextvars import ContextVar
+from datetime import datetime
+from urllib.parse import parse_qs, parse_qsl, urlencode
+
+from sqlalchemy import event
+
+logger = logging.getLogger('JobBoard')
+
+# A request is profiled when it carries the token in this header or query argument
+PROFILE_HEADER = 'X-Profile'
+PROFILE_ARG = '_profile'
+# ...and its report is returned instead of the page with this header or argument set to 'inline'
+OUTPUT_HEADER = 'X-Profile-Output'
+OUTPUT_ARG = '_profile_output'
+
+# SQL statements of the request being profiled in this context, None when not profiling
+_captured_sql = ContextVar('captured_sql', default=None)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _captured_sql.get() is not None:
+        conn.info.setdefault('profile_query_start', []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    statements = _captured_sql.get()
+    if statements is not None and conn.info.get('profile_query_start'):
+        elapsed = time.perf_counter() - conn.info['profile_query_start'].pop()
+        statements.append((statement, parameters, elapsed * 1000))
+
+
+def capture_sql(engine):
+    """Record the statements `engine` runs for profiled requests"""
+    if not event.contains(engine, 'after_cursor_execute', _after_cursor_execute):
+        event.listen(engine, 'before_cursor_execute', _before_cursor_execute)
+        event.listen(engine, 'after_cursor_execute', _after_cursor_execute)
+
+
+class RequestProfiler:
+    """WSGI middleware running requests that carry the profiling token under cProfile.
+
+    Every other request goes straight to the app. The report (call statistics
+    plus every SQL statement with its parameters and duration) is written to
+    `report_dir` and named in the X-Profile-Report response header, or returned
+    instead of the page when inline output is asked for.
+    """
+
+    def __init__(self, wsgi_app, token: str, report_dir: str = 'logs/profiles', sort_by: str = 'cumulative',
+                 limit: int = 40):
+        self.wsgi_app = wsgi_app
+        self.token = token
+        self.report_dir = report_dir
+        self.sort_by = sort_by
+        self.limit = limit
+
+    def _options(self, environ):
+        """Return (profile?, inline?) for a request"""
+        query = parse_qs(environ.get('QUERY_STRING', ''))
+        token = environ.get(f'HTTP_{PROFILE_HEADER.upper().replace("-", "_")}') or query.get(PROFILE_ARG, [''])[0]
+        if not token or not hmac.compare_digest(token.encode(), self.token.encode()):
+            return False, False
+        output = environ.get(f'HTTP_{OUTPUT_HEADER.upper().replace("-", "_")}') or query.get(OUTPUT_ARG, [''])[0]
+        return True, output == 'inline'
+
+    def __call__(self, environ, start_response):
+        profile, inline = self._options(environ)
+        if not profile:
+            return self.wsgi_app(environ, start_response)
+
+        response = {}
+
+        def capture_start_response(status, headers, exc_info=None):
+            response['status'], response['headers'] = status, headers
+            return response.setdefault('body', []).append
+
+        def run_app():
+            # Consume the body inside the profiler, streamed responses do their work there
+            iterable = self.wsgi_app(environ, capture_start_response)
+            try:
+                response.setdefault('body', []).extend(iterable)
+            finally:
+                if hasattr(iterable, 'close'):
+                    iterable.close()
+
+        statements = []
+        context_token = _captured_sql.set(statements)
+        profiler = cProfile.Profile()
+        start = time.perf_counter()
+        try:
+            profiler.runcall(run_app)
+        finally:
+            _captured_sql.reset(context_token)
+        elapsed = (time.perf_counter() - start) * 1000
+
+        report = self.report(environ, status=response['status'], elapsed=elapsed, profiler=profiler,
+                             statements=statements)
+        if inline:
+            start_response('200 OK', [('Content-Type', 'text/plain; charset=utf-8')])
+            return [report.encode()]
+
+        path = self.save(environ, report)
+        logger.info(f"Profiled {environ.get('PATH_INFO')} in {elapsed:.1f} ms, report: {path}")
+        start_response(response['status'], response['headers'] + [('X-Profile-Report', os.path.basename(path))])
+        return response['body']
+
+    def report(self, environ, status: str, elapsed: float, profiler, statements) -> str:
+        out = io.StringIO()
+        path = environ.get('PATH_INFO', '')
+        # The profiling arguments stay out of the report, the token above all
+        query = urlencode([(name, value) for name, value in parse_qsl(environ.get('QUERY_STRING', ''),
+                                                                      keep_blank_values=True)
+                           if name not in (PROFILE_ARG, OUTPUT_ARG)])
+        if query:
+            path += f'?{query}'
+        sql_ms = sum(duration for _, _, duration in statements)
+        out.write(f"{environ.get('REQUEST_METHOD')} {path} -> {status}\n")
+        out.write(f'Total {elapsed:.2f} ms, {len(statements)} SQL statements in {sql_ms:.2f} ms\n\n')
+        for number, (statement, parameters, duration) in enumerate(statements, start=1):
+            out.write(f'[{number}] {duration:.2f} ms {parameters!r}\n{statement.strip()}\n\n')
+        stats = pstats.Stats(profiler, stream=out)
+        stats.sort_stats(self.sort_by).print_stats(self.limit)
+        return out.getvalue()
+
+    def save(self, environ, report: str) -> str:
+        os.makedirs(self.report_dir, exist_ok=True)
+        name = environ.get('PATH_INFO', '').strip('/').replace('/', '_') or 'index'
+        path = os.path.join(self.report_dir, f"{datetime.now():%Y%m%d-%H%M%S-%f}-{name}.txt")
+        with open(path, 'w') as report_file:
+            report_file.write(report)
+        return path
+
+
+def init_profiling(app, engine):
+    """Enable per-request profiling when PROFILING_ENABLED is set and a PROFILING_TOKEN is configured"""
+    if not app.config.get('PROFILING_ENABLED'):
+        return
+    token = app.config.get('PROFILING_TOKEN')
+    if not token:
+        logger.warning("PROFILING_ENABLED is set without a PROFILING_TOKEN, profiling stays off")
+        return
+    capture_sql(engine)
+    app.wsgi_app = RequestProfiler(app.wsgi_app, token=token,
+                                   report_dir=app.config.get('PROFILING_DIR') or 'logs/profiles')
@@ -0,0 +1,135 @@
+import os
+import sqlite3
+import threading
+import time
+from collections import deque
+
+from metrics import LOGIN_ATTEMPTS
+
+
+class MemoryStore:
+    """Timestamps of recent events per key, kept in this process only"""
+
+    # Keys are swept for expired events once this many are tracked
+    SWEEP_ABOVE = 10_000
+
+    def __init__(self):
+        self._events = {}
+        self._lock = threading.Lock()
+
+    def add(self, key: str, now: float, window: float):
+        with self._lock:
+            self._events.setdefault(key, deque()).append(now)
+            if len(self._events) > self.SWEEP_ABOVE:
+                self._sweep(since=now - window)
+
+    def count(self, key: str, since: float) -> int:
+        with self._lock:
+            events = self._events.get(key)
+            if not events:
+                return 0
+            while events and events[0] <= since:
+                events.popleft()
+            if not events:
+                del self._events[key]
+            return len(events)
+
+    def clear(self, key: str):
+        with self._lock:
+            self._events.pop(key, None)
+
+    def _sweep(self, since: float):
+        for key in [key for key, events in self._events.items() if events[-1] <= since]:
+            del self._events[key]
+
+
+class SQLiteStore:
+    """Events in a small SQLite file, shared by every worker process on the host"""
+
+    # Expired rows are deleted on roughly one write in this many
+    CLEANUP_EVERY = 100
+
+    def __init__(self, path: str):
+        self.path = path
+        self._local = threading.local()
+        self._writes = 0
+        with self._connection() as connection:
+            connection.execute('CREATE TABLE IF NOT EXISTS rate_event (key TEXT NOT NULL, at REAL NOT NULL)')
+            connection.execute('CREATE INDEX IF NOT EXISTS ix_rate_event_key_at ON rate_event (key, at)')
+
+    def _connection(self) -> sqlite3.Connection:
+        # One connection per thread, and a new one after a fork
+        connection = getattr(self._local, 'connection', None)
+        if connection is None or self._local.pid != os.getpid():
+            connection = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute('PRAGMA synchronous=NORMAL')
+            self._local.connection, self._local.pid = connection, os.getpid()
+        return connection
+
+    def add(self, key: str, now: float, window: float):
+        connection = self._connection()
+        connection.execute('INSERT INTO rate_event (key, at) VALUES (?, ?)', (key, now))
+        self._writes += 1
+        if self._writes % self.CLEANUP_EVERY == 0:
+            connection.execute('DELETE FROM rate_event WHERE at <= ?', (now - window,))
+
+    def count(self, key: str, since: float) -> int:
+        return self._connection().execute(
+            'SELECT COUNT(*) FROM rate_event WHERE key = ? AND at > ?', (key, since)
+        ).fetchone()[0]
+
+    def clear(self, key: str):
+        self._connection().execute('DELETE FROM rate_event WHERE key = ?', (key,))
+
+
+class LoginLimiter:
+    """Sliding-window limit on failed logins, per username and per client IP.
+
+    An attempt is refused while its username has `username_limit`, or its IP
+    `ip_limit`, failures within the last `window` seconds: checked before the
+    password, so refused attempts cost no hashing. The username limit stops
+    guessing one account from many addresses, the IP limit one address
+    trying many accounts. A successful login clears its username's failures.
+    """
+
+    def __init__(self, store, username_limit: int = 5, ip_limit: int = 50, window: float = 300):
+        self.store = store
+        self.username_limit = username_limit
+        self.ip_limit = ip_limit
+        self.window = window
+        self.stats = {'success': 0, 'failure': 0, 'blocked_username': 0, 'blocked_ip': 0}
+
+    def _record(self, result: str):
+        self.stats[result] += 1
+        LOGIN_ATTEMPTS.labels(result=result).inc()
+
+    def blocked(self, username: str, ip: str):
+        """'username' or 'ip' when the attempt must be refused, None when it may go on"""
+        since = time.time() - self.window
+        if self.store.count(f'user:{username}', since=since) >= self.username_limit:
+            self._record('blocked_username')
+            return 'username'
+        if self.store.count(f'ip:{ip}', since=since) >= self.ip_limit:
+            self._record('blocked_ip')
+            return 'ip'
+        return None
+
+    def failed(self, username: str, ip: str):
+        now = time.time()
+        self.store.add(f'user:{username}', now=now, window=self.window)
+        self.store.add(f'ip:{ip}', now=now, window=self.window)
+        self._record('failure')
+
+    def succeeded(self, username: str):
+        self.store.clear(f'user:{username}')
+        self._record('success')
+
+
+login_limiter = LoginLimiter(
+    # Set LOGIN_RATE_LIMIT_DB to a file path to share the counts between gunicorn workers
+    store=SQLiteStore(os.environ['LOGIN_RATE_LIMIT_DB']) if os.environ.get('LOGIN_RATE_LIMIT_DB') else MemoryStore(),
+    username_limit=int(os.environ.get('LOGIN_MAX_FAILURES_PER_USER', 5)),
+    ip_limit=int(os.environ.get('LOGIN_MAX_FAILURES_PER_IP', 50)),
+    window=float(os.environ.get('LOGIN_RATE_WINDOW', 300)),
+)
@@ -0,0 +1,72 @@
+import json
+import logging
+import time
+from datetime import datetime, timezone
+
+from flask import before_render_template, g, has_request_context, request, template_rendered
+from sqlalchemy import event
+
+# One JSON object per line in logs/requests.log, see logging_config
+logger = logging.getLogger('RequestLog')
+
+
+def _stats():
+    # None outside of requests, e.g. queries run at startup or by CLI commands
+    return g.get('request_stats') if has_request_context() else None
+
+
+def start_request():
+    g.request_stats = {'start': time.perf_counter(), 'sql_count': 0, 'sql_ms': 0.0,
+                       'render_ms': 0.0, 'render_start': []}
+
+
+def log_request(response):
+    stats = _stats()
+    if stats is None:
+        return response
+    logger.info(json.dumps({
+        'ts': datetime.now(timezone.utc).isoformat(timespec='milliseconds'),
+        'method': request.method,
+        'path': request.path,
+        'endpoint': request.endpoint,
+        'status': response.status_code,
+        'duration_ms': round((time.perf_counter() - stats['start']) * 1000, 2),
+        'render_ms': round(stats['render_ms'], 2),
+        'sql_count': stats['sql_count'],
+        'sql_ms': round(stats['sql_ms'], 2),
+    }))
+    return response
+
+
+def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault('query_start', []).append(time.perf_counter())
+
+
+def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - conn.info['query_start'].pop()
+    stats = _stats()
+    if stats is not None:
+        stats['sql_count'] += 1
+        stats['sql_ms'] += elapsed * 1000
+
+
+def before_render(sender, template, context, **extra):
+    stats = _stats()
+    if stats is not None:
+        stats['render_start'].append(time.perf_counter())
+
+
+def after_render(sender, template, context, **extra):
+    stats = _stats()
+    if stats is not None and stats['render_start']:
+        stats['render_ms'] += (time.perf_counter() - stats['render_start'].pop()) * 1000
+
+
+def init_request_log(app, engine):
+    """Log route, status, latency, template render time and SQL count/time of every request of `app`"""
+    app.before_request(start_request)
+    app.after_request(log_request)
+    event.listen(engine, 'before_cursor_execute', before_cursor_execute)
+    event.listen(engine, 'after_cursor_execute', after_cursor_execute)
+    before_render_template.connect(before_render, app)
+    template_rendered.connect(after_render, app)
@@ -0,0 +1,114 @@
+import re
+
+from markupsafe import Markup, escape
+from sqlalchemy import DDL, event, select, text
+
+from db import db
+from models import Vacancy
+
+# Columns indexed by the FTS5 table and their BM25 weights, in table order
+SEARCH_COLUMNS = {
+    'title': 10.0,
+    'short_description': 5.0,
+    'full_description': 1.0,
+    'company': 3.0,
+    'location': 2.0,
+}
+
+# Control characters never typed into a form, swapped for <mark> after escaping
+_HIGHLIGHT_START = '\x02'
+_HIGHLIGHT_END = '\x03'
+
+# Best matches first, with a snippet around the matched words of the best column
+RANKED_SEARCH_SQL = f"""
+    SELECT rowid, snippet(vacancy_fts, -1, :start, :end, '…', 16)
+    FROM vacancy_fts WHERE vacancy_fts MATCH :match
+    ORDER BY bm25(vacancy_fts, {', '.join(str(weight) for weight in SEARCH_COLUMNS.values())})
+    LIMIT :limit OFFSET :offset
+"""
+
+_columns = ', '.join(SEARCH_COLUMNS)
+_new_values = ', '.join(f'new.{column}' for column in SEARCH_COLUMNS)
+_old_values = ', '.join(f'old.{column}' for column in SEARCH_COLUMNS)
+
+# External-content FTS5 index over the vacancy table: it stores only the index,
+# the text itself is read back from the vacancy rows. Triggers keep it in sync.
+SEARCH_INDEX_DDL = [
+    f"""CREATE VIRTUAL TABLE IF NOT EXISTS vacancy_fts USING fts5(
+            {_columns}, content='vacancy', content_rowid='id', tokenize='porter unicode61 remove_diacritics 2'
+        )""",
+    f"""CREATE TRIGGER IF NOT EXISTS vacancy_fts_insert AFTER INSERT ON vacancy BEGIN
+            INSERT INTO vacancy_fts(rowid, {_columns}) VALUES (new.id, {_new_values});
+        END""",
+    f"""CREATE TRIGGER IF NOT EXISTS vacancy_fts_delete AFTER DELETE ON vacancy BEGIN
+            INSERT INTO vacancy_fts(vacancy_fts, rowid, {_columns}) VALUES ('delete', old.id, {_old_values});
+        END""",
+    f"""CREATE TRIGGER IF NOT EXISTS vacancy_fts_update AFTER UPDATE OF {_columns} ON vacancy BEGIN
+            INSERT INTO vacancy_fts(vacancy_fts, rowid, {_columns}) VALUES ('delete', old.id, {_old_values});
+            INSERT INTO vacancy_fts(rowid, {_columns}) VALUES (new.id, {_new_values});
+        END""",
+]
+
+# Created and dropped together with the vacancy table by db.create_all()/db.drop_all()
+for _statement in SEARCH_INDEX_DDL:
+    event.listen(Vacancy.__table__, 'after_create', DDL(_statement))
+event.listen(Vacancy.__table__, 'after_create', DDL("INSERT INTO vacancy_fts(vacancy_fts) VALUES ('rebuild')"))
+event.listen(Vacancy.__table__, 'before_drop', DDL('DROP TABLE IF EXISTS vacancy_fts'))
+
+
+def create_search_index():
+    """Add the search index to a database whose vacancy table predates it"""
+    exists = db.session.execute(
+        text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'vacancy_fts'")
+    ).first()
+    for statement in SEARCH_INDEX_DDL:
+        db.session.execute(text(statement))
+    if not exists:
+        db.session.execute(text("INSERT INTO vacancy_fts(vacancy_fts) VALUES ('rebuild')"))
+    db.session.commit()
+
+
+def match_expression(query: str):
+    """Turn free text into an FTS5 query: every word must match, the last one as a prefix.
+
+    Words are quoted so that FTS5 operators and punctuation typed by users can't
+    produce syntax errors. Returns None when there is nothing to search for.
+    """
+    words = re.findall(r'\w+', query)
+    if not words:
+        return None
+    terms = [f'"{word}"' for word in words]
+    terms[-1] += '*'
+    return ' '.join(terms)
+
+
+def matching_ids(query: str):
+    """Subquery of the ids of vacancies matching `query`, to filter other queries with"""
+    return select(text('rowid')).select_from(text('vacancy_fts')).where(
+        text('vacancy_fts MATCH :match').bindparams(match=match_expression(query))
+    )
+
+
+def highlight(snippet: str) -> Markup:
+    return Markup(
+        str(escape(snippet)).replace(_HIGHLIGHT_START, '<mark>').replace(_HIGHLIGHT_END, '</mark>')
+    )
+
+
+def search_vacancies(query: str, limit: int = 10, offset: int = 0):
+    """Return [(vacancy, snippet)] best-first by BM25 rank, snippets with <mark>ed matches"""
+    match = match_expression(query)
+    if match is None:
+        return []
+    rows = db.session.execute(
+        text(RANKED_SEARCH_SQL),
+        {'match': match, 'start': _HIGHLIGHT_START, 'end': _HIGHLIGHT_END, 'limit': limit, 'offset': offset},
+    ).all()
+    if not rows:
+        return []
+
+    vacancies = {
+        vacancy.id: vacancy
+        for vacancy in Vacancy.query.filter(Vacancy.id.in_([row[0] for row in rows]))
+    }
+    return [(vacancies[vacancy_id], highlight(snippet)) for vacancy_id, snippet in rows if vacancy_id in vacancies]
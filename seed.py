@@ -1,39 +1,121 @@
 import random
+from datetime import datetime, timedelta
+from typing import Callable, Optional, Sequence
 
-from app import db
+from sqlalchemy import func, select
+
+import counters
+from db import db
 from mock_data import job_data, usernames
-from models import User, Vacancy
+from models import User, Vacancy, category_registry
+from normalize import normalize_location, parse_salary
+from passwords import password_hasher
 
+SEED_PASSWORD = '11111111'
+CHUNK_SIZE = 5000
+# Generated vacancies are spread over this many days before the reference time,
+# a fixed one by default so that a seed always gives the same timestamps
+SPREAD_DAYS = 365
+REFERENCE_TIME = datetime(2026, 1, 1)
+USERNAME_LENGTH = User.__table__.c.username.type.length
+
+
+def username_for(number: int) -> str:
+    """Username of the `number`th generated user, which is also its id"""
+    suffix = f'_{number}'
+    return usernames[(number - 1) % len(usernames)][:USERNAME_LENGTH - len(suffix)] + suffix
+
+
+def vacancy_templates() -> list:
+    """Rows for the vacancy table built from mock_data.job_data, salary and location parsed once per job"""
+    templates = []
+    for title, short_description, full_description, category, company, salary, location, date_created in job_data:
+        salary_min, salary_max, currency = parse_salary(salary)
+        templates.append({
+            'title': title, 'short_description': short_description, 'full_description': full_description,
+            'category_id': category_registry.id_for(category), 'company': company, 'salary': salary,
+            'location': location, 'salary_min': salary_min, 'salary_max': salary_max, 'currency': currency,
+            'location_key': normalize_location(location), 'date_created': date_created,
+            'last_modified': date_created,
+        })
+    return templates
+
+
+def generate_users(count: int, password_hash: str, start: int = 1):
+    for number in range(start, start + count):
+        username = username_for(number)
+        yield {'id': number, 'username': username, 'email': f'{username}@example.com',
+               'image_filename': 'default.png', 'password_hash': password_hash}
+
+
+def generate_vacancies(count: int, author_ids: Sequence[int], rng: random.Random, start: int = 1,
+                       now: datetime = REFERENCE_TIME):
+    templates = vacancy_templates()
+    for number in range(start, start + count):
+        created = now - timedelta(seconds=rng.randrange(SPREAD_DAYS * 24 * 3600))
+        yield {**rng.choice(templates), 'id': number, 'author_id': rng.choice(author_ids),
+               'date_created': created, 'last_modified': created}
 
-def populate_database():
-    users = []
-    # Adding Users
-    for username in usernames:
-        user = User(
-            username=username,
-            email=f'{username}@gmail.com',
-            image_filename='default.png'
-        )
-        user.password = '11111111'
-        users.append(user)
-        db.session.add(user)
-    db.session.commit()
-
-    # Adding Vacancies
-    for _ in range(20):
-        author = random.choice(users)
-        job = random.choice(job_data)
-        vacancy = Vacancy(
-            title=job[0],
-            category=job[3],
-            author_id=author.id,
-            short_description=job[1],
-            full_description=job[2],
-            company=job[4],
-            salary=job[5],
-            location=job[6],
-            date_created=job[7]
-        )
-        db.session.add(vacancy)
-    db.session.commit()
 
+def insert_rows(table, rows, chunk_size: int = CHUNK_SIZE,
+                progress: Optional[Callable[[int], None]] = None) -> int:
+    """Insert `rows` (dicts) into `table` with one executemany per chunk, committing each chunk"""
+    chunk, done = [], 0
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) == chunk_size:
+            db.session.execute(table.insert(), chunk)
+            db.session.commit()
+            done += len(chunk)
+            chunk = []
+            if progress:
+                progress(done)
+    if chunk:
+        db.session.execute(table.insert(), chunk)
+        db.session.commit()
+        done += len(chunk)
+        if progress:
+            progress(done)
+    return done
+
+
+def next_id(model) -> int:
+    return (db.session.scalar(select(func.max(model.id))) or 0) + 1
+
+
+def seed_database(users: int = 0, vacancies: int = 0, seed: Optional[int] = None, password: str = SEED_PASSWORD,
+                  chunk_size: int = CHUNK_SIZE, progress: Optional[Callable[[str, int, int], None]] = None,
+                  now: datetime = REFERENCE_TIME):
+    """Add `users` generated users and `vacancies` generated vacancies to the database.
+
+    Rows are bulk-inserted in chunks, so the mapper events maintaining the
+    category counters do not run; the counters are rebuilt at the end (the
+    full-text index is kept up to date by its triggers). Every generated user
+    gets `password`, hashed once. Vacancies are dated over the year before
+    `now`, so the same `seed` and `now` give the same rows (password salt aside).
+    """
+    rng = random.Random(seed)
+    report = (lambda label, total: lambda done: progress(label, done, total)) if progress else lambda *_: None
+
+    first_user = next_id(User)
+    insert_rows(User.__table__, generate_users(users, password_hasher.hash(password), start=first_user),
+                chunk_size=chunk_size, progress=report('users', users))
+    if vacancies:
+        author_ids = db.session.scalars(select(User.id).order_by(User.id)).all()
+        if not author_ids:
+            raise ValueError('Vacancies need authors, seed some users first')
+        insert_rows(Vacancy.__table__, generate_vacancies(vacancies, author_ids, rng=rng, start=next_id(Vacancy), now=now),
+                    chunk_size=chunk_size, progress=report('vacancies', vacancies))
+        counters.rebuild_category_counts()
+
+
+def populate_database():
+    """Sample data for an empty database: the mock_data users and 20 of their vacancies"""
+    password_hash = password_hasher.hash(SEED_PASSWORD)
+    insert_rows(User.__table__, ({'id': number, 'username': username, 'email': f'{username}@gmail.com',
+                                 'image_filename': 'default.png', 'password_hash': password_hash}
+                                for number, username in enumerate(usernames, start=1)))
+    templates = vacancy_templates()
+    insert_rows(Vacancy.__table__, ({**random.choice(templates), 'author_id': random.randint(1, len(usernames))}
+                                    for _ in range(20)))
+    counters.rebuild_category_counts()
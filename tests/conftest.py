@@ -0,0 +1,34 @@
+import os
+import shutil
+import tempfile
+
+# The app builds its engine when imported, from DATABASE_URL: point it at a
+# throwaway database first, so the tests never touch instance/vacancies.db
+TEST_DATA_DIR = tempfile.mkdtemp(prefix='jobboard-tests-')
+os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(TEST_DATA_DIR, 'test.db')}"
+
+import pytest  # noqa: E402
+
+from app import listing_cache, user_cache  # noqa: E402
+from rate_limit import MemoryStore, login_limiter  # noqa: E402
+
+
+@pytest.fixture(autouse=True)
+def clear_caches():
+    """Every test starts with empty caches, as fixtures write to the DB directly and reuse user ids"""
+    listing_cache.invalidate()
+    user_cache.invalidate()
+    yield
+    listing_cache.invalidate()
+    user_cache.invalidate()
+
+
+@pytest.fixture(autouse=True)
+def clear_login_failures(monkeypatch):
+    """Failed logins of one test must not lock out the next, they all come from the same address"""
+    monkeypatch.setattr(login_limiter, 'store', MemoryStore())
+
+
+
+def pytest_unconfigure(config):
+    shutil.rmtree(TEST_DATA_DIR, ignore_errors=True)
@@ -0,0 +1,25 @@
+from contextlib import contextmanager
+
+from sqlalchemy import event
+
+from db import db
+
+
+@contextmanager
+def count_queries(engine=None, containing: str = None):
+    """Collect every SQL statement sent to the database inside the block, or those containing `containing`
+
+    `engine` defaults to the app's, which needs an app context.
+    """
+    engine = engine if engine is not None else db.engine
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if containing is None or containing in statement:
+            statements.append(statement)
+
+    event.listen(engine, 'before_cursor_execute', before_cursor_execute)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, 'before_cursor_execute', before_cursor_execute)
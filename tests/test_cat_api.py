@@ -0,0 +1,272 @@
+import asyncio
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from cat_api import CatClient, CircuitBreaker
+from cat_api_async import AsyncCatClient
+
+
+class StandInCatAPI(BaseHTTPRequestHandler):
+    """Local stand-in for thecatapi.com's /v1/images/search"""
+    protocol_version = 'HTTP/1.1'  # keep-alive, so connection reuse is visible
+    delay = 0
+    fail = False
+    # Served instead of images when set, like an error body with a 200 status
+    payload = None
+    requests = []
+    served = 0
+
+    def do_GET(self):
+        cls = type(self)
+        cls.requests.append({'path': self.path, 'port': self.client_address[1]})
+        time.sleep(cls.delay)
+        if cls.fail:
+            self.send_response(503)
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+        limit = int(self.path.split('limit=')[1]) if 'limit=' in self.path else 1
+        images = [{'id': str(number), 'url': f'http://cats.test/{number}.jpg'}
+                  for number in range(cls.served, cls.served + limit)]
+        cls.served += limit
+        body = json.dumps(images if cls.payload is None else cls.payload).encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def cat_server():
+    """Start the stand-in API on a free local port"""
+    handler = type('Handler', (StandInCatAPI,), {'requests': [], 'served': 0})
+    server = ThreadingHTTPServer(('127.0.0.1', 0), handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield handler, f'http://127.0.0.1:{server.server_address[1]}/v1/images/search'
+    server.shutdown()
+    server.server_close()
+
+
+def wait_until(condition, timeout: float = 2):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            return False
+        time.sleep(0.01)
+    return True
+
+
+def test_prefetches_in_batches(cat_server):
+    """Test that the buffer is filled with batched calls using the limit parameter"""
+    handler, url = cat_server
+    client = CatClient(url=url, buffer_size=20, batch_size=10)
+    client.get_random_cat()
+
+    assert wait_until(lambda: len(client._buffer) >= 19)
+    assert all('limit=10' in request['path'] for request in handler.requests)
+    assert len(handler.requests) <= 3
+
+
+def test_serves_from_buffer_without_upstream_calls(cat_server):
+    """Test that buffered URLs are served quickly and without calling the API"""
+    handler, url = cat_server
+    client = CatClient(url=url, buffer_size=20, batch_size=10, refill_below=0)
+    client.refill()
+    calls = len(handler.requests)
+
+    start = time.perf_counter()
+    urls = [client.get_random_cat() for _ in range(10)]
+    elapsed = time.perf_counter() - start
+
+    assert len(set(urls)) == 10
+    assert len(handler.requests) == calls
+    assert elapsed < 0.05
+
+
+def test_reuses_pooled_connection(cat_server):
+    """Test that consecutive fetches go over one keep-alive connection"""
+    handler, url = cat_server
+    client = CatClient(url=url)
+    for _ in range(3):
+        assert client.fetch_batch()
+    assert len({request['port'] for request in handler.requests}) == 1
+
+
+def test_slow_upstream_falls_back_to_last_known_good(cat_server):
+    """Test that an empty buffer and a slow API serve the last URL within the budget"""
+    handler, url = cat_server
+    client = CatClient(url=url, buffer_size=1, batch_size=1, refill_below=0, budget=0.1)
+    client.refill()
+    first = client.get_random_cat()
+
+    handler.delay = 1
+    start = time.perf_counter()
+    assert client.get_random_cat() == first
+    assert time.perf_counter() - start < 0.5
+    assert client.stats['fallbacks'] == 1
+
+
+def test_failing_upstream_without_cache(cat_server):
+    """Test that nothing is served when the API fails before any cat was fetched"""
+    handler, url = cat_server
+    handler.fail = True
+    client = CatClient(url=url, budget=0.2)
+    assert client.get_random_cat() is None
+    assert wait_until(lambda: client.stats['errors'] >= 1)
+
+
+def test_breaker_opens_after_failures(cat_server):
+    """Test that repeated failures open the circuit and stop upstream calls"""
+    handler, url = cat_server
+    handler.fail = True
+    client = CatClient(url=url, breaker=CircuitBreaker(failure_threshold=3, reset_timeout=60))
+    for _ in range(5):
+        client.fetch_batch()
+
+    assert len(handler.requests) == 3
+    assert client.metrics()['breaker']['state'] == 'open'
+    assert client.metrics()['breaker']['rejected'] == 2
+
+
+@pytest.mark.parametrize('payload', [{'message': 'Rate limited'}, ['not an image'], 'Service unavailable'])
+def test_malformed_payload_is_an_upstream_failure(cat_server, payload):
+    """Test that a 200 response that is not a list of images counts as a failed call"""
+    handler, url = cat_server
+    handler.payload = payload
+    client = CatClient(url=url)
+
+    assert client.fetch_batch() == []
+    assert client.stats['errors'] == 1
+    assert client.breaker.failures == 1
+
+
+def test_prefetch_thread_survives_errors(cat_server):
+    """Test that the prefetch thread keeps running after a malformed response and an unexpected error"""
+    handler, url = cat_server
+    handler.payload = {'message': 'Rate limited'}
+    client = CatClient(url=url, buffer_size=5, batch_size=5)
+    assert client.get_random_cat() is None
+    assert wait_until(lambda: client.stats['errors'] >= 1)
+
+    refill = client.refill
+    client.refill = lambda: 1 / 0
+    client._refill.set()
+    time.sleep(0.05)
+    client.refill = refill
+    handler.payload = None
+    client._refill.set()
+
+    assert wait_until(lambda: len(client._buffer) == 5)
+    assert client._worker.is_alive()
+
+
+def test_breaker_half_open_probe(cat_server):
+    """Test that after the reset timeout one probe closes the circuit again"""
+    handler, url = cat_server
+    handler.fail = True
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0.05)
+    client = CatClient(url=url, breaker=breaker)
+    client.fetch_batch()
+    assert breaker.state == 'open'
+
+    time.sleep(0.06)
+    assert breaker.allow_request()
+    assert breaker.state == 'half_open'
+    assert not breaker.allow_request()  # only one probe at a time
+    breaker.record_failure()
+    assert breaker.state == 'open'
+
+    handler.fail = False
+    time.sleep(0.06)
+    assert client.fetch_batch()
+    assert breaker.state == 'closed'
+
+
+def test_latency_budget_and_metrics(cat_server):
+    """Test that a request returns within its budget and upstream latency is recorded"""
+    handler, url = cat_server
+    handler.delay = 0.5
+    client = CatClient(url=url, budget=0.05)
+
+    start = time.perf_counter()
+    assert client.get_random_cat() is None
+    assert time.perf_counter() - start < 0.3
+    assert wait_until(lambda: client.metrics()['upstream_latency_ms']['count'] >= 1)
+    assert client.metrics()['upstream_latency_ms']['p50'] >= 500
+
+
+def test_async_client_fetches_and_buffers(cat_server):
+    """Test that an async miss fetches a batch, serving one and buffering the rest"""
+    handler, url = cat_server
+    client = CatClient(url=url, batch_size=5, refill_below=0, budget=1)
+    client._ensure_worker = lambda: None  # no prefetch thread, only the async path calls upstream
+    async_client = AsyncCatClient(client=client)
+
+    assert asyncio.run(async_client.get_random_cat()) == 'http://cats.test/0.jpg'
+    assert len(client._buffer) == 4
+    assert asyncio.run(async_client.get_random_cat()) == 'http://cats.test/1.jpg'
+    assert len(handler.requests) == 1
+
+
+def test_async_client_limits_concurrency(cat_server):
+    """Test that calls beyond the concurrency limit fall back instead of queueing"""
+    handler, url = cat_server
+    handler.delay = 0.3
+    client = CatClient(url=url, batch_size=1, refill_below=0, budget=1)
+    client._ensure_worker = lambda: None
+    async_client = AsyncCatClient(client=client, max_concurrency=2)
+
+    async def burst():
+        return await asyncio.gather(*(async_client.get_random_cat() for _ in range(5)))
+
+    urls = asyncio.run(burst())
+    assert sum(url is not None for url in urls) == 2
+    assert async_client.rejected == 3
+    assert len(handler.requests) == 2
+
+
+def test_async_client_latency_budget(cat_server):
+    """Test that a slow upstream call is abandoned once the budget is spent"""
+    handler, url = cat_server
+    handler.delay = 0.5
+    client = CatClient(url=url, refill_below=0, budget=0.05)
+    client._ensure_worker = lambda: None
+    async_client = AsyncCatClient(client=client)
+
+    start = time.perf_counter()
+    assert asyncio.run(async_client.get_random_cat()) is None
+    assert time.perf_counter() - start < 0.3
+    assert client.stats['fallbacks'] == 1
+    assert client.breaker.failures == 1
+
+
+def test_async_client_malformed_payload(cat_server):
+    """Test that a malformed response falls back and fails a half-open probe, reopening the breaker"""
+    handler, url = cat_server
+    handler.payload = {'message': 'Rate limited'}
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0.05)
+    client = CatClient(url=url, refill_below=0, budget=1, breaker=breaker)
+    client._ensure_worker = lambda: None
+    client.last_url = 'http://cats.test/last.jpg'
+    async_client = AsyncCatClient(client=client)
+
+    assert asyncio.run(async_client.get_random_cat()) == 'http://cats.test/last.jpg'
+    assert breaker.state == 'open'
+
+    time.sleep(0.06)
+    assert asyncio.run(async_client.get_random_cat()) == 'http://cats.test/last.jpg'
+    assert breaker.state == 'open'
+
+    handler.payload = None
+    time.sleep(0.06)
+    assert asyncio.run(async_client.get_random_cat()) != 'http://cats.test/last.jpg'
+    assert breaker.state == 'closed'
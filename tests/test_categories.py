@@ -0,0 +1,100 @@
+import pytest
+from sqlalchemy import text
+
+from app import app, db
+from forms import VacancyForm
+from migrations import migrate_category_column
+from models import DEFAULT_CATEGORIES, Category, User, Vacancy, category_registry
+from tests.helpers import count_queries
+
+
+@pytest.fixture
+def client():
+    """Create a test client with a temporary database and one vacancy"""
+    app.config['TESTING'] = True
+    app.config['WTF_CSRF_ENABLED'] = False
+
+    with app.test_client() as client:
+        with app.app_context():
+            db.create_all()
+            user = User(username='categories', email='categories@test.com', password_hash='x')
+            db.session.add(user)
+            db.session.commit()
+            db.session.add(Vacancy(
+                title='Designer',
+                category='design',
+                author_id=user.id,
+                short_description='Short desc',
+                full_description='Full desc',
+                company='Test Co',
+                salary='$50,000',
+                location='Remote'
+            ))
+            db.session.commit()
+            yield client
+            # Forget categories added by a test before other tests use the registry
+            db.session.rollback()
+            db.session.execute(Category.__table__.delete().where(Category.id > len(DEFAULT_CATEGORIES)))
+            db.session.commit()
+            category_registry.reload()
+            db.drop_all()
+
+
+def test_default_categories_created(client):
+    """Test that the category table starts with the default categories"""
+    slugs = [category.slug for category in Category.query.order_by(Category.id)]
+    assert slugs == ['it', 'design', 'marketing', 'sales', 'other']
+
+
+def test_vacancy_category_maps_to_id(client):
+    """Test that a vacancy stores the category id and reads back the slug"""
+    vacancy = Vacancy.query.filter_by(title='Designer').one()
+    assert vacancy.category_id == category_registry.id_for('design')
+    assert vacancy.category == 'design'
+    assert Vacancy.query.filter_by(category='design').count() == 1
+    assert Vacancy.query.filter(Vacancy.category == 'it').count() == 0
+
+
+def test_registry_lookups_do_not_query(client):
+    """Test that resolved categories come from memory, not the database"""
+    category_registry.reload()
+    with count_queries() as statements:
+        assert category_registry.slug_for(category_registry.id_for('sales')) == 'sales'
+        assert category_registry.id_for('unknown') is None
+        assert ('it', 'IT') in category_registry.choices()
+
+    assert statements == []
+
+
+def test_form_choices_follow_category_table(client):
+    """Test that a new category shows up in the form after a reload"""
+    db.session.add(Category(slug='finance', name='Finance'))
+    db.session.commit()
+    category_registry.reload()
+
+    with app.test_request_context():
+        form = VacancyForm()
+    assert ('finance', 'Finance') in form.category.choices
+
+
+def test_listing_renders_category_buttons(client):
+    """Test that the listing shows a button per category"""
+    response = client.get('/')
+    assert response.status_code == 200
+    for category in category_registry.all():
+        assert f'category={category.slug}'.encode() in response.data
+
+
+def test_migrate_category_column(client):
+    """Test that an old text category column is moved to category_id and dropped"""
+    db.session.execute(text('ALTER TABLE vacancy ADD COLUMN category VARCHAR(100)'))
+    db.session.execute(text("UPDATE vacancy SET category = 'legal', category_id = 0"))
+    db.session.commit()
+
+    migrate_category_column()
+
+    columns = [row[1] for row in db.session.execute(text('PRAGMA table_info(vacancy)'))]
+    assert 'category' not in columns
+    vacancy = Vacancy.query.filter_by(title='Designer').one()
+    assert vacancy.category == 'legal'
+    assert Category.query.filter_by(slug='legal').one().name == 'Legal'
@@ -0,0 +1,142 @@
+import pytest
+from sqlalchemy import func, select
+
+from app import app, db
+from counters import category_total, rebuild_category_counts
+from models import User, Vacancy
+from tests.helpers import count_queries
+
+
+@pytest.fixture
+def client():
+    """Create a test client with a logged-in user and two vacancies"""
+    app.config['TESTING'] = True
+    app.config['WTF_CSRF_ENABLED'] = False
+
+    with app.test_client() as client:
+        with app.app_context():
+            db.create_all()
+            rebuild_category_counts()
+            user = User(username='counter', email='counter@test.com')
+            user.password = 'password123'
+            db.session.add(user)
+            db.session.commit()
+            for category in ('it', 'design'):
+                db.session.add(Vacancy(
+                    title=f'{category} vacancy',
+                    category=category,
+                    author_id=user.id,
+                    short_description='Short desc',
+                    full_description='Full desc',
+                    company='Test Co',
+                    salary='$50,000',
+                    location='Remote'
+                ))
+            db.session.commit()
+
+            client.post('/login', data={'username': 'counter', 'password': 'password123'})
+            yield client
+            db.drop_all()
+
+
+def assert_counts_match():
+    """Compare every cached counter with a real COUNT(*) of the vacancy table"""
+    assert category_total('all') == db.session.scalar(select(func.count()).select_from(Vacancy))
+    for category in ('it', 'design', 'marketing', 'sales', 'other'):
+        real = db.session.scalar(select(func.count()).where(Vacancy.category == category))
+        assert category_total(category) == real, category
+
+
+vacancy_data = {
+    'title': 'Posted vacancy',
+    'category': 'sales',
+    'short_description': 'Short desc',
+    'full_description': 'Full desc',
+    'company': 'Test Co',
+    'salary': '$50,000',
+    'location': 'Remote'
+}
+
+
+def test_counts_follow_add_vacancy(client):
+    """Test that posting a vacancy increments its category and the total"""
+    sales, total = category_total('sales'), category_total('all')
+    client.post('/add_vacancy', data=vacancy_data)
+    assert category_total('sales') == sales + 1
+    assert category_total('all') == total + 1
+    assert_counts_match()
+
+
+def test_counts_follow_category_change(client):
+    """Test that moving a vacancy to another category moves its count"""
+    it, marketing, total = category_total('it'), category_total('marketing'), category_total('all')
+    vacancy = Vacancy.query.filter_by(title='it vacancy').one()
+    client.post(f'/edit_vacancy/{vacancy.id}', data={**vacancy_data, 'category': 'marketing'})
+    assert category_total('it') == it - 1
+    assert category_total('marketing') == marketing + 1
+    assert category_total('all') == total
+    assert_counts_match()
+
+
+def test_counts_follow_delete_vacancy(client):
+    """Test that deleting a vacancy decrements its category and the total"""
+    design, total = category_total('design'), category_total('all')
+    vacancy = Vacancy.query.filter_by(title='design vacancy').one()
+    client.post(f'/delete_vacancy/{vacancy.id}')
+    assert category_total('design') == design - 1
+    assert category_total('all') == total - 1
+    assert_counts_match()
+
+
+def test_counts_follow_delete_profile(client):
+    """Test that deleting a profile removes all of its vacancies from the counts"""
+    total = category_total('all')
+    client.post('/delete_profile')
+    assert category_total('all') == total - 2
+    assert_counts_match()
+
+
+def test_delete_profile_is_set_based(client):
+    """Test that a prolific author's vacancies go in one DELETE, leaving other authors' counted"""
+    author = User.query.filter_by(username='counter').one()
+    other = User(username='other', email='other@test.com', password_hash='x')
+    db.session.add(other)
+    db.session.commit()
+    for number in range(60):
+        db.session.add(Vacancy(
+            title=f'Bulk vacancy {number}',
+            category=('it', 'design', 'marketing', 'sales', 'other')[number % 5],
+            author_id=author.id if number % 6 else other.id,
+            short_description='Short desc',
+            full_description='Full desc',
+            company='Test Co',
+            salary='$50,000',
+            location='Remote'
+        ))
+    db.session.commit()
+    others = Vacancy.query.filter_by(author_id=other.id).count()
+
+    with count_queries() as statements:
+        client.post('/delete_profile')
+
+    assert len([statement for statement in statements if statement.startswith('DELETE FROM vacancy')]) == 1
+    assert category_total('all') == others
+    assert Vacancy.query.filter_by(author_id=author.id).count() == 0
+    assert_counts_match()
+
+
+def test_rebuild_category_counts(client):
+    """Test that a rebuild recounts from the vacancy table"""
+    db.session.execute(Vacancy.__table__.delete().where(Vacancy.category == 'it'))
+    db.session.commit()
+    rebuild_category_counts()
+    assert_counts_match()
+
+
+def test_listing_does_not_count_rows(client):
+    """Test that the listing takes its total from the counters, not COUNT(*)"""
+    with count_queries() as statements:
+        response = client.get('/?category=it')
+
+    assert response.status_code == 200
+    assert not any('count(' in statement.lower() for statement in statements), statements
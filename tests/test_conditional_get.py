@@ -0,0 +1,147 @@
+import pytest
+from flask import template_rendered
+from sqlalchemy import inspect, text
+
+from app import app, db
+from migrations import upgrade_database
+from models import User, Vacancy
+
+
+@pytest.fixture
+def client():
+    """Create a test client with a temporary database"""
+    app.config['TESTING'] = True
+    app.config['WTF_CSRF_ENABLED'] = False
+
+    with app.test_client() as client:
+        with app.app_context():
+            db.create_all()
+            for username in ('author', 'reader'):
+                user = User(username=username, email=f'{username}@test.com')
+                user.password = 'password123'
+                db.session.add(user)
+            db.session.commit()
+            db.session.add(Vacancy(
+                title='Cached Vacancy',
+                category='it',
+                author_id=User.query.filter_by(username='author').one().id,
+                short_description='Short desc',
+                full_description='Full desc',
+                company='Test Co',
+                salary='$50,000',
+                location='Remote'
+            ))
+            db.session.commit()
+            yield client
+            db.drop_all()
+
+
+def vacancy_url():
+    return f"/vacancy/{Vacancy.query.filter_by(title='Cached Vacancy').one().id}"
+
+
+vacancy_data = {
+    'title': 'Edited Vacancy',
+    'category': 'it',
+    'short_description': 'Short desc',
+    'full_description': 'Full desc',
+    'company': 'Test Co',
+    'salary': '$50,000',
+    'location': 'Remote'
+}
+
+
+@pytest.mark.parametrize('url', ['/', '/?category=it', '/user/author'])
+def test_matching_etag_returns_304(client, url):
+    """Test that revalidating an unchanged page answers 304 with no body"""
+    response = client.get(url)
+    assert response.status_code == 200
+    etag = response.headers['ETag']
+
+    response = client.get(url, headers={'If-None-Match': etag})
+    assert response.status_code == 304
+    assert response.data == b''
+    assert response.headers['ETag'] == etag
+
+
+def test_vacancy_detail_304_skips_rendering(client):
+    """Test that an unchanged vacancy is revalidated without rendering the template"""
+    url = vacancy_url()
+    etag = client.get(url).headers['ETag']
+
+    rendered = []
+
+    def record(sender, template, context, **extra):
+        rendered.append(template.name)
+
+    with template_rendered.connected_to(record, app):
+        response = client.get(url, headers={'If-None-Match': etag})
+
+    assert response.status_code == 304
+    assert rendered == []
+
+
+def test_if_modified_since_returns_304(client):
+    """Test that a Last-Modified date can be used to revalidate"""
+    url = vacancy_url()
+    last_modified = client.get(url).headers['Last-Modified']
+
+    response = client.get(url, headers={'If-Modified-Since': last_modified})
+    assert response.status_code == 304
+
+
+def test_edit_changes_validators(client):
+    """Test that editing a vacancy invalidates the detail and listing validators"""
+    url = vacancy_url()
+    detail_etag = client.get(url).headers['ETag']
+    listing_etag = client.get('/').headers['ETag']
+
+    client.post('/login', data={'username': 'author', 'password': 'password123'})
+    client.post(url.replace('/vacancy/', '/edit_vacancy/'), data=vacancy_data)
+    client.get('/logout')
+    # Consume the flash message left by logging out
+    client.get('/about')
+
+    response = client.get(url, headers={'If-None-Match': detail_etag})
+    assert response.status_code == 200
+    assert b'Edited Vacancy' in response.data
+    assert client.get('/', headers={'If-None-Match': listing_etag}).status_code == 200
+
+
+def test_etag_differs_per_viewer(client):
+    """Test that an anonymous copy is not reused for a logged-in reader"""
+    etag = client.get('/').headers['ETag']
+    client.post('/login', data={'username': 'reader', 'password': 'password123'})
+    client.get('/about')
+
+    response = client.get('/', headers={'If-None-Match': etag})
+    assert response.status_code == 200
+
+
+@pytest.mark.parametrize('url', ['vacancy', '/user/author', '/'])
+def test_rename_changes_etag(client, url):
+    """Test that pages revalidated after the viewer renamed themselves show the new name"""
+    url = vacancy_url() if url == 'vacancy' else url
+    client.post('/login', data={'username': 'reader', 'password': 'password123'})
+    client.get('/about')
+    etag = client.get(url).headers['ETag']
+
+    client.post('/edit_profile', data={'username': 'renamed', 'email': 'reader@test.com'})
+    client.get('/about')
+
+    response = client.get(url, headers={'If-None-Match': etag})
+    assert response.status_code == 200
+    assert b'renamed' in response.data
+
+
+def test_upgrade_adds_last_modified_column(client):
+    """Test that databases without last_modified get the column, filled from date_created"""
+    db.session.execute(text('DROP INDEX ix_vacancy_author_id_last_modified'))
+    db.session.execute(text('ALTER TABLE vacancy DROP COLUMN last_modified'))
+    db.session.commit()
+
+    upgrade_database()
+
+    columns = {column['name'] for column in inspect(db.engine).get_columns('vacancy')}
+    assert 'last_modified' in columns
+    assert db.session.execute(text('SELECT COUNT(*) FROM vacancy WHERE last_modified IS NULL')).scalar() == 0
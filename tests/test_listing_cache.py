@@ -0,0 +1,118 @@
+import time
+
+import pytest
+
+from app import app, db, listing_cache
+from cache import LRUCache
+from models import User, Vacancy
+
+
+@pytest.fixture
+def client():
+    """Create a test client with a temporary database"""
+    app.config['TESTING'] = True
+    app.config['WTF_CSRF_ENABLED'] = False
+
+    with app.test_client() as client:
+        with app.app_context():
+            db.create_all()
+            user = User(username='cacher', email='cacher@test.com')
+            user.password = 'password123'
+            db.session.add(user)
+            db.session.commit()
+            db.session.add(Vacancy(
+                title='Cached Vacancy',
+                category='it',
+                author_id=user.id,
+                short_description='Short desc',
+                full_description='Full desc',
+                company='Test Co',
+                salary='$50,000',
+                location='Remote'
+            ))
+            db.session.commit()
+            yield client
+            db.drop_all()
+
+
+vacancy_data = {
+    'title': 'Fresh Vacancy',
+    'category': 'it',
+    'short_description': 'Short desc',
+    'full_description': 'Full desc',
+    'company': 'Test Co',
+    'salary': '$50,000',
+    'location': 'Remote'
+}
+
+
+def test_lru_cache_evicts_least_recently_used():
+    """Test that the cache never grows past maxsize"""
+    cache = LRUCache(maxsize=2, ttl=60)
+    cache.set('a', 1)
+    cache.set('b', 2)
+    cache.get('a')
+    cache.set('c', 3)
+    assert cache.get('b') is None
+    assert cache.get('a') == 1
+    assert cache.get('c') == 3
+
+
+def test_lru_cache_expires_entries():
+    """Test that entries older than the TTL are misses"""
+    cache = LRUCache(maxsize=2, ttl=0.01)
+    cache.set('a', 1)
+    time.sleep(0.02)
+    assert cache.get('a') is None
+    assert cache.stats()['size'] == 0
+
+
+def test_anonymous_listing_is_served_from_cache(client):
+    """Test that a repeated anonymous request is a cache hit"""
+    client.get('/?category=it')
+    hits = listing_cache.hits
+    response = client.get('/?category=it')
+    assert response.status_code == 200
+    assert b'Cached Vacancy' in response.data
+    assert listing_cache.hits == hits + 1
+
+
+def test_authenticated_listing_bypasses_cache(client):
+    """Test that logged-in users always get a freshly rendered grid"""
+    client.post('/login', data={'username': 'cacher', 'password': 'password123'})
+    client.get('/')
+    client.get('/')
+    assert listing_cache.stats()['size'] == 0
+
+
+def test_add_vacancy_invalidates_cache(client):
+    """Test that a newly posted vacancy shows up on a previously cached page"""
+    client.get('/')
+    client.post('/login', data={'username': 'cacher', 'password': 'password123'})
+    client.post('/add_vacancy', data=vacancy_data)
+    client.get('/logout')
+
+    response = client.get('/')
+    assert b'Fresh Vacancy' in response.data
+
+
+def test_delete_vacancy_invalidates_cache(client):
+    """Test that a deleted vacancy disappears from a previously cached page"""
+    client.get('/')
+    client.post('/login', data={'username': 'cacher', 'password': 'password123'})
+    vacancy = Vacancy.query.filter_by(title='Cached Vacancy').one()
+    client.post(f'/delete_vacancy/{vacancy.id}')
+    client.get('/logout')
+
+    response = client.get('/')
+    assert b'Cached Vacancy' not in response.data
+
+
+def test_cache_stats_endpoint(client):
+    """Test that cache counters are exposed as JSON"""
+    client.get('/')
+    client.get('/')
+    stats = client.get('/cache_stats').get_json()['listing']
+    assert stats['hits'] >= 1
+    assert stats['misses'] >= 1
+    assert 0 < stats['hit_ratio'] <= 1
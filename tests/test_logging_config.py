@@ -0,0 +1,69 @@
+import logging
+import queue
+import threading
+from logging.handlers import QueueHandler
+
+import app  # noqa: F401 -- configures logging
+from logging_config import BatchedRotatingFileHandler, BatchingQueueListener
+
+
+class ThreadRecorder(logging.Handler):
+    """Remembers which thread handled each record"""
+
+    def __init__(self):
+        super().__init__()
+        self.threads = []
+
+    def emit(self, record):
+        self.threads.append(threading.current_thread().name)
+
+
+def test_app_logs_through_queue():
+    """Test that app loggers have no handlers of their own and the root logger enqueues"""
+    assert any(isinstance(handler, QueueHandler) for handler in logging.getLogger().handlers)
+    assert not logging.getLogger('JobBoard').handlers
+    assert not logging.getLogger('CatAPI').handlers
+
+
+def test_records_written_on_listener_thread():
+    """Test that records are written by the listener, not the logging thread"""
+    records = queue.SimpleQueue()
+    recorder = ThreadRecorder()
+    listener = BatchingQueueListener(records, recorder)
+    listener.start()
+    logger = logging.getLogger('test_logging_config.thread')
+    logger.addHandler(QueueHandler(records))
+    logger.propagate = False
+    try:
+        logger.warning('queued')
+    finally:
+        listener.stop()
+    assert recorder.threads and threading.current_thread().name not in recorder.threads
+
+
+def test_batched_file_handler_flushes_when_drained(tmp_path):
+    """Test that the file is only flushed once the queue is empty"""
+    path = tmp_path / 'batched.log'
+    handler = BatchedRotatingFileHandler(filename=path, maxBytes=1024 * 1024, backupCount=1)
+    records = queue.SimpleQueue()
+    listener = BatchingQueueListener(records, handler)
+
+    for number in range(3):
+        records.put(logging.makeLogRecord({'msg': f'line {number}', 'levelno': logging.INFO}))
+    listener.handle(records.get())
+    assert path.read_text() == ''  # more records waiting, nothing flushed yet
+    listener.handle(records.get())
+    listener.handle(records.get())
+    assert path.read_text().splitlines() == ['line 0', 'line 1', 'line 2']
+    handler.close()
+
+
+def test_file_handler_rotates(tmp_path):
+    """Test that the batched handler still rotates at maxBytes"""
+    path = tmp_path / 'rotating.log'
+    handler = BatchedRotatingFileHandler(filename=path, maxBytes=100, backupCount=2)
+    listener = BatchingQueueListener(queue.SimpleQueue(), handler)
+    for number in range(10):
+        listener.handle(logging.makeLogRecord({'msg': f'{number:020}', 'levelno': logging.INFO}))
+    handler.close()
+    assert (tmp_path / 'rotating.log.1').exists()
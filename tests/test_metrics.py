@@ -0,0 +1,79 @@
+import os
+import subprocess
+import sys
+import textwrap
+
+import pytest
+
+from app import app, db
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+@pytest.fixture
+def client():
+    """Create a test client with a temporary database"""
+    app.config['TESTING'] = True
+    app.config['WTF_CSRF_ENABLED'] = False
+
+    with app.test_client() as client:
+        with app.app_context():
+            db.create_all()
+            yield client
+            db.drop_all()
+
+
+def metric_value(text: str, line_start: str) -> float:
+    """Value of the first sample line of `text` starting with `line_start`"""
+    for line in text.splitlines():
+        if line.startswith(line_start):
+            return float(line.rsplit(' ', 1)[1])
+    raise AssertionError(f'{line_start} not in metrics')
+
+
+def test_metrics_exposition(client):
+    """Test that /metrics serves request, pool, cache, Cat API and memory metrics"""
+    client.get('/')
+    response = client.get('/metrics')
+
+    assert response.status_code == 200
+    assert response.mimetype == 'text/plain'
+    text = response.data.decode()
+    assert metric_value(text, 'jobboard_http_requests_total{endpoint="vacancies",method="GET",status="200"}') >= 1
+    assert 'jobboard_http_request_duration_seconds_bucket{endpoint="vacancies"' in text
+    assert 'jobboard_db_pool_connections' in text
+    assert 'jobboard_cache_lookups{cache="listing",result="miss"}' in text
+    assert 'jobboard_cat_api_upstream_seconds' in text
+    assert metric_value(text, 'jobboard_process_resident_memory_bytes') > 0
+
+
+def test_unmatched_routes_share_one_label(client):
+    """Test that unknown paths don't create a label value per path"""
+    client.get('/missing-one')
+    client.get('/missing-two')
+    text = client.get('/metrics').data.decode()
+    assert metric_value(text, 'jobboard_http_requests_total{endpoint="unmatched",method="GET",status="404"}') >= 2
+    assert 'missing-one' not in text
+
+
+def test_metrics_aggregate_across_worker_processes(tmp_path):
+    """Test that /metrics adds up the requests served by every forked worker"""
+    script = textwrap.dedent('''
+        import os
+        from app import app
+        client = app.test_client()
+        pid = os.fork()
+        if pid == 0:
+            for _ in range(3):
+                client.get('/no-such-page')
+            os._exit(0)
+        os.waitpid(pid, 0)
+        client.get('/no-such-page')
+        print(client.get('/metrics').data.decode())
+    ''')
+    env = {**os.environ, 'PROMETHEUS_MULTIPROC_DIR': str(tmp_path)}
+    result = subprocess.run([sys.executable, '-c', script], cwd=ROOT, env=env,
+                            capture_output=True, text=True, timeout=60)
+
+    assert result.returncode == 0, result.stderr
+    assert metric_value(result.stdout, 'jobboard_http_requests_total{endpoint="unmatched",method="GET",status="404"}') == 4
@@ -0,0 +1,119 @@
+import base64
+from datetime import datetime, timedelta
+
+import pytest
+
+from app import app, db, listing_query, user_vacancies_query
+from models import User, Vacancy
+from pagination import decode_cursor, encode_cursor, keyset_paginate
+
+
+@pytest.fixture
+def client():
+    """Create a test client with 20 vacancies, some sharing a timestamp"""
+    app.config['TESTING'] = True
+    app.config['WTF_CSRF_ENABLED'] = False
+
+    with app.test_client() as client:
+        with app.app_context():
+            db.create_all()
+            user = User(username='pager', email='pager@test.com')
+            user.password = 'password123'
+            db.session.add(user)
+            db.session.commit()
+
+            start = datetime(2024, 1, 1)
+            for number in range(20):
+                db.session.add(Vacancy(
+                    title=f'Paged Vacancy {number:02d}',
+                    category='it' if number % 2 else 'design',
+                    author_id=user.id,
+                    short_description='Short desc',
+                    full_description='Full desc',
+                    company='Test Co',
+                    salary='$50,000',
+                    location='Remote',
+                    # pairs of vacancies share a timestamp to exercise the id tie-breaker
+                    date_created=start + timedelta(days=number // 2)
+                ))
+            db.session.commit()
+            yield client
+            db.drop_all()
+
+
+def walk(query, per_page, descending=True):
+    """Follow 'after' cursors from the first page to the last one"""
+    items = []
+    page = keyset_paginate(query=query, per_page=per_page, descending=descending)
+    items.extend(page.items)
+    while page.has_next:
+        after = decode_cursor(encode_cursor(page.items[-1]))
+        page = keyset_paginate(query=query, per_page=per_page, after=after, descending=descending)
+        items.extend(page.items)
+    return items
+
+
+@pytest.mark.parametrize('sort_by', ['newest', 'oldest'])
+@pytest.mark.parametrize('category', ['all', 'it'])
+def test_keyset_walk_matches_offset_order(client, category, sort_by):
+    """Test that walking cursors visits every vacancy once, in listing order"""
+    query = listing_query(category_filter=category, sort_by=sort_by)
+    assert walk(query, per_page=6, descending=sort_by != 'oldest') == query.all()
+
+
+def test_keyset_before_returns_previous_page(client):
+    """Test that a 'before' cursor returns exactly the preceding page"""
+    query = user_vacancies_query(user_id=User.query.filter_by(username='pager').one().id)
+    expected = query.limit(6).all()
+    second_page = query.offset(6).limit(6).all()
+
+    before = decode_cursor(encode_cursor(second_page[0]))
+    page = keyset_paginate(query=query, per_page=6, before=before)
+
+    assert page.items == expected
+    assert page.has_next
+
+
+def test_decode_cursor_rejects_garbage(client):
+    """Test that malformed cursor tokens decode to None"""
+    assert decode_cursor('not-a-cursor') is None
+    assert decode_cursor('') is None
+
+
+def test_cursor_id_beyond_sqlite_integer(client):
+    """Test that a cursor whose id SQLite can't store is rejected and the first page served"""
+    token = base64.urlsafe_b64encode(f'{datetime(2024, 1, 1).isoformat()}|{2 ** 64}'.encode()).decode()
+    assert decode_cursor(token) is None
+
+    response = client.get(f'/?after={token}')
+    assert response.status_code == 200
+    assert listing_query().first().title.encode() in response.data
+
+
+def test_home_page_cursor_navigation(client):
+    """Test the listing renders pages reached through cursor links"""
+    first_page = listing_query().limit(6).all()
+    cursor = encode_cursor(first_page[-1])
+
+    response = client.get(f'/?after={cursor}')
+    assert response.status_code == 200
+    assert first_page[0].title.encode() not in response.data
+    assert b'First' in response.data
+
+
+def test_home_page_invalid_cursor_falls_back_to_first_page(client):
+    """Test that an invalid cursor renders the first page instead of failing"""
+    response = client.get('/?after=garbage')
+    assert response.status_code == 200
+    assert listing_query().first().title.encode() in response.data
+
+
+def test_profile_cursor_navigation(client):
+    """Test the public profile paginates by cursor and still shows the total"""
+    user = User.query.filter_by(username='pager').one()
+    first_page = user_vacancies_query(user_id=user.id).limit(3).all()
+
+    response = client.get(f'/user/pager?after={encode_cursor(first_page[-1])}')
+    assert response.status_code == 200
+    assert first_page[0].title.encode() not in response.data
+    assert b'20 total' in response.data
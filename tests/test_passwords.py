@@ -0,0 +1,89 @@
+import threading
+
+import pytest
+from werkzeug.security import generate_password_hash
+
+from app import app, db
+from models import User
+from passwords import HashingBusy, PasswordHasher, hash_method, password_hasher
+
+
+@pytest.fixture
+def client():
+    """Create a test client with a user whose password was hashed with older parameters"""
+    app.config['TESTING'] = True
+    app.config['WTF_CSRF_ENABLED'] = False
+
+    with app.test_client() as client:
+        with app.app_context():
+            db.create_all()
+            db.session.add(User(username='legacy', email='legacy@test.com',
+                                password_hash=generate_password_hash('password123', method='pbkdf2:sha256:1000')))
+            db.session.commit()
+            yield client
+            db.drop_all()
+
+
+def test_hash_method_spells_out_parameters():
+    """Test that method strings match what Werkzeug stores in the hash"""
+    assert hash_method('scrypt') == 'scrypt:32768:8:1'
+    assert hash_method('scrypt', scrypt_n=2 ** 14) == 'scrypt:16384:8:1'
+    assert hash_method('pbkdf2', iterations=1000) == 'pbkdf2:sha256:1000'
+    assert hash_method('pbkdf2:sha512', iterations=1000) == 'pbkdf2:sha512:1000'
+    with pytest.raises(ValueError):
+        hash_method('md5')
+
+
+def test_hash_and_check():
+    """Test that hashes use the configured parameters and verify"""
+    hasher = PasswordHasher(method='pbkdf2:sha256:1000')
+    password_hash = hasher.hash('secret')
+
+    assert password_hash.startswith('pbkdf2:sha256:1000$')
+    assert hasher.check(password_hash, 'secret')
+    assert not hasher.check(password_hash, 'wrong')
+    assert not hasher.needs_rehash(password_hash)
+    assert hasher.needs_rehash(generate_password_hash('secret', method='pbkdf2:sha256:2000'))
+
+
+def test_excess_hashes_rejected():
+    """Test that hashes beyond the pool and its queue are refused instead of waiting"""
+    hasher = PasswordHasher(method='pbkdf2:sha256:1000', workers=1, max_pending=0)
+    started, release = threading.Event(), threading.Event()
+
+    def slow():
+        started.set()
+        release.wait()
+
+    thread = threading.Thread(target=hasher._run, args=(slow,))
+    thread.start()
+    started.wait()
+    try:
+        with pytest.raises(HashingBusy):
+            hasher.hash('secret')
+    finally:
+        release.set()
+        thread.join()
+    assert hasher.stats['rejected'] == 1
+    assert hasher.check(hasher.hash('secret'), 'secret')
+
+
+def test_login_rehashes_old_password(client):
+    """Test that logging in upgrades a hash made with other parameters"""
+    response = client.post('/login', data={'username': 'legacy', 'password': 'password123'})
+
+    assert response.status_code == 302
+    password_hash = User.query.filter_by(username='legacy').one().password_hash
+    assert password_hash.startswith(f'{password_hasher.method}$')
+    client.get('/logout')
+    assert client.post('/login', data={'username': 'legacy', 'password': 'password123'}).status_code == 302
+
+
+def test_login_busy(client, monkeypatch):
+    """Test that a saturated hashing pool answers 503 rather than queueing the login"""
+    monkeypatch.setattr(password_hasher, '_slots', threading.BoundedSemaphore(1))
+    password_hasher._slots.acquire()
+
+    response = client.post('/login', data={'username': 'legacy', 'password': 'password123'})
+    assert response.status_code == 503
+    assert response.headers['Retry-After'] == '1'
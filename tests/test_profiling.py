@@ -0,0 +1,75 @@
+import pytest
+
+from app import app, db
+from models import User, Vacancy
+from profiling import RequestProfiler, capture_sql
+
+
+@pytest.fixture
+def client(tmp_path):
+    """Create a test client with profiling enabled, reports going to a temporary directory"""
+    app.config['TESTING'] = True
+    app.config['WTF_CSRF_ENABLED'] = False
+    original_wsgi_app = app.wsgi_app
+    app.wsgi_app = RequestProfiler(original_wsgi_app, token='secret', report_dir=str(tmp_path))
+
+    with app.test_client() as client:
+        with app.app_context():
+            db.create_all()
+            capture_sql(db.engine)
+            user = User(username='profiled', email='profiled@test.com', password_hash='x')
+            db.session.add(user)
+            db.session.commit()
+            db.session.add(Vacancy(
+                title='Profiled vacancy',
+                category='it',
+                author_id=user.id,
+                short_description='Short desc',
+                full_description='Full desc',
+                company='Test Co',
+                salary='$50,000',
+                location='Remote'
+            ))
+            db.session.commit()
+            yield client
+            db.drop_all()
+    app.wsgi_app = original_wsgi_app
+
+
+def test_requests_without_token_not_profiled(client, tmp_path):
+    """Test that ordinary and wrong-token requests are served as usual"""
+    assert 'X-Profile-Report' not in client.get('/').headers
+    assert 'X-Profile-Report' not in client.get('/', headers={'X-Profile': 'wrong'}).headers
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_profile_report_written(client, tmp_path):
+    """Test that a profiled request still gets its page and the report is saved"""
+    response = client.get('/user/profiled', headers={'X-Profile': 'secret'})
+
+    assert response.status_code == 200
+    assert b'Profiled vacancy' in response.data
+    report = (tmp_path / response.headers['X-Profile-Report']).read_text()
+    assert report.startswith('GET /user/profiled -> 200')
+    assert 'FROM vacancy' in report
+    assert 'show_user_profile' in report
+
+
+def test_profile_report_inline(client):
+    """Test that the report replaces the page when asked for inline"""
+    response = client.get('/?_profile=secret&_profile_output=inline')
+
+    assert response.status_code == 200
+    assert response.mimetype == 'text/plain'
+    text = response.data.decode()
+    assert 'SQL statements' in text
+    assert 'vacancies' in text  # the view function shows up in the call statistics
+
+
+def test_profile_report_hides_token(client, tmp_path):
+    """Test that the profiling arguments are left out of the saved report"""
+    response = client.get('/?category=it&_profile=secret')
+
+    report = (tmp_path / response.headers['X-Profile-Report']).read_text()
+    assert report.startswith('GET /?category=it -> 200')
+    assert 'secret' not in report
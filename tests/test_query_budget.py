@@ -0,0 +1,85 @@
+import pytest
+
+from app import app, db
+from models import User, Vacancy
+from tests.helpers import count_queries
+
+# Max SQL statements a listing page may issue, whatever the number of cards:
+# the category counter lookup and one SELECT of the vacancies joined with their authors
+HOME_PAGE_QUERY_BUDGET = 2
+# The profile owner's SELECT, the per-author COUNT(*) and the page of vacancies
+PROFILE_PAGE_QUERY_BUDGET = 3
+
+
+@pytest.fixture
+def client():
+    """Create a test client with a temporary database"""
+    app.config['TESTING'] = True
+    app.config['WTF_CSRF_ENABLED'] = False
+
+    with app.test_client() as client:
+        with app.app_context():
+            db.create_all()
+            yield client
+            db.drop_all()
+
+
+def add_vacancies(count: int, authors: int = 1):
+    """Add `count` vacancies spread over `authors` distinct users"""
+    users = []
+    for number in range(authors):
+        user = User(username=f'author{number}', email=f'author{number}@test.com', password_hash='x')
+        db.session.add(user)
+        users.append(user)
+    db.session.commit()
+
+    for number in range(count):
+        db.session.add(Vacancy(
+            title=f'Vacancy {number}',
+            category='it',
+            author_id=users[number % authors].id,
+            short_description='Short desc',
+            full_description='Full desc',
+            company='Test Co',
+            salary='$50,000',
+            location='Remote'
+        ))
+    db.session.commit()
+    # Start every request from an empty identity map, as a real worker would
+    db.session.expunge_all()
+
+
+@pytest.mark.parametrize('count', [1, 6, 18])
+def test_home_page_query_budget(client, count):
+    """Test the home page stays within its query budget for any number of authors"""
+    add_vacancies(count=count, authors=count)
+
+    with count_queries() as statements:
+        response = client.get('/')
+
+    assert response.status_code == 200
+    assert len(statements) <= HOME_PAGE_QUERY_BUDGET, statements
+
+
+def test_home_page_cursor_query_budget(client):
+    """Test a cursor page stays within the same budget as the first page"""
+    add_vacancies(count=18, authors=18)
+    response = client.get('/')
+    next_link = response.data.split(b'after=')[1].split(b'&')[0].decode()
+
+    with count_queries() as statements:
+        response = client.get(f'/?after={next_link}')
+
+    assert response.status_code == 200
+    assert len(statements) <= HOME_PAGE_QUERY_BUDGET, statements
+
+
+def test_profile_page_query_budget(client):
+    """Test the public profile doesn't look the author up once per card"""
+    add_vacancies(count=9, authors=1)
+
+    with count_queries() as statements:
+        response = client.get('/user/author0')
+
+    assert response.status_code == 200
+    assert len(statements) <= PROFILE_PAGE_QUERY_BUDGET, statements
@@ -0,0 +1,83 @@
+from datetime import datetime
+
+import pytest
+from sqlalchemy import text
+from sqlalchemy.dialects import sqlite
+
+from app import app, db, listing_query, user_vacancies_query
+from migrations import upgrade_database
+from pagination import keyset_paginate
+
+
+@pytest.fixture
+def client():
+    """Create a test client with a temporary database"""
+    app.config['TESTING'] = True
+    app.config['WTF_CSRF_ENABLED'] = False
+
+    with app.test_client() as client:
+        with app.app_context():
+            db.create_all()
+            yield client
+            db.drop_all()
+
+
+def query_plan(query) -> str:
+    """Return the EXPLAIN QUERY PLAN output of a paginated query as one string"""
+    statement = query.limit(6).offset(0).statement.compile(
+        dialect=sqlite.dialect(), compile_kwargs={'literal_binds': True}
+    )
+    rows = db.session.execute(text(f'EXPLAIN QUERY PLAN {statement}')).all()
+    return '\n'.join(row[-1] for row in rows)
+
+
+def assert_uses_index(plan: str, index_name: str):
+    assert index_name in plan, plan
+    assert 'TEMP B-TREE' not in plan, plan
+    for line in plan.splitlines():
+        if line.startswith('SCAN'):
+            assert 'USING' in line and 'INDEX' in line, plan
+
+
+@pytest.mark.parametrize('sort_by', ['newest', 'oldest'])
+def test_listing_all_categories_uses_index(client, sort_by):
+    """Test that the unfiltered listing walks the date_created index"""
+    plan = query_plan(listing_query(category_filter='all', sort_by=sort_by))
+    assert_uses_index(plan, 'ix_vacancy_date_created')
+
+
+@pytest.mark.parametrize('sort_by', ['newest', 'oldest'])
+def test_listing_by_category_uses_index(client, sort_by):
+    """Test that the category filter is served by the composite index"""
+    plan = query_plan(listing_query(category_filter='it', sort_by=sort_by))
+    assert_uses_index(plan, 'ix_vacancy_category_id_date_created')
+
+
+def test_user_profile_uses_index(client):
+    """Test that a user's vacancies are served by the composite index"""
+    plan = query_plan(user_vacancies_query(user_id=1))
+    assert_uses_index(plan, 'ix_vacancy_author_id_date_created')
+
+
+@pytest.mark.parametrize('category', ['all', 'it'])
+def test_keyset_seek_uses_index(client, category, monkeypatch):
+    """Test that a cursor seek is an index range search, not a scan"""
+    captured = []
+    monkeypatch.setattr('flask_sqlalchemy.query.Query.all', lambda query: captured.append(query) or [])
+    keyset_paginate(query=listing_query(category_filter=category), per_page=6,
+                    after=(datetime(2024, 1, 1), 10))
+
+    plan = query_plan(captured[0])
+    assert 'SEARCH' in plan, plan
+    assert 'TEMP B-TREE' not in plan, plan
+
+
+def test_upgrade_adds_missing_indexes(client):
+    """Test that an existing database without the indexes gets them on upgrade"""
+    db.session.execute(text('DROP INDEX ix_vacancy_category_id_date_created'))
+    db.session.commit()
+
+    upgrade_database()
+
+    indexes = db.session.execute(text("SELECT name FROM sqlite_master WHERE type = 'index'")).scalars().all()
+    assert 'ix_vacancy_category_id_date_created' in indexes
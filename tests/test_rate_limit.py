@@ -0,0 +1,101 @@
+import pytest
+
+from app import app, db
+from models import User
+from passwords import password_hasher
+from rate_limit import MemoryStore, SQLiteStore, login_limiter
+
+
+@pytest.fixture
+def client():
+    """Create a test client with one user"""
+    app.config['TESTING'] = True
+    app.config['WTF_CSRF_ENABLED'] = False
+
+    with app.test_client() as client:
+        with app.app_context():
+            db.create_all()
+            user = User(username='target', email='target@test.com')
+            user.password = 'password123'
+            db.session.add(user)
+            db.session.commit()
+            yield client
+            db.drop_all()
+
+
+@pytest.fixture
+def hash_checks(monkeypatch):
+    """Count the password hash checks"""
+    calls = []
+    check = password_hasher.check
+    monkeypatch.setattr(password_hasher, 'check', lambda *args: calls.append(args) or check(*args))
+    return calls
+
+
+def login(client, username='target', password='wrong-password', ip='10.0.0.1'):
+    return client.post('/login', data={'username': username, 'password': password},
+                       environ_base={'REMOTE_ADDR': ip})
+
+
+@pytest.mark.parametrize('store_type', ['memory', 'sqlite'])
+def test_store_sliding_window(store_type, tmp_path):
+    """Test that events leave the count once they are older than the window"""
+    store = MemoryStore() if store_type == 'memory' else SQLiteStore(str(tmp_path / 'rate.db'))
+    for at in (100, 110, 120):
+        store.add('key', now=at, window=30)
+
+    assert store.count('key', since=90) == 3
+    assert store.count('key', since=105) == 2
+    assert store.count('other', since=0) == 0
+    store.clear('key')
+    assert store.count('key', since=0) == 0
+
+
+def test_sqlite_store_shared(tmp_path):
+    """Test that two stores on the same file (two workers) see each other's events"""
+    path = str(tmp_path / 'rate.db')
+    SQLiteStore(path).add('key', now=100, window=30)
+    assert SQLiteStore(path).count('key', since=90) == 1
+
+
+def test_username_locked_after_failures(client, hash_checks):
+    """Test that an account is refused without a hash check once it has too many failures"""
+    for number in range(login_limiter.username_limit):
+        assert login(client, ip=f'10.0.0.{number}').status_code == 200
+    checks = len(hash_checks)
+
+    response = login(client, password='password123', ip='10.0.1.1')
+    assert response.status_code == 429
+    assert b'Too many failed attempts' in response.data
+    assert len(hash_checks) == checks
+    assert login_limiter.stats['blocked_username'] >= 1
+
+
+def test_ip_locked_after_failures(client, monkeypatch):
+    """Test that one address trying many accounts is refused"""
+    monkeypatch.setattr(login_limiter, 'ip_limit', 3)
+    for number in range(3):
+        login(client, username=f'guess{number}')
+
+    assert login(client, username='target', password='password123').status_code == 429
+    assert login(client, username='target', password='password123', ip='10.0.0.2').status_code == 302
+
+
+def test_success_clears_username_failures(client):
+    """Test that logging in forgives earlier failures of the account"""
+    for _ in range(login_limiter.username_limit - 1):
+        login(client)
+    assert login(client, password='password123').status_code == 302
+    client.get('/logout')
+
+    for _ in range(login_limiter.username_limit - 1):
+        login(client, ip='10.0.0.3')
+    assert login(client, password='password123', ip='10.0.0.3').status_code == 302
+
+
+def test_attempts_in_metrics(client):
+    """Test that refused attempts are counted for monitoring"""
+    for _ in range(login_limiter.username_limit + 1):
+        login(client)
+
+    assert 'jobboard_login_attempts_total{result="blocked_username"}' in client.get('/metrics').get_data(as_text=True)
@@ -0,0 +1,72 @@
+import json
+import logging
+
+import pytest
+
+from app import app, db
+from models import User, Vacancy
+
+
+@pytest.fixture
+def client():
+    """Create a test client with a temporary database and one vacancy"""
+    app.config['TESTING'] = True
+    app.config['WTF_CSRF_ENABLED'] = False
+
+    with app.test_client() as client:
+        with app.app_context():
+            db.create_all()
+            user = User(username='logged', email='logged@test.com', password_hash='x')
+            db.session.add(user)
+            db.session.commit()
+            db.session.add(Vacancy(
+                title='Logged vacancy',
+                category='it',
+                author_id=user.id,
+                short_description='Short desc',
+                full_description='Full desc',
+                company='Test Co',
+                salary='$50,000',
+                location='Remote'
+            ))
+            db.session.commit()
+            yield client
+            db.drop_all()
+
+
+def request_lines(caplog) -> list:
+    """Parse the JSON request log lines captured so far"""
+    return [json.loads(record.getMessage()) for record in caplog.records if record.name == 'RequestLog']
+
+
+def test_one_json_line_per_request(client, caplog):
+    """Test that a request logs its route, status, timings and SQL statements"""
+    with caplog.at_level(logging.INFO, logger='RequestLog'):
+        response = client.get('/?category=it')
+
+    assert response.status_code == 200
+    [line] = request_lines(caplog)
+    assert line['method'] == 'GET'
+    assert line['endpoint'] == 'vacancies'
+    assert line['status'] == 200
+    assert line['sql_count'] >= 1
+    assert 0 < line['render_ms'] <= line['duration_ms']
+    assert 0 <= line['sql_ms'] <= line['duration_ms']
+
+
+def test_error_responses_logged(client, caplog):
+    """Test that a 404 is logged with its status and no endpoint"""
+    with caplog.at_level(logging.INFO, logger='RequestLog'):
+        client.get('/no-such-page')
+
+    [line] = request_lines(caplog)
+    assert line['status'] == 404
+    assert line['endpoint'] is None
+    assert line['path'] == '/no-such-page'
+
+
+def test_sql_outside_requests_not_counted(client, caplog):
+    """Test that queries run outside of a request don't produce log lines"""
+    with caplog.at_level(logging.INFO, logger='RequestLog'):
+        Vacancy.query.count()
+    assert request_lines(caplog) == []
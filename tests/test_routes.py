@@ -7,7 +7,6 @@ from models import User, Vacancy
 def client():
     """Create a test client with a temporary database"""
     app.config['TESTING'] = True
-    app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///:memory:'
     app.config['WTF_CSRF_ENABLED'] = False
 
     with app.test_client() as client:
@@ -0,0 +1,133 @@
+import pytest
+from sqlalchemy import text
+
+from app import app, db
+from models import User, Vacancy
+from search import create_search_index, match_expression, search_vacancies
+from tests.helpers import count_queries
+
+
+@pytest.fixture
+def client():
+    """Create a test client with a few searchable vacancies"""
+    app.config['TESTING'] = True
+    app.config['WTF_CSRF_ENABLED'] = False
+
+    with app.test_client() as client:
+        with app.app_context():
+            db.create_all()
+            user = User(username='searcher', email='searcher@test.com')
+            user.password = 'password123'
+            db.session.add(user)
+            db.session.commit()
+            for title, company, location, description in [
+                ('Kotlin Developer', 'Zebracorp', 'Kutaisi', 'Build Android apps'),
+                ('Graphic Designer', 'Pixelworks', 'Remote', 'Design brand assets with Kotlin developers'),
+                ('Sales Manager', 'Zebracorp', 'Batumi', 'Grow <b>revenue</b> for Zebracorp'),
+            ]:
+                db.session.add(Vacancy(
+                    title=title,
+                    category='it',
+                    author_id=user.id,
+                    short_description=description,
+                    full_description=description,
+                    company=company,
+                    salary='$50,000',
+                    location=location
+                ))
+            db.session.commit()
+            yield client
+            db.drop_all()
+
+
+def titles(results):
+    return [vacancy.title for vacancy, snippet in results]
+
+
+def test_match_expression_quotes_user_input():
+    """Test that FTS5 syntax typed by users is neutralised"""
+    assert match_expression('kotlin OR "dev') == '"kotlin" "OR" "dev"*'
+    assert match_expression('  ***  ') is None
+
+
+def test_search_ranks_title_matches_first(client):
+    """Test that a title match outranks a description match"""
+    assert titles(search_vacancies('kotlin')) == ['Kotlin Developer', 'Graphic Designer']
+
+
+def test_search_matches_prefix_and_stems(client):
+    """Test that the last word matches as a prefix and words are stemmed"""
+    assert titles(search_vacancies('kutai')) == ['Kotlin Developer']
+    assert 'Kotlin Developer' in titles(search_vacancies('developers'))
+
+
+def test_search_snippet_highlights_and_escapes(client):
+    """Test that snippets mark matches and escape the vacancy text"""
+    results = search_vacancies('revenue')
+    snippet = str(results[0][1])
+    assert '<mark>revenue</mark>' in snippet
+    assert '&lt;b&gt;' in snippet
+
+
+def test_search_index_follows_writes(client):
+    """Test that the triggers keep the index in sync with updates and deletes"""
+    vacancy = Vacancy.query.filter_by(title='Sales Manager').one()
+    vacancy.title = 'Account Executive'
+    db.session.commit()
+    assert titles(search_vacancies('executive')) == ['Account Executive']
+    assert titles(search_vacancies('manager')) == []
+
+    db.session.delete(vacancy)
+    db.session.commit()
+    assert titles(search_vacancies('executive')) == []
+
+
+def test_search_route(client):
+    """Test the search page renders ranked, highlighted results"""
+    response = client.get('/search?q=zebracorp')
+    assert response.status_code == 200
+    assert b'Kotlin Developer' in response.data
+    assert b'Sales Manager' in response.data
+    assert b'Graphic Designer' not in response.data
+
+
+def test_search_route_without_query(client):
+    """Test the search page loads empty and survives FTS5 syntax"""
+    assert client.get('/search').status_code == 200
+    assert client.get('/search?q=%22%28NEAR').status_code == 200
+
+
+def test_search_route_page_beyond_sqlite_integer(client):
+    """Test that a page whose offset SQLite can't store renders empty instead of failing"""
+    response = client.get('/search?q=zebracorp&page=99999999999999999999999')
+    assert response.status_code == 200
+    assert b'Kotlin Developer' not in response.data
+
+
+def test_listing_q_parameter(client):
+    """Test that the listing can be narrowed down with q"""
+    response = client.get('/?q=batumi')
+    assert response.status_code == 200
+    assert b'Sales Manager' in response.data
+    assert b'Kotlin Developer' not in response.data
+
+
+@pytest.mark.parametrize('url', ['/?q=zebracorp', '/?q=zebracorp&page=2', '/?min_salary=1000&location=batumi'])
+def test_filtered_listing_does_not_count_matches(client, url):
+    """Test that a filtered listing is paged by cursor, without counting every match"""
+    with count_queries() as statements:
+        response = client.get(url)
+
+    assert response.status_code == 200
+    assert b'Kotlin Developer' in response.data or b'Sales Manager' in response.data
+    assert not any('count(' in statement.lower() for statement in statements), statements
+
+
+def test_create_search_index_rebuilds_existing_rows(client):
+    """Test that a database without the index gets one covering its rows"""
+    db.session.execute(text('DROP TABLE vacancy_fts'))
+    db.session.commit()
+
+    create_search_index()
+
+    assert titles(search_vacancies('pixelworks')) == ['Graphic Designer']
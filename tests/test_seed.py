@@ -0,0 +1,100 @@
+from datetime import datetime
+
+import pytest
+from sqlalchemy import func, select
+
+from app import app, db
+from counters import category_total, rebuild_category_counts
+from models import User, Vacancy
+from seed import SEED_PASSWORD, seed_database, username_for
+
+
+@pytest.fixture
+def client():
+    """Create a test client with an empty database"""
+    app.config['TESTING'] = True
+    app.config['WTF_CSRF_ENABLED'] = False
+
+    with app.test_client() as client:
+        with app.app_context():
+            db.create_all()
+            Vacancy.query.delete()
+            User.query.delete()
+            db.session.commit()
+            rebuild_category_counts()
+            yield client
+            db.drop_all()
+
+
+def count(model) -> int:
+    return db.session.scalar(select(func.count()).select_from(model))
+
+
+def test_seed_database_adds_rows(client):
+    """Test that the requested users and vacancies are inserted and counted"""
+    seed_database(users=30, vacancies=120, seed=1, chunk_size=50)
+
+    assert count(User) == 30
+    assert count(Vacancy) == 120
+    assert category_total('all') == 120
+    for category in ('it', 'design', 'marketing', 'sales', 'other'):
+        real = db.session.scalar(select(func.count()).where(Vacancy.category == category))
+        assert category_total(category) == real, category
+    assert {vacancy.author_id for vacancy in Vacancy.query} <= {user.id for user in User.query}
+
+
+def test_seeded_users_can_log_in(client):
+    """Test that every generated user shares the seed password"""
+    seed_database(users=3)
+
+    response = client.post('/login', data={'username': username_for(2), 'password': SEED_PASSWORD})
+    assert response.status_code == 302
+
+
+def test_seed_database_deterministic(client):
+    """Test that the same seed generates the same vacancies, timestamps included"""
+    def snapshot():
+        return [(vacancy.title, vacancy.category, vacancy.author_id, vacancy.date_created)
+                for vacancy in Vacancy.query.order_by(Vacancy.id)]
+
+    seed_database(users=10, vacancies=40, seed=7)
+    first = snapshot()
+    Vacancy.query.delete()
+    db.session.commit()
+    seed_database(vacancies=40, seed=7)
+
+    assert snapshot() == first
+
+
+def test_seed_command_until(client):
+    """Test that the seed command dates vacancies before the given time"""
+    result = app.test_cli_runner().invoke(args=['seed', '--users', '2', '--vacancies', '5', '--seed', '3',
+                                                '--until', '2020-06-01'])
+    assert result.exit_code == 0, result.output
+    assert db.session.scalar(select(func.max(Vacancy.date_created))) < datetime(2020, 6, 1)
+
+
+def test_seed_database_appends(client):
+    """Test that seeding again adds rows after the existing ones"""
+    seed_database(users=5, vacancies=5)
+    seed_database(users=5, vacancies=5)
+
+    assert count(User) == 10
+    assert count(Vacancy) == 10
+    assert User.query.filter_by(username=username_for(10)).one()
+
+
+def test_usernames_fit_column():
+    """Test that large user numbers still fit the username column"""
+    assert len(username_for(10_000_000)) <= User.__table__.c.username.type.length
+    assert username_for(1) != username_for(1 + 15)
+
+
+def test_seed_cli(client):
+    """Test the flask seed command"""
+    result = app.test_cli_runner().invoke(args=['seed', '--users', '4', '--vacancies', '6', '--chunk-size', '3'])
+
+    assert result.exit_code == 0, result.output
+    assert 'Seeded 3/4 users' in result.output
+    assert 'Done, 4 users and 6 vacancies added' in result.output
+    assert count(Vacancy) == 6
@@ -0,0 +1,77 @@
+import os
+
+import pytest
+from sqlalchemy import create_engine, text
+
+from db import engine_options, sqlite_pragmas, tune_engine
+
+
+@pytest.fixture
+def engine(tmp_path):
+    """Create a pooled engine with the production profile on a temporary file"""
+    engine = create_engine(f'sqlite:///{tmp_path / "profile.db"}', **engine_options(profile='production'))
+    tune_engine(engine=engine, profile='production')
+    yield engine
+    engine.dispose()
+
+
+def pragma(connection, name: str):
+    return connection.execute(text(f'PRAGMA {name}')).scalar()
+
+
+def test_production_pragmas_applied(engine):
+    """Test that every new connection gets WAL and the tuned pragmas"""
+    with engine.connect() as connection:
+        assert pragma(connection, 'journal_mode') == 'wal'
+        assert pragma(connection, 'synchronous') == 1  # NORMAL
+        assert pragma(connection, 'cache_size') == -64_000
+        assert pragma(connection, 'busy_timeout') == 5000
+
+
+def test_pragma_env_override(monkeypatch, tmp_path):
+    """Test that a pragma can be overridden from the environment"""
+    monkeypatch.setenv('SQLITE_CACHE_SIZE', '-2000')
+    assert sqlite_pragmas('production')['cache_size'] == '-2000'
+    engine = create_engine(f'sqlite:///{tmp_path / "override.db"}')
+    tune_engine(engine=engine, profile='production')
+    with engine.connect() as connection:
+        assert pragma(connection, 'cache_size') == -2000
+    engine.dispose()
+
+
+def test_default_profile_keeps_sqlite_defaults():
+    """Test that the default profile changes neither pragmas nor the pool"""
+    assert sqlite_pragmas('default') == {}
+    assert engine_options('default') == {}
+
+
+@pytest.mark.parametrize('url', ['sqlite://', 'sqlite:///:memory:', 'sqlite:///file:jobs?mode=memory&uri=true'])
+def test_memory_database_gets_no_pool_options(url):
+    """Test that the production profile works with an in-memory database"""
+    options = engine_options(profile='production', url=url)
+    assert 'pool_size' not in options
+    engine = create_engine(url, **options)
+    tune_engine(engine=engine, profile='production')
+    with engine.connect() as connection:
+        assert connection.execute(text('SELECT 1')).scalar() == 1
+    engine.dispose()
+
+
+def test_connections_are_pooled(engine):
+    """Test that a connection is reused instead of reopened"""
+    with engine.connect() as connection:
+        first = connection.connection.dbapi_connection
+    with engine.connect() as connection:
+        assert connection.connection.dbapi_connection is first
+    assert engine.pool.size() == 5
+
+
+def test_forked_process_gets_own_connection(engine, monkeypatch):
+    """Test that a pooled connection opened by another process is not reused"""
+    with engine.connect() as connection:
+        first = connection.connection.dbapi_connection
+
+    monkeypatch.setattr(os, 'getpid', lambda: -1)
+    with engine.connect() as connection:
+        assert connection.connection.dbapi_connection is not first
+        assert pragma(connection, 'journal_mode') == 'wal'
@@ -0,0 +1,77 @@
+import os
+import sqlite3
+import subprocess
+import sys
+
+import pytest
+
+from app import app, db, init_database
+from models import User
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def run_app_script(database, script: str) -> str:
+    """Run `script` in a fresh interpreter with the app configured for `database`"""
+    env = {**os.environ, 'DATABASE_URL': f'sqlite:///{database}'}
+    result = subprocess.run([sys.executable, '-c', script], cwd=ROOT, env=env, capture_output=True, text=True)
+    assert result.returncode == 0, result.stderr
+    return result.stdout
+
+
+def tables(database) -> set:
+    if not os.path.exists(database):
+        return set()
+    with sqlite3.connect(database) as connection:
+        return {row[0] for row in connection.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+
+
+@pytest.fixture
+def client():
+    """Create a test client with an empty schema"""
+    app.config['TESTING'] = True
+
+    with app.test_client() as client:
+        with app.app_context():
+            db.drop_all()
+            yield client
+            db.drop_all()
+
+
+def test_import_does_not_touch_database(tmp_path):
+    """Test that importing the app creates no tables"""
+    database = tmp_path / 'import.db'
+    run_app_script(database, 'import app')
+    assert 'user' not in tables(database)
+
+
+def test_first_request_initializes_database(tmp_path):
+    """Test that without flask init-db the first request creates and seeds the database"""
+    database = tmp_path / 'lazy.db'
+    output = run_app_script(database, "from app import app\nprint(app.test_client().get('/').status_code)")
+
+    assert output.strip() == '200'
+    with sqlite3.connect(database) as connection:
+        assert connection.execute('SELECT COUNT(*) FROM user').fetchone()[0] > 0
+
+
+def test_init_database_seeds_only_empty_database(client):
+    """Test that sample data is added once"""
+    init_database()
+    users = User.query.count()
+    init_database()
+
+    assert users > 0
+    assert User.query.count() == users
+
+
+def test_init_db_cli(client):
+    """Test the flask init-db command with and without sample data"""
+    result = app.test_cli_runner().invoke(args=['init-db', '--no-seed'])
+    assert result.exit_code == 0, result.output
+    assert 'Database ready' in result.output
+    assert User.query.count() == 0
+
+    result = app.test_cli_runner().invoke(args=['init-db'])
+    assert result.exit_code == 0, result.output
+    assert User.query.count() > 0
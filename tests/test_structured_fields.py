@@ -0,0 +1,160 @@
+import pytest
+from sqlalchemy import text
+
+from app import app, db, listing_query
+from migrations import upgrade_database
+from models import User, Vacancy
+from normalize import normalize_location, parse_salary
+
+
+@pytest.fixture
+def client():
+    """Create a test client with vacancies in different salary ranges and cities"""
+    app.config['TESTING'] = True
+    app.config['WTF_CSRF_ENABLED'] = False
+
+    with app.test_client() as client:
+        with app.app_context():
+            db.create_all()
+            user = User(username='payer', email='payer@test.com')
+            user.password = 'password123'
+            db.session.add(user)
+            db.session.commit()
+            for title, salary, location in [
+                ('Junior Role', '$30,000-$45,000', 'Batumi'),
+                ('Senior Role', '$100,000-$140,000', 'Tbilisi'),
+                ('Unclear Role', 'Negotiable', ' TBILISI '),
+            ]:
+                db.session.add(Vacancy(
+                    title=title,
+                    category='it',
+                    author_id=user.id,
+                    short_description='Short desc',
+                    full_description='Full desc',
+                    company='Test Co',
+                    salary=salary,
+                    location=location
+                ))
+            db.session.commit()
+            yield client
+            db.drop_all()
+
+
+@pytest.mark.parametrize('salary, expected', [
+    ('$85,000-$110,000', (85000, 110000, 'USD')),
+    ('$50,000', (50000, 50000, 'USD')),
+    ('80k - 95k EUR', (80000, 95000, 'EUR')),
+    ('₾2,500', (2500, 2500, 'GEL')),
+    ('$85,000.00', (85000, 85000, 'USD')),
+    ('$50.5k', (50500, 50500, 'USD')),
+    ('$85,000.50-$90,000.99', (85000, 90000, 'USD')),
+    ('1.250.000 GEL', (1250000, 1250000, 'GEL')),
+    ('99999999999999999999', (None, None, None)),
+    ('$50,000 - $99999999999999999999', (50000, None, 'USD')),
+    ('Negotiable', (None, None, None)),
+    ('', (None, None, None)),
+])
+def test_parse_salary(salary, expected):
+    """Test that common salary notations are parsed into a numeric range"""
+    assert parse_salary(salary) == expected
+
+
+def test_normalize_location():
+    """Test that spelling variants of a city share one key"""
+    assert normalize_location(' Tbilísi ') == normalize_location('TBILISI') == 'tbilisi'
+    assert normalize_location('  ') is None
+
+
+def test_fields_are_parsed_on_write(client):
+    """Test that setting salary/location fills the structured columns"""
+    vacancy = Vacancy.query.filter_by(title='Senior Role').one()
+    assert (vacancy.salary_min, vacancy.salary_max, vacancy.currency) == (100000, 140000, 'USD')
+    assert vacancy.location_key == 'tbilisi'
+
+    vacancy.salary = '€60,000'
+    vacancy.location = 'Kutaisi'
+    db.session.commit()
+    assert (vacancy.salary_min, vacancy.salary_max, vacancy.currency) == (60000, 60000, 'EUR')
+    assert vacancy.location_key == 'kutaisi'
+
+
+def titles(query):
+    return {vacancy.title for vacancy in query}
+
+
+def test_salary_range_filter(client):
+    """Test that the range filters keep vacancies whose range overlaps"""
+    assert titles(listing_query(min_salary=50000)) == {'Senior Role'}
+    assert titles(listing_query(max_salary=50000)) == {'Junior Role'}
+    assert titles(listing_query(min_salary=40000, max_salary=100000)) == {'Junior Role', 'Senior Role'}
+
+
+def test_location_filter(client):
+    """Test that the location filter matches on the normalized key"""
+    assert titles(listing_query(location='tbilisi')) == {'Senior Role', 'Unclear Role'}
+
+
+def test_listing_route_filters(client):
+    """Test that the filters are applied and carried over by the listing page"""
+    response = client.get('/?min_salary=50000&location=Tbilisi')
+    assert response.status_code == 200
+    assert b'Senior Role' in response.data
+    assert b'Junior Role' not in response.data
+    assert b'Unclear Role' not in response.data
+
+
+@pytest.mark.parametrize('argument', ['min_salary', 'max_salary'])
+def test_out_of_range_salary_is_ignored(client, argument):
+    """Test that a salary bound too large for SQLite is ignored instead of failing"""
+    response = client.get(f'/?{argument}=99999999999999999999999')
+    assert response.status_code == 200
+    assert b'Senior Role' in response.data
+    assert b'Junior Role' in response.data
+
+
+def test_location_filter_uses_index(client):
+    """Test that filtering by location is an index search"""
+    statement = listing_query(location='tbilisi').statement.compile(
+        dialect=db.engine.dialect, compile_kwargs={'literal_binds': True}
+    )
+    plan = ' '.join(row[-1] for row in db.session.execute(text(f'EXPLAIN QUERY PLAN {statement}')))
+    assert 'ix_vacancy_location_key_date_created' in plan, plan
+
+
+def test_backfill_command(client):
+    """Test that the backfill command fills rows written before the columns existed"""
+    db.session.execute(text('UPDATE vacancy SET salary_min = NULL, salary_max = NULL, '
+                            'currency = NULL, location_key = NULL'))
+    db.session.commit()
+
+    result = app.test_cli_runner().invoke(args=['backfill-vacancies', '--batch-size', '2'])
+    assert 'Done' in result.output
+
+    db.session.expire_all()
+    vacancy = Vacancy.query.filter_by(title='Junior Role').one()
+    assert (vacancy.salary_min, vacancy.salary_max, vacancy.location_key) == (30000, 45000, 'batumi')
+
+
+def test_salary_too_large_to_store(client):
+    """Test that a vacancy posted with a salary beyond SQLite's INTEGER range is saved without a parsed range"""
+    client.post('/login', data={'username': 'payer', 'password': 'password123'})
+    response = client.post('/add_vacancy', data={
+        'title': 'Huge Role', 'category': 'it', 'short_description': 'Short', 'full_description': 'Full',
+        'company': 'Test Co', 'salary': '99999999999999999999', 'location': 'Tbilisi',
+    })
+    assert response.status_code == 302
+    vacancy = Vacancy.query.filter_by(title='Huge Role').one()
+    assert (vacancy.salary_min, vacancy.salary_max, vacancy.location_key) == (None, None, 'tbilisi')
+
+
+def test_upgrade_resumes_interrupted_backfill(client):
+    """Test that startup finishes a backfill that stopped before reaching every row"""
+    db.session.execute(text("UPDATE vacancy SET salary_min = NULL, salary_max = NULL, currency = NULL, "
+                            "location_key = NULL WHERE title = 'Junior Role'"))
+    db.session.commit()
+
+    upgrade_database()
+
+    db.session.expire_all()
+    vacancy = Vacancy.query.filter_by(title='Junior Role').one()
+    assert (vacancy.salary_min, vacancy.salary_max, vacancy.location_key) == (30000, 45000, 'batumi')
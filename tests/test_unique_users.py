@@ -0,0 +1,117 @@
+import threading
+
+import pytest
+
+import app as app_module
+from app import app, db, taken_fields
+from models import User
+from tests.helpers import count_queries
+
+
+@pytest.fixture
+def client():
+    """Create a test client with an existing user"""
+    app.config['TESTING'] = True
+    app.config['WTF_CSRF_ENABLED'] = False
+
+    with app.test_client() as client:
+        with app.app_context():
+            db.create_all()
+            user = User(username='existing', email='existing@test.com')
+            user.password = 'password123'
+            db.session.add(user)
+            db.session.commit()
+            yield client
+            db.drop_all()
+
+
+def registration(username: str, email: str) -> dict:
+    return {'email': email, 'username': username, 'password': 'password123', 'confirm_password': 'password123'}
+
+
+def test_taken_fields_single_query(client):
+    """Test that both columns are checked by one query"""
+    with count_queries() as statements:
+        assert taken_fields(email='existing@test.com', username='existing') == {'email', 'username'}
+    assert len(statements) == 1
+
+    assert taken_fields(email='existing@test.com', username='free') == {'email'}
+    assert taken_fields(email='free@test.com', username='existing') == {'username'}
+    assert taken_fields(email='free@test.com', username='free') == set()
+    owner = User.query.filter_by(username='existing').one()
+    assert taken_fields(email='existing@test.com', username='existing', exclude_user_id=owner.id) == set()
+
+
+def test_register_taken_email(client):
+    """Test that a taken email is reported on the form"""
+    response = client.post('/register', data=registration('newcomer', 'existing@test.com'))
+
+    assert response.status_code == 200
+    assert b'already exists' in response.data
+    assert User.query.filter_by(username='newcomer').first() is None
+
+
+def test_register_race_caught_by_constraint(client, monkeypatch):
+    """Test that a username taken after the check is reported from the IntegrityError"""
+    real_taken_fields = app_module.taken_fields
+    calls = []
+
+    def taken_fields_missing_the_race(**kwargs):
+        # The first check runs before the other registration commits
+        calls.append(kwargs)
+        return set() if len(calls) == 1 else real_taken_fields(**kwargs)
+
+    monkeypatch.setattr(app_module, 'taken_fields', taken_fields_missing_the_race)
+
+    response = client.post('/register', data=registration('existing', 'other@test.com'))
+
+    assert response.status_code == 200
+    assert b'is taken' in response.data
+    assert len(calls) == 2
+    assert User.query.filter_by(username='existing').count() == 1
+
+
+def test_concurrent_registrations(client):
+    """Test that of many simultaneous registrations of one username exactly one succeeds"""
+    threads_count = 6
+    barrier = threading.Barrier(threads_count)
+    statuses = []
+
+    def register(number: int):
+        thread_client = app.test_client()
+        barrier.wait()
+        response = thread_client.post('/register', data=registration('contested', f'contested{number}@test.com'))
+        statuses.append((response.status_code, b'is taken' in response.data))
+
+    threads = [threading.Thread(target=register, args=(number,)) for number in range(threads_count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert sorted(statuses) == [(200, True)] * (threads_count - 1) + [(302, False)]
+    assert User.query.filter_by(username='contested').count() == 1
+
+
+def test_edit_profile_keeps_own_email(client):
+    """Test that saving the profile unchanged is not reported as a duplicate"""
+    client.post('/login', data={'username': 'existing', 'password': 'password123'})
+    assert client.get('/edit_profile').status_code == 200
+
+    response = client.post('/edit_profile', data={'username': 'renamed', 'email': 'existing@test.com'})
+    assert response.status_code == 302
+    assert User.query.filter_by(username='renamed').one().email == 'existing@test.com'
+
+
+def test_edit_profile_taken_username(client):
+    """Test that another user's username is refused"""
+    other = User(username='other', email='other@test.com')
+    other.password = 'password123'
+    db.session.add(other)
+    db.session.commit()
+    client.post('/login', data={'username': 'existing', 'password': 'password123'})
+
+    response = client.post('/edit_profile', data={'username': 'other', 'email': 'existing@test.com'})
+    assert response.status_code == 200
+    assert b'is taken' in response.data
+    assert User.query.filter_by(username='existing').count() == 1
@@ -0,0 +1,106 @@
+from contextlib import contextmanager
+
+import pytest
+
+from app import app, db, user_cache, user_loader
+from models import User
+from tests.helpers import count_queries
+from user_loader import SESSION_KEY
+
+
+@pytest.fixture
+def client():
+    """Create a test client with a logged-in user, every request getting its own app context"""
+    app.config['TESTING'] = True
+    app.config['WTF_CSRF_ENABLED'] = False
+
+    with app.app_context():
+        db.create_all()
+        user = User(username='cached', email='cached@test.com')
+        user.password = 'password123'
+        db.session.add(user)
+        db.session.commit()
+
+    # Not kept in a context, Flask-Login would keep the loaded user in g between requests
+    client = app.test_client()
+    client.post('/login', data={'username': 'cached', 'password': 'password123'})
+    yield client
+    user_loader.mode = 'memory'
+    with app.app_context():
+        db.drop_all()
+
+
+@contextmanager
+def user_queries():
+    """Collect the SQL statements reading the user table inside the block"""
+    with app.app_context():
+        engine = db.engine
+    with count_queries(engine=engine, containing='FROM user') as statements:
+        yield statements
+
+
+def user_id() -> int:
+    with app.app_context():
+        return User.query.filter_by(username='cached').one().id
+
+
+@pytest.mark.parametrize('mode', ['memory', 'session'])
+def test_logged_in_pages_skip_user_query(client, mode):
+    """Test that only the first request after login loads the user"""
+    user_loader.mode = mode
+    with user_queries() as first:
+        client.get('/about')
+    with user_queries() as statements:
+        response = client.get('/about')
+
+    assert len(first) == 1
+    assert response.status_code == 200
+    assert b'cached' in response.data  # the navbar shows the username
+    assert statements == []
+
+
+def test_off_mode_queries_every_request(client):
+    """Test that the cache can be turned off"""
+    user_loader.mode = 'off'
+    client.get('/about')
+
+    with user_queries() as statements:
+        client.get('/about')
+    assert len(statements) == 1
+
+
+def test_cached_user_is_a_full_user(client):
+    """Test that a user rebuilt from the cache loads other attributes and saves changes"""
+    client.get('/about')
+    with app.app_context():
+        user = user_loader.load(str(user_id()))
+        assert user.email == 'cached@test.com'
+        assert user.check_password('password123')
+        user.image_filename = 'changed.png'
+        db.session.commit()
+    with app.app_context():
+        assert User.query.filter_by(username='cached').one().image_filename == 'changed.png'
+
+
+def test_session_snapshot_expires(client):
+    """Test that a session snapshot older than the TTL is reloaded"""
+    user_loader.mode = 'session'
+    client.get('/about')
+    with client.session_transaction() as session:
+        session[SESSION_KEY] = {**session[SESSION_KEY], 'loaded_at': 0}
+
+    with user_queries() as statements:
+        client.get('/about')
+    assert len(statements) == 1
+
+
+def test_deleted_profile_leaves_cache(client):
+    """Test that deleting the profile drops its cached user"""
+    client.get('/about')
+    deleted_id = user_id()
+    assert user_cache.get(deleted_id) is not None
+
+    client.post('/delete_profile')
+    assert user_cache.get(deleted_id) is None
+    with app.app_context():
+        assert db.session.get(User, deleted_id) is None
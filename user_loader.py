@@ -0,0 +1,74 @@
+import time
+
+from flask import session
+from sqlalchemy.orm import make_transient_to_detached
+
+from cache import LRUCache
+from db import db
+from models import User
+
+# Enough of a user for the navbar and the owner's profile page. Other attributes,
+# the password hash above all, never go in a snapshot and are loaded on first access.
+SNAPSHOT_COLUMNS = ('id', 'username', 'email', 'image_filename')
+SESSION_KEY = '_user_snapshot'
+MODES = ('memory', 'session', 'off')
+
+
+def snapshot(user: User) -> dict:
+    return {column: getattr(user, column) for column in SNAPSHOT_COLUMNS}
+
+
+def restore(values: dict) -> User:
+    """A persistent User of the current session rebuilt from `values`, without a query"""
+    user = User(**values)
+    make_transient_to_detached(user)
+    return db.session.merge(user, load=False)
+
+
+class UserLoader:
+    """Flask-Login user loader that skips the user query on most requests.
+
+    'memory' keeps recently loaded users in `cache`, separately in every
+    process; 'session' keeps the snapshot in the signed session cookie, so it
+    follows the user to any worker; 'off' queries on every request. A snapshot
+    is trusted for `cache.ttl` seconds, which bounds how long a change made in
+    another worker (or from another browser, in 'session' mode) goes unseen.
+    """
+
+    def __init__(self, cache: LRUCache, mode: str = 'memory'):
+        if mode not in MODES:
+            raise ValueError(f"Unknown user cache mode '{mode}', expected one of {', '.join(MODES)}")
+        self.cache = cache
+        self.mode = mode
+
+    def load(self, user_id: str):
+        user_id = int(user_id)
+        values = self.cached(user_id)
+        if values is not None:
+            return restore(values)
+        user = db.session.get(User, user_id)
+        if user is not None:
+            self.remember(user)
+        return user
+
+    def cached(self, user_id: int):
+        if self.mode == 'memory':
+            return self.cache.get(user_id)
+        if self.mode == 'session':
+            stored = session.get(SESSION_KEY)
+            if stored and stored['id'] == user_id and time.time() - stored['loaded_at'] < self.cache.ttl:
+                return {column: stored[column] for column in SNAPSHOT_COLUMNS}
+        return None
+
+    def remember(self, user: User):
+        if self.mode == 'memory':
+            self.cache.set(user.id, snapshot(user))
+        elif self.mode == 'session':
+            session[SESSION_KEY] = {**snapshot(user), 'loaded_at': time.time()}
+
+    def invalidate(self, user_id: int):
+        """Forget a user after its row changed, call once the change is committed"""
+        self.cache.invalidate(user_id)
+        stored = session.get(SESSION_KEY)
+        if stored and stored['id'] == user_id:
+            session.pop(SESSION_KEY)